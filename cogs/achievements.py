@@ -5,14 +5,18 @@ import math
 
 from core.achievements import ACHIEVEMENTS, AchievementEngine
 from core.emotes import Emotes
-from core.database import get_db_pool
+
+def progress_bar(current, total, length=8):
+    filled = round(length * current / total) if total else length
+    return "▰" * filled + "▱" * (length - filled)
 
 class AchievementPaginationView(View):
-    def __init__(self, ctx, user, earned_ids, all_achievements):
+    def __init__(self, ctx, user, earned_ids, all_achievements, stats=None):
         super().__init__(timeout=60)
         self.ctx = ctx
         self.user = user
         self.earned_ids = earned_ids
+        self.stats = stats or {}
         self.all_data = list(all_achievements.values())
         
         # --- PRE-CALCULATE PAGES ---
@@ -102,7 +106,11 @@ class AchievementPaginationView(View):
                 icon = "✅" if is_unlocked else "🔒"
                 name = f"**{ach.name}**" if is_unlocked else f"*{ach.name}*"
                 
-                description += f"{icon} {name}\n╚ {ach.description}\n\n"
+                description += f"{icon} {name}\n╚ {ach.description}\n"
+                if not is_unlocked and ach.threshold > 1:
+                    done = ach.progress(self.stats)
+                    description += f"   {progress_bar(done, ach.threshold)} {done:,}/{ach.threshold:,}\n"
+                description += "\n"
             
             embed.description = description
             footer_txt = f"View: Details (Page {self.current_page + 1}/{self.total_pages})"
@@ -157,22 +165,22 @@ class AchievementCog(commands.Cog):
         target = user or ctx.author
         user_id = str(target.id)
         
-        pool = await get_db_pool()
-        rows = await pool.fetch("SELECT achievement_id FROM achievements WHERE user_id = $1", user_id)
-        earned_ids = {r['achievement_id'] for r in rows}
+        # One snapshot gives both the earned list and progress towards the rest
+        stats = await AchievementEngine.get_stats(user_id)
+        earned_ids = set(stats.get('earned', []))
 
-        view = AchievementPaginationView(ctx, target, earned_ids, ACHIEVEMENTS)
+        view = AchievementPaginationView(ctx, target, earned_ids, ACHIEVEMENTS, stats)
         embed = await view.get_page_embed()
         
         await ctx.reply(embed=embed, view=view)
 
     @commands.Cog.listener()
     async def on_command_completion(self, ctx):
-        """Automatically checks for new achievements after any command."""
+        """Checks the achievements affected by whatever the command did (usually nothing)."""
         if ctx.author.bot: return
 
         try:
-            new_unlocks = await AchievementEngine.process_all(ctx.author.id)
+            new_unlocks = await AchievementEngine.process_dirty(ctx.author.id)
             
             for ach in new_unlocks:
                 embed = discord.Embed(
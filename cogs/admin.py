@@ -3,12 +3,13 @@ from discord.ext import commands
 import json
 import time
 import re
-import aiohttp
 import asyncio
-from core.database import get_db_pool, batch_cache_characters
+from core.database import get_db_pool, batch_cache_characters, recompute_catalog_power
+from core.catalog import recompute_catalog_file
 from core.skills import get_skill_info, list_all_skills
 from core.image_gen import generate_banner_image
 from core.emotes import Emotes
+from core.achievements import ACHIEVEMENTS, AchievementEngine
 
 class Admin(commands.Cog):
     def __init__(self, bot):
@@ -96,8 +97,7 @@ class Admin(commands.Cog):
                     return await ctx.reply("❌ Gacha system is offline.")
 
                 loading = await ctx.reply(f"🔍 ID `{anilist_id}` not in cache. Fetching from AniList...")
-                async with aiohttp.ClientSession() as session:
-                    api_data = await gacha_cog.fetch_character_by_id(session, anilist_id)
+                api_data = await gacha_cog.fetch_character_by_id(anilist_id)
                 
                 if not api_data: 
                     return await loading.edit(content="❌ Could not find that character or AniList is down.")
@@ -161,34 +161,31 @@ class Admin(commands.Cog):
         banner_ids = []
         char_data_list = []
 
-        async with aiohttp.ClientSession() as session:
-            for item in unit_args:
-                if ":" not in item:
-                    return await ctx.reply(f"❌ Invalid Unit Format: `{item}`. Use `ID:RARITY` (e.g., `12345:SSR`)")
+        for item in unit_args:
+            if ":" not in item:
+                return await ctx.reply(f"❌ Invalid Unit Format: `{item}`. Use `ID:RARITY` (e.g., `12345:SSR`)")
                 
-                try:
-                    cid_str, rarity_str = item.split(":")
-                    cid = int(cid_str.strip())
-                    rarity = rarity_str.strip().upper()
-                except:
-                    return await ctx.reply(f"❌ Parse error on `{item}`.")
-
-                if rarity not in ["SSR", "SR", "R"]:
-                    return await ctx.reply(f"❌ Invalid Rarity `{rarity}`. Use SSR, SR, or R.")
-
-                # Delay to prevent rate limits
-                await asyncio.sleep(0.5)
-
-                # Fetch with FORCED RARITY
-                data = await gacha_cog.fetch_character_by_id(session, cid, forced_rarity=rarity)
+            try:
+                cid_str, rarity_str = item.split(":")
+                cid = int(cid_str.strip())
+                rarity = rarity_str.strip().upper()
+            except:
+                return await ctx.reply(f"❌ Parse error on `{item}`.")
+
+            if rarity not in ["SSR", "SR", "R"]:
+                return await ctx.reply(f"❌ Invalid Rarity `{rarity}`. Use SSR, SR, or R.")
+
+            # Rate limiting is handled by the shared AniList client
+            # Fetch with FORCED RARITY
+            data = await gacha_cog.fetch_character_by_id(cid, forced_rarity=rarity)
                 
-                if data:
-                    char_data_list.append(data)
-                    banner_ids.append(cid)
-                    # IMPORTANT: Cache immediately so the database knows this ID = this Rarity
-                    await batch_cache_characters([data])
-                else:
-                    return await ctx.reply(f"❌ Could not fetch ID `{cid}` from AniList.")
+            if data:
+                char_data_list.append(data)
+                banner_ids.append(cid)
+                # IMPORTANT: Cache immediately so the database knows this ID = this Rarity
+                await batch_cache_characters([data])
+            else:
+                return await ctx.reply(f"❌ Could not fetch ID `{cid}` from AniList.")
 
         if not char_data_list:
             return await ctx.reply("❌ No valid characters found.")
@@ -200,10 +197,12 @@ class Admin(commands.Cog):
         pool = await get_db_pool()
         async with pool.acquire() as conn:
             await conn.execute("UPDATE banners SET is_active = FALSE")
-            await conn.execute("""
+            banner_id = await conn.fetchval("""
                 INSERT INTO banners (name, rate_up_ids, is_active, end_timestamp)
                 VALUES ($1, $2, TRUE, $3)
+                RETURNING id
             """, name, banner_ids, end_time)
+        if gacha_cog: gacha_cog.invalidate_banner(banner_id)
         
         display_time = f"<t:{end_time}:F> (<t:{end_time}:R>)"
         await ctx.reply(
@@ -246,8 +245,7 @@ class Admin(commands.Cog):
             # 1. If not in cache, fetch metadata from AniList first
             if not char:
                 gacha_cog = self.bot.get_cog("Gacha")
-                async with aiohttp.ClientSession() as session:
-                    api_data = await gacha_cog.fetch_character_by_id(session, anilist_id)
+                api_data = await gacha_cog.fetch_character_by_id(anilist_id)
                 if not api_data: 
                     return await ctx.reply("❌ Could not find that unit on AniList.")
                 
@@ -269,9 +267,57 @@ class Admin(commands.Cog):
                     WHERE anilist_id = $3
                 """, rarity, power, anilist_id)
                 name = char['name']
-            
+
+            # Drop the Gacha cog's in-memory override map, rate-up pools and buffered pulls
+            gacha_cog = self.bot.get_cog("Gacha")
+            if gacha_cog: gacha_cog.invalidate_overrides()
+
             await ctx.reply(f"✅ **{name}** (ID: {anilist_id}) overridden to **{rarity}** with **{power:,} Power**.")
 
+    @commands.command(name="reload_ranks")
+    @commands.is_owner()
+    async def reload_ranks(self, ctx):
+        """(Owner Only) Reloads the rank index and character catalog written by scripts/update_ranks.py."""
+        gacha_cog = self.bot.get_cog("Gacha")
+        if not gacha_cog:
+            return await ctx.reply("❌ Gacha system is offline.")
+
+        ranks, catalog = gacha_cog.reload_rank_data()
+        await ctx.reply(f"✅ Reloaded **{ranks:,}** ranks and **{catalog:,}** catalog entries.")
+
+    @commands.command(name="recompute_power")
+    @commands.is_owner()
+    async def recompute_power(self, ctx):
+        """(Owner Only) Re-applies the current power formula to every non-overridden unit and the catalog."""
+        loading = await ctx.reply("🧮 *Recomputing power for the whole catalog...*")
+        start = time.perf_counter()
+        checked, changed = await recompute_catalog_power()
+        catalog_count = recompute_catalog_file()
+
+        gacha_cog = self.bot.get_cog("Gacha")
+        if gacha_cog: gacha_cog.reload_rank_data()
+
+        await loading.edit(content=(
+            f"✅ Checked **{checked:,}** cached units, updated **{changed:,}**. "
+            f"Catalog entries refreshed: **{catalog_count:,}**. ({time.perf_counter() - start:.2f}s)"
+        ))
+
+    @commands.command(name="backfill_achievement")
+    @commands.is_owner()
+    async def backfill_achievement(self, ctx, achievement_id: str):
+        """(Owner Only) Grants an achievement to every user who already qualifies for it."""
+        achievement_id = achievement_id.upper()
+        if achievement_id not in ACHIEVEMENTS:
+            return await ctx.reply(f"❌ Unknown achievement `{achievement_id}`.")
+
+        loading = await ctx.reply(f"🏅 *Backfilling **{ACHIEVEMENTS[achievement_id].name}** across all users...*")
+        start = time.perf_counter()
+        scanned, granted = await AchievementEngine.backfill(achievement_id)
+        await loading.edit(content=(
+            f"✅ Scanned **{scanned:,}** users, granted **{achievement_id}** to **{granted:,}**. "
+            f"({time.perf_counter() - start:.2f}s)"
+        ))
+
     @commands.command(name="apologems")
     @commands.is_owner()
     async def apologems(self, ctx, amount: int, *, reason: str = "Compensation"):
@@ -2,13 +2,21 @@
 
 import discord
 from discord.ext import commands
-import random
-import json
 import typing
+import re
+import json
+import time
+import asyncio
+import functools
 from core.database import get_db_pool
-from core.game_math import calculate_effective_power
+from core.npc import generate_npc_team, NPC_DIFFICULTIES
 from core.image_gen import generate_battle_image
-from core.skills import create_skill_instance, BattleContext
+from core.skills import BattleEngine
+from core.battle_records import new_seed, battle_rng, record_battle, get_battle_record, replay_battle
+from core.skills.simulation import simulate_battle, wilson_interval
+from core.achievements import AchievementEngine, Event
+
+ODDS_TRIALS = 10000
 
 class Battle(commands.Cog):
     def __init__(self, bot):
@@ -30,48 +38,16 @@ class Battle(commands.Cog):
             chars = await conn.fetch("""
                 SELECT 
                     i.id, c.anilist_id, c.name, 
-                    FLOOR(
-                        c.true_power 
-                        * (1 + (COALESCE(i.dupe_level, 0) * 0.05)) 
-                        * (1 + (COALESCE(u.team_level, 1) * 0.01))
-                        * (1 + (COALESCE(i.bond_level, 1) * 0.005)) -- Added Bond Multiplier
-                    )::int as true_power, 
+                    i.effective_power as true_power, -- dupe, team level and bond bonuses (kept current by triggers)
                     i.dupe_level, i.bond_level, c.ability_tags, c.rarity, c.rank, c.image_url 
                 FROM inventory i 
                 JOIN characters_cache c ON i.anilist_id = c.anilist_id
-                LEFT JOIN users u ON i.user_id = u.user_id 
                 WHERE i.id = ANY($1)
             """, slot_ids)
             
             char_map = {c['id']: dict(c) for c in chars}
             return [char_map[sid] for sid in slot_ids if sid in char_map]
 
-    def generate_npc_team(self, difficulty):
-        """Generates a mock NPC team based on difficulty."""
-        team = []
-        rules = {
-            "easy":      [("R", 1501, 10000)] * 5,
-            "normal":    [("R", 1501, 10000)] * 3 + [("SR", 251, 1500)] * 2,
-            "hard":      [("SR", 251, 1500)] * 5,
-            "expert":    [("SSR", 1, 250)] * 2 + [("SR", 251, 1500)] * 2 + [("R", 1501, 10000)] * 1,
-            "nightmare": [("SSR", 1, 250)] * 3 + [("SR", 251, 1500)] * 2,
-            "hell":      [("SSR", 1, 50)] * 2 + [("SSR", 1, 250)] * 3
-        }
-        setup = rules.get(difficulty.lower(), rules["normal"])
-        
-        for rarity, min_rank, max_rank in setup:
-            rank = random.randint(min_rank, max_rank)
-            mock_favs = int(600000 / (rank**0.5)) 
-            power = calculate_effective_power(mock_favs, rarity, rank)
-            team.append({
-                'name': f"NPC {rarity}", 
-                'true_power': power, 
-                'ability_tags': [], 
-                'rarity': rarity, 
-                'image_url': None
-            })
-        return team
-
     @commands.command(name="battle")
     async def battle(self, ctx, target: typing.Union[discord.Member, str] = None):
         """Initiates a team-based battle against a player or NPC."""
@@ -92,133 +68,44 @@ class Battle(commands.Cog):
                 return await ctx.reply(f"❌ {target.display_name} does not have a team set up.")
         elif isinstance(target, str):
             diff = target.lower()
-            valid_diffs = ["easy", "normal", "hard", "expert", "nightmare", "hell"]
-            if diff not in valid_diffs:
-                return await ctx.reply(f"❌ Invalid difficulty. Choose from: {', '.join(valid_diffs)}")
+            if diff not in NPC_DIFFICULTIES:
+                return await ctx.reply(f"❌ Invalid difficulty. Choose from: {', '.join(NPC_DIFFICULTIES)}")
             
-            defender_team = self.generate_npc_team(diff)
+            defender_team = None  # rolled from the battle seed below
             defender_name = f"{diff.capitalize()} NPC"
             task_key = diff
         else:
-            defender_team = self.generate_npc_team("normal")
+            defender_team = None
             defender_name = "Training Dummy NPC"
             task_key = "normal"
 
         loading_msg = await ctx.reply("⚔️ **The battle is commencing...**")
 
-        # --- 1. INITIALIZE ENGINE ---
-        battle_ctx = BattleContext(attacker_team, defender_team)
-        all_skills = []
-
-        def load_skills(team, side):
-            for i, char in enumerate(team):
-                if not char: continue
-                tags = char.get('ability_tags', [])
-                if isinstance(tags, str): tags = json.loads(tags)
-                for tag in tags:
-                    skill = create_skill_instance(tag, char, i, side)
-                    if skill: all_skills.append(skill)
-
-        load_skills(attacker_team, "attacker")
-        load_skills(defender_team, "defender")
-        all_skills.sort(key=lambda s: s.priority, reverse=True)
-
-        # --- 2. PHASE: START OF BATTLE ---
-        # (Zodiacs, Disables, Kamikaze, Team Debuffs)
-        for skill in all_skills:
-            await skill.on_battle_start(battle_ctx)
-
-        # --- 3. PHASE: CALCULATION ---
-        final_powers = {"attacker": [], "defender": []}
-
-        # Calculate Individual Powers (Base * Mods * Context)
-        for side in ["attacker", "defender"]:
-            team = battle_ctx.get_team(side)
-            for i, char in enumerate(team):
-                if not char: 
-                    final_powers[side].append(0)
-                    continue
-                
-                # Base Power
-                p = char['true_power']
-                
-                # Ask skills for multipliers (Only OWN skills)
-                my_skills = [s for s in all_skills if s.side == side and s.idx == i]
-                for s in my_skills:
-                    mod = await s.get_power_modifier(battle_ctx, p)
-                    p *= mod
-
-                # Apply Context Multipliers (Debuffs, Global Buffs)
-                p *= battle_ctx.multipliers[side][i]
-                p += battle_ctx.flat_bonuses[side][i]
-
-                # Apply Variance (unless locked by Dragon Zodiac)
-                if battle_ctx.flags.get("variance_override", {}).get(f"{side}_{i}"):
-                    variance = battle_ctx.flags["variance_override"][f"{side}_{i}"]
-                else:
-                    variance = random.uniform(0.9, 1.1)
-                
-                final_powers[side].append(max(0, p * variance))
-
-        # Post-Calculation Logic (Monkey swap, Dog copy, etc.)
-        for skill in all_skills:
-            await skill.on_post_power_calculation(battle_ctx, final_powers)
-
-        # Final Summation
-        final_team_totals = {"attacker": 0, "defender": 0}
-        for side in ["attacker", "defender"]:
-            total = sum(final_powers[side])
-            final_team_totals[side] = total
-
-        # --- 4. PHASE: OUTCOME ---
-        initial_win = final_team_totals["attacker"] > final_team_totals["defender"]
-        outcome = "WIN" if initial_win else "LOSS"
-        
-        if outcome == "WIN" and isinstance(target, discord.Member) and target.id == 1463071276036788392:
+        seed = new_seed()
+        if defender_team is None:
+            defender_team = generate_npc_team(task_key, battle_rng(seed, "npc"))
+        result = BattleEngine(battle_rng(seed)).run(attacker_team, defender_team)
+
+        if result.initial_win and isinstance(target, discord.Member) and target.id == 1463071276036788392:
             try:
                 await pool.execute("""
                     INSERT INTO boss_kills (user_id, boss_id) 
                     VALUES ($1, $2) 
                     ON CONFLICT DO NOTHING
                 """, attacker_id, str(target.id))
+                AchievementEngine.mark(attacker_id, Event.BOSS)
             except Exception as e:
                 print(f"Error recording boss kill: {e}")
-            
-        # Check Snake Trap
-        if not initial_win and battle_ctx.flags.get("snake_trap"):
-            outcome = "DRAW"
-            battle_ctx.add_log("attacker", None, "🐍 The **Snake Zodiac** trap triggered! Defeat -> **DRAW**.")
-
-        # Check Revive Skills (Only trigger on LOSS)
-        if outcome == "LOSS":
-             for skill in all_skills:
-                 if skill.side == "attacker":
-                     new_outcome = await skill.on_battle_end(battle_ctx, outcome)
-                     if new_outcome: 
-                         outcome = new_outcome
-                         break
-
-        # --- EMBED GENERATION ---
-        win_idx = 1 if outcome == "WIN" else (2 if outcome == "LOSS" else 0)
-        color = 0x5865F2 if win_idx == 1 else (0xED4245 if win_idx == 2 else 0x979C9F)
-        
-        # Flatten logs
-        atk_logs = [l for slot in battle_ctx.logs["attacker"].values() for l in slot] + battle_ctx.misc_logs["attacker"]
-        def_logs = [l for slot in battle_ctx.logs["defender"].values() for l in slot] + battle_ctx.misc_logs["defender"]
 
-        embed = discord.Embed(
-            title=f"⚔️ {ctx.author.display_name} vs {defender_name}",
-            description=f"🏆 **Winner: {'Draw' if win_idx == 0 else (ctx.author.display_name if win_idx == 1 else defender_name)}**",
-            color=color
+        defender_id = target.id if isinstance(target, discord.Member) else None
+        battle_id = await record_battle(
+            "pvp" if defender_id else task_key, attacker_id, defender_id, defender_name,
+            seed, attacker_team, defender_team, result
         )
 
-        embed.add_field(name=f"🔵 {ctx.author.display_name}", value=f"Total: **{int(final_team_totals['attacker']):,}**", inline=True)
-        embed.add_field(name=f"🔴 {defender_name}", value=f"Total: **{int(final_team_totals['defender']):,}**", inline=True)
-
-        if atk_logs:
-            embed.add_field(name="🔹 Attacker Highlights", value="\n".join(atk_logs[:10]), inline=False)
-        if def_logs:
-            embed.add_field(name="🔸 Defender Highlights", value="\n".join(def_logs[:10]), inline=False)
+        embed, win_idx = self.build_battle_embed(result, ctx.author.display_name, defender_name)
+        if battle_id:
+            embed.set_footer(text=f"Battle #{battle_id} • !replay {battle_id}")
 
         # Task Progress
         pool = await get_db_pool()
@@ -241,5 +128,108 @@ class Battle(commands.Cog):
         await loading_msg.delete()
         await ctx.reply(file=file, embed=embed)
 
+    def build_battle_embed(self, result, attacker_name, defender_name):
+        """Result embed shared by !battle and !replay. Returns (embed, winner_idx for the battle image)."""
+        outcome = result.outcome
+        final_team_totals = result.totals
+        win_idx = 1 if outcome == "WIN" else (2 if outcome == "LOSS" else 0)
+        color = 0x5865F2 if win_idx == 1 else (0xED4245 if win_idx == 2 else 0x979C9F)
+        
+        # Flatten logs
+        atk_logs = result.side_logs("attacker")
+        def_logs = result.side_logs("defender")
+
+        embed = discord.Embed(
+            title=f"⚔️ {attacker_name} vs {defender_name}",
+            description=f"🏆 **Winner: {'Draw' if win_idx == 0 else (attacker_name if win_idx == 1 else defender_name)}**",
+            color=color
+        )
+
+        embed.add_field(name=f"🔵 {attacker_name}", value=f"Total: **{int(final_team_totals['attacker']):,}**", inline=True)
+        embed.add_field(name=f"🔴 {defender_name}", value=f"Total: **{int(final_team_totals['defender']):,}**", inline=True)
+
+        if atk_logs:
+            embed.add_field(name="🔹 Attacker Highlights", value="\n".join(atk_logs[:10]), inline=False)
+        if def_logs:
+            embed.add_field(name="🔸 Defender Highlights", value="\n".join(def_logs[:10]), inline=False)
+        return embed, win_idx
+
+    @commands.command(name="replay")
+    async def replay(self, ctx, battle_id: int):
+        """Rebuilds a past battle (logs and image) from its seed and team snapshots."""
+        record = await get_battle_record(battle_id)
+        if not record:
+            return await ctx.reply(f"❌ Battle #{battle_id} not found.")
+
+        result, matches = replay_battle(record)
+
+        member = ctx.guild.get_member(int(record['attacker_id'])) if ctx.guild else None
+        attacker_name = member.display_name if member else f"User {record['attacker_id']}"
+        defender_name = record['defender_name'] or "Unknown"
+
+        embed, win_idx = self.build_battle_embed(result, attacker_name, defender_name)
+        if not matches:
+            embed.add_field(
+                name="⚠️ Rules changed",
+                value=(f"This replay no longer matches the original result: **{record['outcome']}** "
+                       f"({record['attacker_total']:,} vs {record['defender_total']:,})."),
+                inline=False
+            )
+        embed.set_footer(text=f"Replay of battle #{battle_id} • {record['kind']} • {record['created_at']:%Y-%m-%d %H:%M} UTC")
+
+        img_bytes = await generate_battle_image(
+            record['attacker_team'], record['defender_team'], attacker_name, defender_name, winner_idx=win_idx
+        )
+        file = discord.File(fp=img_bytes, filename="battle.png")
+        embed.set_image(url="attachment://battle.png")
+        await ctx.reply(file=file, embed=embed)
+
+    @commands.command(name="odds")
+    async def odds(self, ctx, target: typing.Union[discord.Member, str] = None):
+        """Estimates your win/draw/loss odds against a player, an NPC difficulty or a bounty slot (e.g. `!odds slot2`)."""
+        attacker_team = await self.get_team_for_battle(str(ctx.author.id))
+        if not attacker_team:
+            return await ctx.reply("❌ Your team is empty! Use `!team` to set one up.")
+
+        defender_team, npc_difficulty = None, None
+        if isinstance(target, discord.Member):
+            defender_team = await self.get_team_for_battle(str(target.id))
+            defender_name = target.display_name
+            if not defender_team:
+                return await ctx.reply(f"❌ {target.display_name} does not have a team set up.")
+        else:
+            diff = (target or "normal").lower()
+            slot = re.fullmatch(r"(?:slot|bounty|b)?(\d)", diff)
+            if slot:
+                pool = await get_db_pool()
+                row = await pool.fetchrow("SELECT enemy_data, tier FROM bounty_board WHERE slot_id = $1", int(slot.group(1)))
+                if not row:
+                    return await ctx.reply(f"❌ There is no bounty in slot {slot.group(1)} right now.")
+                defender_team = json.loads(row['enemy_data'])
+                defender_name = f"Bounty Slot {slot.group(1)} ({row['tier']})"
+            elif diff in NPC_DIFFICULTIES:
+                npc_difficulty = diff
+                defender_name = f"{diff.capitalize()} NPC"
+            else:
+                return await ctx.reply(f"❌ Unknown target. Use a player, a bounty slot (`slot1`-`slot3`) or one of: {', '.join(NPC_DIFFICULTIES)}")
+
+        # numpy releases the GIL for most of this, but keep it off the event loop regardless
+        start = time.perf_counter()
+        stats = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(simulate_battle, attacker_team, defender_team, npc_difficulty, ODDS_TRIALS)
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        embed = discord.Embed(title=f"🎲 {ctx.author.display_name} vs {defender_name}", color=0x5865F2)
+        for key, label in (("win", "🏆 Win"), ("draw", "🤝 Draw"), ("loss", "💀 Loss")):
+            low, high = wilson_interval(stats[key], stats['trials'])
+            embed.add_field(
+                name=label,
+                value=f"**{stats[key] / stats['trials']:.1%}**\n95% CI {low:.1%} – {high:.1%}",
+                inline=True
+            )
+        embed.set_footer(text=f"{stats['trials']:,} simulated battles in {elapsed_ms:.0f} ms")
+        await ctx.reply(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(Battle(bot))
\ No newline at end of file
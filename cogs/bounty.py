@@ -2,7 +2,6 @@ import discord
 from discord.ext import commands, tasks
 from discord.ui import View, Select, Button
 import json
-import random
 import datetime
 import io
 import asyncio
@@ -11,9 +10,12 @@ import os
 from core.database import get_db_pool
 from core.game_math import calculate_bond_exp_required
 from core.emotes import Emotes
-from core.skills import create_skill_instance, BattleContext
+from core.skills import BattleEngine
+from core.npc import roll_bounty, generate_bounty_team
+from core.battle_records import new_seed, battle_rng, record_battle
 from core.image_gen import generate_team_image
 from core.tracker import Tracker
+from core.achievements import AchievementEngine, Event
 
 # --- CONFIGURATION ---
 BANNER_URL = "https://media.discordapp.net/attachments/995879199959162882/1465111664583115009/twtbountyboard.png"
@@ -208,35 +210,13 @@ class Bounty(commands.Cog):
         expires_at = datetime.datetime.now() + datetime.timedelta(hours=1)
         expires_at = expires_at.replace(minute=0, second=0, microsecond=0)
 
-        tier_config = {
-            "R": (30000, 35000),
-            "SR": (50000, 55000),
-            "SSR": (75000, 80000)
-        }
-
         async with pool.acquire() as conn:
             await conn.execute("DELETE FROM bounty_board")
             await conn.execute("DELETE FROM user_bounty_status")
             
             for slot in range(1, 4):
-                base_tier = random.choice(list(tier_config.keys()))
-                min_p, max_p = tier_config[base_tier]
-
-                is_ur = random.random() < 0.01
-                final_tier = "UR" if is_ur else base_tier
-                total_power = 90000 if is_ur else random.randint(min_p, max_p)
-                
-                member_power = total_power // 5
-                team_data = []
-                for i in range(5):
-                    team_data.append({
-                        'name': f"{final_tier} Enemy",
-                        'true_power': member_power,
-                        'rarity': final_tier,
-                        'ability_tags': [], 
-                        'anilist_id': 0, 
-                        'image_url': None
-                    })
+                final_tier, total_power = roll_bounty()
+                team_data = generate_bounty_team(final_tier, total_power)
                 
                 await conn.execute("""
                     INSERT INTO bounty_board (slot_id, enemy_data, tier, expires_at)
@@ -383,71 +363,15 @@ class Bounty(commands.Cog):
             
             # 3. Run Battle
             debug_log.append("STEP 3: Battle Execution")
-            ctx = BattleContext(attacker_team, defender_team)
-
-            # -- Initialize Skills --
-            all_skills = []
-            for side, team in [("attacker", attacker_team), ("defender", defender_team)]:
-                for i, char in enumerate(team):
-                    if not char: continue
-                    tags = char.get('ability_tags', [])
-                    if isinstance(tags, str): tags = json.loads(tags)
-                    for tag in tags:
-                        s = create_skill_instance(tag, char, i, side)
-                        if s: all_skills.append(s)
-
-            # -- Start Phase --
-            for s in all_skills: await s.on_battle_start(ctx)
-            
-            # -- Power Calculation --
-            final_powers = {"attacker": [], "defender": []}
-            for side in ["attacker", "defender"]:
-                team = ctx.get_team(side)
-                for i, char in enumerate(team):
-                    if not char:
-                        final_powers[side].append(0)
-                        continue
-                    
-                    power = char['true_power']
-                    # Apply Skill Modifiers
-                    for s in all_skills:
-                        if s.side == side and s.idx == i:
-                            mod = await s.get_power_modifier(ctx, power)
-                            power *= mod
-                    
-                    # Apply Multipliers (Context)
-                    power *= ctx.multipliers[side][i]
-                    power += ctx.flat_bonuses[side][i]
-                    
-                    # Apply Variance
-                    variance_val = ctx.flags.get("variance_override", {}).get(f"{side}_{i}", None)
-                    if variance_val is None:
-                        variance_val = random.uniform(0.9, 1.1)
-                    
-                    final_powers[side].append(max(0, int(power * variance_val)))
-            
-            # -- Post Calc (Zodiac swaps/copies) --
-            for s in all_skills:
-                await s.on_post_power_calculation(ctx, final_powers)
-
-            # -- Outcome --
-            total_att = sum(final_powers["attacker"])
-            total_def = sum(final_powers["defender"])
-            
-            initial_win = total_att > total_def
-            outcome = "WIN" if initial_win else "LOSS"
-            
-            if not initial_win and ctx.flags.get("snake_trap"):
-                outcome = "DRAW"
-                ctx.misc_logs["defender"].append("🐍 **Snake Zodiac** forced a DRAW!")
-
-            if outcome == "LOSS":
-                 for s in all_skills:
-                     if s.side == "attacker":
-                         new_res = await s.on_battle_end(ctx, outcome)
-                         if new_res: 
-                             outcome = new_res
-                             break
+            seed = new_seed()
+            result = BattleEngine(battle_rng(seed)).run(attacker_team, defender_team)
+            battle_id = await record_battle(
+                "bounty", user_id, None, f"Bounty Slot {slot_id} ({bounty_row['tier']})",
+                seed, attacker_team, defender_team, result
+            )
+            outcome = result.outcome
+            total_att = result.totals["attacker"]
+            total_def = result.totals["defender"]
 
             # -- Status Update --
             final_status = "COMPLETED" if outcome == "WIN" else "FAILED"
@@ -474,6 +398,7 @@ class Bounty(commands.Cog):
                 # 2. Increment Total Bounty Wins (for VETERAN_HUNTER)
                 # Use 'interaction.user.id' instead of 'ctx.author.id'
                 await Tracker.increment_bounty_wins(interaction.user.id)
+                AchievementEngine.mark(user_id, Event.BOUNTY)
             # 4. Rewards
             debug_log.append("STEP 4: Rewards")
             loot_text = "None"
@@ -501,13 +426,7 @@ class Bounty(commands.Cog):
             
             # 5. Collect Logs
             debug_log.append("STEP 5: Processing Logs")
-            combined_logs = []
-            if ctx.misc_logs['attacker']: combined_logs.extend(ctx.misc_logs['attacker'])
-            if ctx.misc_logs['defender']: combined_logs.extend(ctx.misc_logs['defender'])
-            for side in ['attacker', 'defender']:
-                for slot_idx in sorted(ctx.logs[side].keys()):
-                    for msg in ctx.logs[side][slot_idx]:
-                        combined_logs.append(msg)
+            combined_logs = result.all_logs()
 
             # 6. Generate Result UI
             debug_log.append("STEP 6: Generating UI")
@@ -535,6 +454,9 @@ class Bounty(commands.Cog):
             filename = "victory.png" if outcome == "WIN" else "defeat.png"
             asset_path = f"assets/battle results/{filename}"
 
+            if battle_id:
+                result_embed.set_footer(text=f"Battle #{battle_id} • !replay {battle_id}")
+
             if os.path.exists(asset_path):
                 file = discord.File(asset_path, filename=filename)
                 result_embed.set_image(url=f"attachment://{filename}")
@@ -712,12 +634,14 @@ class Bounty(commands.Cog):
 
                 # Result Message
                 if cur_lvl > start_lvl:
+                    AchievementEngine.mark(user_id, Event.BOND)
                     results_msg.append(f"✅ **{unit['name']}**: +{exp_gain} XP 🆙 **Lv. {start_lvl} ➜ {cur_lvl}**")
                 else:
                     req_next = calculate_bond_exp_required(cur_lvl)
                     results_msg.append(f"✅ **{unit['name']}**: +{exp_gain} XP ({cur_exp}/{req_next})")
                 
         await Tracker.increment_bounty_wins(user_id)
+        AchievementEngine.mark(user_id, Event.BOUNTY)
 
         # --- SEND SUMMARY ---
         final_output = "\n".join(results_msg)
@@ -4,6 +4,7 @@ import datetime
 from core.database import get_db_pool, add_currency
 from core.emotes import Emotes
 from core.tracker import Tracker
+from core.achievements import AchievementEngine, Event
 
 NPC_DATA = {
     "easy":      {"reward": 500,  "desc": "Defeat an Easy NPC Team (5 R)"},
@@ -43,6 +44,7 @@ class Daily(commands.Cog):
                 streak = 1 
 
             await Tracker.update_streak(user_id, streak)
+            AchievementEngine.mark(user_id, Event.CHECKIN)
 
             await add_currency(user_id, 1500)
             await conn.execute("UPDATE users SET last_daily_exchange = CURRENT_TIMESTAMP WHERE user_id = $1", user_id)
@@ -15,16 +15,7 @@ class Event(commands.Cog):
         """Fetches or initializes user event data."""
         pool = await get_db_pool()
         async with pool.acquire() as conn:
-            # Table: event_ranking
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS event_ranking (
-                    user_id TEXT PRIMARY KEY,
-                    score INTEGER DEFAULT 0,
-                    tickets INTEGER DEFAULT 3,
-                    last_reset TEXT
-                )
-            """)
-            
+            # Table: event_ranking (created by core/migrations.py)
             row = await conn.fetchrow("SELECT * FROM event_ranking WHERE user_id = $1", user_id)
             today = datetime.datetime.utcnow().strftime("%Y-%m-%d")
 
@@ -87,18 +78,11 @@ class Event(commands.Cog):
             if not slot_ids:
                 return await ctx.reply("⚠️ Your team is empty! Use `!stb` to add units.")
 
-            # 2. Calculate Power of these specific units
-            # Formula: Base * DupeBonus * TeamLevelBonus
+            # 2. Power of these specific units (inventory.effective_power, kept current by triggers)
             power_rows = await conn.fetch("""
-                SELECT FLOOR(
-                    c.true_power 
-                    * (1 + (COALESCE(i.dupe_level, 0) * 0.05)) 
-                    * (1 + (COALESCE(u.team_level, 1) * 0.01))
-                )::int as effective_power
-                FROM inventory i
-                JOIN characters_cache c ON i.anilist_id = c.anilist_id
-                LEFT JOIN users u ON i.user_id = u.user_id
-                WHERE i.id = ANY($1)
+                SELECT effective_power
+                FROM inventory
+                WHERE id = ANY($1)
             """, slot_ids)
 
             # Damage = Sum of the Active Team
@@ -7,6 +7,7 @@ from core.economy import Economy, GEMS_PER_PULL
 from core.skills import get_skill_info
 from core.emotes import Emotes
 from core.tracker import Tracker
+from core.achievements import AchievementEngine, Event
 
 class Expedition(commands.Cog):
     def __init__(self, bot):
@@ -193,6 +194,7 @@ class Expedition(commands.Cog):
             """, final_gems, cur_lvl, cur_xp, user_id)
             
             await Tracker.track_expedition_gain(user_id, final_gems)
+            AchievementEngine.mark(user_id, Event.EXPEDITION)
             
             await pool.execute("""
                 UPDATE expeditions SET start_time = NULL, last_claim = $1 WHERE user_id = $2
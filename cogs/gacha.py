@@ -1,50 +1,72 @@
 import discord
-from discord.ext import commands
-import aiohttp
+from discord.ext import commands, tasks
 import random
 import os
 import asyncio
-import json
 import time
+from collections import deque
 
 # Internal imports (Ensure these match your folder structure)
-from core.database import get_user, batch_add_to_inventory, batch_cache_characters, get_db_pool
+from core.database import get_user, commit_pull, get_db_pool
 from core.game_math import calculate_effective_power
+from core.catalog import get_catalog, reload_catalog, determine_rarity
+from core.rank_index import get_rank_index, reload_rank_index
+from core.anilist import get_anilist
 from core.image_gen import generate_10_pull_image, generate_banner_image
 from core.economy import Economy, GEMS_PER_PULL
+from core.achievements import AchievementEngine, Event
 from core.emotes import Emotes
-from core.tracker import Tracker
+
+# Rank range per tier. A pull's rank is drawn uniformly inside its tier's range.
+TIER_RANKS = {"SSR": (1, 250), "SR": (251, 1500), "R": (1501, 10000)}
+
+# Pre-resolved records kept ready per tier (sized roughly to the pull odds)
+PREFETCH_TARGETS = {"SSR": 20, "SR": 40, "R": 150}
+PREFETCH_BATCH = 30  # max records resolved per refill tick
 
 class Gacha(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.anilist_url = os.getenv("ANILIST_URL", "https://graphql.anilist.co")
-        self.rank_map = {}
-        self.load_rankings()
+        self.anilist = get_anilist()
+        self.ranks = get_rank_index()
+        self.catalog = get_catalog()
+        self.prefetched = {tier: deque() for tier in TIER_RANKS}
+        self.prefetch_generation = 0  # bumped on invalidation; refills from an older generation are dropped
+        self.overrides = None      # anilist_id -> (rarity, true_power); None = reload on next use
+        self.rate_up_pools = {}    # banner id -> {rarity: [anilist_id, ...]}
+        self.prefetch_loop.start()
 
-    def load_rankings(self):
-        try:
-            with open("data/rankings.json", "r") as f:
-                self.rank_map = json.load(f)
-            print(f"✅ [Gacha] Loaded {len(self.rank_map)} characters from rankings.json")
-        except FileNotFoundError:
-            print("⚠️ [Gacha] 'data/rankings.json' not found. Please run scripts/update_ranks.py")
+    def cog_unload(self):
+        self.prefetch_loop.cancel()
+
+    def reload_rank_data(self):
+        """Re-opens the rank index and catalog after scripts/update_ranks.py has refreshed them."""
+        self.ranks = reload_rank_index()
+        self.catalog = reload_catalog()
+        # Buffered pulls were placed with the old ranks
+        self.invalidate_overrides()
+        return len(self.ranks), len(self.catalog)
 
     def get_cached_rank(self, anilist_id):
-        return self.rank_map.get(str(anilist_id), 10001)
+        return self.ranks.get(anilist_id, 10001)
 
     def determine_rarity(self, rank):
-        if rank <= 250: return "SSR"
-        if rank <= 1500: return "SR"
+        return determine_rarity(rank)
+
+    def roll_rank(self, rarity):
+        return random.randint(*TIER_RANKS[rarity])
+
+    def roll_rarity(self, guaranteed_ssr=False):
+        if guaranteed_ssr: return "SSR"
+
+        roll = random.random() * 100
+        if roll < 2:  return "SSR"
+        if roll < 13: return "SR"
         return "R"
 
     def get_rarity_and_page(self, guaranteed_ssr=False):
-        if guaranteed_ssr: return "SSR", random.randint(1, 250)
-        
-        roll = random.random() * 100
-        if roll < 2:  return "SSR", random.randint(1, 250)
-        if roll < 13: return "SR", random.randint(251, 1500)
-        return "R", random.randint(1501, 10000)
+        rarity = self.roll_rarity(guaranteed_ssr)
+        return rarity, self.roll_rank(rarity)
 
     async def get_active_banner(self):
         pool = await get_db_pool()
@@ -58,137 +80,222 @@ class Gacha(commands.Cog):
             
         return banner
 
-    async def process_spark_points(self, user_id, banner_id, amount):
-        """Adds spark points and resets if the banner has changed."""
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            user = await conn.fetchrow("SELECT banner_points, last_banner_id FROM users WHERE user_id = $1", str(user_id))
-            
-            current_points = user['banner_points'] if user and user['banner_points'] is not None else 0
-            last_id = user['last_banner_id'] if user and user['last_banner_id'] is not None else -1
-            
-            if last_id != banner_id:
-                current_points = 0
-            
-            new_points = current_points + amount
-            
-            await conn.execute("""
-                UPDATE users 
-                SET banner_points = $1, last_banner_id = $2 
-                WHERE user_id = $3
-            """, new_points, banner_id, str(user_id))
-            
-            return new_points
+    async def get_rate_up_pools(self, banner):
+        """Rate-up IDs grouped by cached rarity. One query per banner, then served from memory."""
+        pools = self.rate_up_pools.get(banner['id'])
+        if pools is None:
+            pool = await get_db_pool()
+            rows = await pool.fetch("""
+                SELECT anilist_id, rarity FROM characters_cache 
+                WHERE anilist_id = ANY($1)
+            """, banner['rate_up_ids'])
+            pools = {}
+            for row in rows:
+                pools.setdefault(row['rarity'], []).append(row['anilist_id'])
+            # Only cache once every rate-up is in characters_cache; a partial pool would stick for the whole banner
+            if len(rows) == len(set(banner['rate_up_ids'])):
+                self.rate_up_pools[banner['id']] = pools
+        return pools
 
-    async def fetch_banner_pull(self, session, banner):
-        """Logic for pulling from a specific banner (handling rate-ups)."""
-        rarity, page = self.get_rarity_and_page()
+    def invalidate_banner(self, banner_id=None):
+        """Forgets the cached rate-up pool of one banner (or all) after it is set or edited."""
+        if banner_id is None:
+            self.rate_up_pools.clear()
+        else:
+            self.rate_up_pools.pop(banner_id, None)
+
+    def plan_banner_pull(self, banner, rate_up_pools):
+        """Rolls a single pull on a banner (handling rate-ups). Returns a pull plan."""
+        rarity = self.roll_rarity()
         
         # Check Rate-up Chance
         if rarity in ["SSR", "SR"] and random.random() < banner['rate_up_chance']:
-            pool = await get_db_pool()
-            possible_hits = await pool.fetch("""
-                SELECT anilist_id FROM characters_cache 
-                WHERE anilist_id = ANY($1) AND rarity = $2
-            """, banner['rate_up_ids'], rarity)
-            
+            possible_hits = rate_up_pools.get(rarity)
             if possible_hits:
-                target_id = random.choice(possible_hits)['anilist_id']
-                return await self.fetch_character_by_id(session, target_id)
+                return ("id", random.choice(possible_hits), None)
 
         # Fallback to standard pool
-        return await self.fetch_character_by_rank(session, rarity, page)
-
-    async def fetch_character_by_id(self, session, anilist_id: int, forced_rarity=None):
-        """Fetches character data from AniList by ID."""
-        query = """
-        query ($id: Int) {
-            Character(id: $id) {
-                id
-                name { full }
-                image { large }
-                favourites
-            }
+        return ("tier", None, rarity)
+
+    def plan_placement(self, plan):
+        """Returns the (rarity, rank) a pull plan resolves to."""
+        kind, value, rarity = plan
+        if kind == "rank":
+            return rarity, value
+        if rarity:
+            # Forced rarity (banner setup): fixed placeholder rank per tier
+            return rarity, (1 if rarity == "SSR" else 500)
+        rank = self.get_cached_rank(value)
+        return self.determine_rarity(rank), rank
+
+    async def get_overrides(self):
+        """Manually overridden units from characters_cache, loaded once and kept in memory."""
+        if self.overrides is None:
+            pool = await get_db_pool()
+            rows = await pool.fetch("SELECT anilist_id, rarity, true_power FROM characters_cache WHERE is_overridden = TRUE")
+            self.overrides = {r['anilist_id']: (r['rarity'], r['true_power']) for r in rows}
+        return self.overrides
+
+    def invalidate_overrides(self):
+        """Called after an override changes. Buffered pulls and rate-up pools may hold the old rarity/power."""
+        self.overrides = None
+        self.rate_up_pools.clear()
+        self.prefetch_generation += 1
+        for buffer in self.prefetched.values():
+            buffer.clear()
+
+    async def apply_overrides(self, records):
+        """Swaps in manually overridden rarity/power for every record at once."""
+        overrides = await self.get_overrides()
+        for record in records:
+            if record and record['id'] in overrides:
+                record['rarity'], record['true_power'] = overrides[record['id']]
+        return records
+
+    def record_from_catalog(self, entry, rarity, rank):
+        """Builds a pull record from a catalog entry without touching the network."""
+        if rarity == entry['rarity'] and rank == entry['rank']:
+            true_p = entry['true_power']
+        else:
+            true_p = calculate_effective_power(entry['favs'], rarity, rank)
+        return {
+            'id': entry['id'],
+            'name': entry['name'],
+            'image_url': entry['image_url'],
+            'favs': entry['favs'],
+            'rarity': rarity,
+            'page': rank,
+            'true_power': true_p
+        }
+
+    def record_from_api(self, char, rarity, rank):
+        """Builds a pull record from an AniList Character object."""
+        return {
+            'id': char['id'],
+            'name': char['name']['full'],
+            'image_url': char['image']['large'],
+            'favs': char['favourites'],
+            'rarity': rarity,
+            'page': rank,
+            'true_power': calculate_effective_power(char['favourites'], rarity, rank)
         }
+
+    async def fetch_characters_batch(self, plans):
         """
-        try:
-            async with session.post(self.anilist_url, json={'query': query, 'variables': {'id': anilist_id}}) as resp:
-                if resp.status != 200: return None
-                data = await resp.json()
-                if not data.get('data') or not data['data'].get('Character'): return None
+        Fetches every plan in ONE AniList request using aliased fields.
+        Rank plans become `pN: Page(page: N, perPage: 1)`, ID plans become `cN: Character(id: N)`.
+        Returns a list of Character objects (or None) aligned with `plans`.
+        """
+        var_defs, fields, variables = [], [], {}
+        aliases = {}  # (kind, value) -> alias, so duplicate rolls share one field
+        for kind, value, _ in plans:
+            key = (kind, value)
+            if key in aliases: continue
+            alias = f"{'p' if kind == 'rank' else 'c'}{value}"
+            aliases[key] = alias
+            var_defs.append(f"${alias}: Int")
+            variables[alias] = value
+            if kind == "rank":
+                fields.append(f"{alias}: Page(page: ${alias}, perPage: 1) {{ characters(sort: FAVOURITES_DESC) {{ ...card }} }}")
+            else:
+                fields.append(f"{alias}: Character(id: ${alias}) {{ ...card }}")
 
-                char_data = data['data']['Character']
-                
-                if forced_rarity:
-                    rarity = forced_rarity
-                    rank = 1 if rarity == "SSR" else 500
-                else:
-                    rank = self.get_cached_rank(anilist_id)
-                    rarity = self.determine_rarity(rank)
-                
-                pool = await get_db_pool()
-                override = await pool.fetchrow("SELECT rarity, true_power, is_overridden FROM characters_cache WHERE anilist_id = $1", char_data['id'])
-                
-                if override and override['is_overridden']:
-                    rarity = override['rarity']
-                    true_p = override['true_power']
-                else:
-                    true_p = calculate_effective_power(char_data['favourites'], rarity, rank)
-                
-                return {
-                    'id': char_data['id'],
-                    'name': char_data['name']['full'],
-                    'image_url': char_data['image']['large'],
-                    'favs': char_data['favourites'],
-                    'rarity': rarity,
-                    'page': rank,
-                    'true_power': true_p
-                }
-        except Exception as e:
-            print(f"❌ Error fetching ID {anilist_id}: {e}")
-            return None
+        query = f"""
+        query ({', '.join(var_defs)}) {{
+            {' '.join(fields)}
+        }}
+        fragment card on Character {{
+            id
+            name {{ full }}
+            image {{ large }}
+            favourites
+        }}
+        """
+        # Partial failures (e.g. one unknown ID) still come back as 200 with that alias null
+        body = await self.anilist.query(query, variables)
+        if not body: return [None] * len(plans)
+        data = body.get('data') or {}
 
-    async def fetch_character_by_rank(self, session, rarity, page):
-        """Fetches a character from AniList by rank/page."""
-        query = """
-        query ($page: Int) {
-            Page(page: $page, perPage: 1) {
-                characters(sort: FAVOURITES_DESC) {
-                    id
-                    name { full }
-                    image { large }
-                    favourites
-                }
-            }
-        }
+        results = []
+        for kind, value, _ in plans:
+            node = data.get(aliases[(kind, value)])
+            if kind == "rank":
+                chars = (node or {}).get('characters') or []
+                node = chars[0] if chars else None
+            results.append(node)
+        return results
+
+    async def resolve_pulls(self, plans):
         """
+        Turns pull plans into character records.
+        Plans are ("rank", rank, rarity), ("id", anilist_id, forced_rarity) or ("tier", None, rarity).
+        Tier plans take a pre-resolved record from the prefetch buffer, or roll a rank if it is empty.
+        Catalog hits resolve in-process; everything else shares a single batched AniList request.
+        Returns a list aligned with `plans` (None where a character could not be resolved).
+        """
+        plans = list(plans)
+        records = [None] * len(plans)
+        missing, fresh = [], []
+        for i, plan in enumerate(plans):
+            if plan[0] == "tier":
+                if self.prefetched[plan[2]]:
+                    records[i] = self.prefetched[plan[2]].popleft()
+                    continue
+                plan = plans[i] = ("rank", self.roll_rank(plan[2]), plan[2])
+
+            fresh.append(i)
+            rarity, rank = self.plan_placement(plan)
+            entry = self.catalog.by_rank(plan[1]) if plan[0] == "rank" else self.catalog.by_id(plan[1])
+            if entry:
+                records[i] = self.record_from_catalog(entry, rarity, rank)
+            else:
+                missing.append(i)
+
+        if missing:
+            fetched = await self.fetch_characters_batch([plans[i] for i in missing])
+            for i, char in zip(missing, fetched):
+                if char:
+                    records[i] = self.record_from_api(char, *self.plan_placement(plans[i]))
+
+        # Prefetched records were override-checked when they were buffered
+        await self.apply_overrides([records[i] for i in fresh])
+        return records
+
+    async def fetch_character_by_id(self, anilist_id: int, forced_rarity=None):
+        """Fetches character data by ID (local catalog first, then AniList)."""
+        return (await self.resolve_pulls([("id", anilist_id, forced_rarity)]))[0]
+
+    async def fetch_character_by_rank(self, rarity, page):
+        """Fetches a character by rank/page (local catalog first, then AniList)."""
+        return (await self.resolve_pulls([("rank", page, rarity)]))[0]
+
+    @tasks.loop(seconds=5)
+    async def prefetch_loop(self):
+        """
+        Tops up the per-tier buffers so pulls don't wait on resolution.
+        Ranks are rolled uniformly within the tier, so the odds are unchanged.
+        At most PREFETCH_BATCH records per tick keeps AniList traffic to a steady trickle.
+        """
+        plans = []
+        for tier, target in PREFETCH_TARGETS.items():
+            deficit = min(target - len(self.prefetched[tier]), PREFETCH_BATCH - len(plans))
+            plans.extend(("rank", self.roll_rank(tier), tier) for _ in range(max(0, deficit)))
+        if not plans: return
+
+        generation = self.prefetch_generation
         try:
-            async with session.post(self.anilist_url, json={'query': query, 'variables': {'page': page}}) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    chars = data.get('data', {}).get('Page', {}).get('characters', [])
-                    if chars:
-                        char = chars[0]
-                        pool = await get_db_pool()
-                        override = await pool.fetchrow("SELECT rarity, true_power, is_overridden FROM characters_cache WHERE anilist_id = $1", char['id'])
-                        
-                        if override and override['is_overridden']:
-                            rarity = override['rarity']
-                            true_p = override['true_power']
-                        else:
-                            true_p = calculate_effective_power(char['favourites'], rarity, page)
-                        
-                        return {
-                            'id': char['id'],
-                            'name': char['name']['full'],
-                            'image_url': char['image']['large'],
-                            'favs': char['favourites'],
-                            'rarity': rarity,
-                            'page': page,
-                            'true_power': true_p
-                        }
-        except: pass
-        return None
+            records = await self.resolve_pulls(plans)
+        except Exception as e:
+            print(f"⚠️ [Gacha] Prefetch failed: {e}")
+            return
+        # Overrides or ranks changed mid-refill: these records were resolved under the old ones
+        if generation != self.prefetch_generation: return
+        for (_, _, tier), record in zip(plans, records):
+            if record: self.prefetched[tier].append(record)
+
+    @prefetch_loop.before_loop
+    async def before_prefetch(self):
+        await self.bot.wait_until_ready()
 
     @commands.command(name="banner")
     async def current_banner(self, ctx):
@@ -199,9 +306,8 @@ class Gacha(commands.Cog):
 
         loading = await ctx.reply("🔍 *Retrieving banner details...*")
         try:
-            async with aiohttp.ClientSession() as session:
-                tasks = [self.fetch_character_by_id(session, cid) for cid in banner['rate_up_ids']]
-                character_list = [c for c in await asyncio.gather(*tasks) if c]
+            plans = [("id", cid, None) for cid in banner['rate_up_ids']]
+            character_list = [c for c in await self.resolve_pulls(plans) if c]
 
             if not character_list:
                 return await loading.edit(content="❌ Could not fetch character data from the API.")
@@ -219,68 +325,57 @@ class Gacha(commands.Cog):
         """Pulls 1 or 10 characters from the gacha."""
         if amount not in [1, 10]: return await ctx.reply("❌ Only 1 or 10 pulls allowed.")
         
-        # 1. Calculate Cost
+        # 1. Calculate Cost (cheap pre-check so broke users don't drain the prefetch buffers or
+        #    AniList; commit_pull's locked check stays the authority)
         cost = amount * GEMS_PER_PULL
-        
-        # 2. ATOMIC DEDUCTION (Solves Negative Balance / Spam)
-        pool = await get_db_pool()
-        async with pool.acquire() as conn:
-            # This query will return None if they don't have enough gems, effectively blocking the pull
-            deduction = await conn.fetchrow("""
-                UPDATE users 
-                SET gacha_gems = gacha_gems - $1 
-                WHERE user_id = $2 AND gacha_gems >= $1 
-                RETURNING gacha_gems
-            """, cost, str(ctx.author.id))
-
-        if not deduction:
-            # Fetch actual balance only to display the error message
-            user_data = await get_user(ctx.author.id) 
-            return await ctx.reply(f"❌ Need **{cost:,} {Emotes.GEMS}**. Balance: **{user_data['gacha_gems']:,}**")
-
+        user_data = await get_user(ctx.author.id)
+        balance = user_data['gacha_gems'] or 0
+        if balance < cost:
+            return await ctx.reply(f"❌ Need **{cost:,} {Emotes.GEMS}**. Balance: **{balance:,}**")
         loading = await ctx.reply(f"🎰 *Pulling {amount}x...*")
-        
-        # 3. SAFETY BLOCK (Solves API Errors & Refunds)
+
+        # 2. ROLL AND RESOLVE FIRST (nothing is charged if this fails)
         try:
             banner = await self.get_active_banner()
-            
-            # --- PROCESS SPARK ---
-            spark_points_now = 0
-            spark_status = ""
+            plans = []
+            rate_up_pools = await self.get_rate_up_pools(banner) if banner else None
+            for _ in range(amount):
+                if banner: 
+                    plans.append(self.plan_banner_pull(banner, rate_up_pools))
+                else:
+                    plans.append(("tier", None, self.roll_rarity()))
 
-            if banner:
-                spark_points_now = await self.process_spark_points(ctx.author.id, banner['id'], amount)
-                spark_status = f"{Emotes.SPARK} **Spark:** {spark_points_now}/300"
-            else:
-                spark_status = "⚠️ Standard Pool (No Spark)"
-
-            # --- API FETCHING (Parallelized for Speed) ---
-            async with aiohttp.ClientSession() as session:
-                tasks = []
-                for _ in range(amount):
-                    if banner: 
-                        tasks.append(self.fetch_banner_pull(session, banner))
-                    else:
-                        r, p = self.get_rarity_and_page()
-                        tasks.append(self.fetch_character_by_rank(session, r, p))
-                
-                # Run all fetches at once
-                pulled_chars = [c for c in await asyncio.gather(*tasks) if c]
+            pulled_chars = [c for c in await self.resolve_pulls(plans) if c]
 
             # If the list is empty, the API likely failed completely
             if not pulled_chars: 
                 raise Exception("API returned no characters (Rate Limit or Downtime).")
+        except Exception as e:
+            try: await loading.delete()
+            except: pass
+            return await ctx.reply(f"⚠️ **Error:** `{e}`\n💎 **No gems were spent.**")
 
-            # Save to database
-            await batch_cache_characters(pulled_chars)
-            scrapped_gems, scrapped_coins = await batch_add_to_inventory(ctx.author.id, pulled_chars)
-            await Tracker.increment_pulls(ctx.author.id, amount)
-            
+        # 3. ATOMIC COMMIT (gems, spark, cache, inventory, scrap, pull count in one transaction)
+        try:
+            result = await commit_pull(ctx.author.id, cost, banner['id'] if banner else None, pulled_chars)
+        except Exception as e:
+            try: await loading.delete()
+            except: pass
+            return await ctx.reply(f"⚠️ **Error:** `{e}`\n💎 **No gems were spent.**")
+        if not result['ok']:
+            try: await loading.delete()
+            except: pass
+            return await ctx.reply(f"❌ Need **{cost:,} {Emotes.GEMS}**. Balance: **{result['gems_left']:,}**")
+        AchievementEngine.mark(ctx.author.id, Event.PULL)
+
+        spark_status = f"{Emotes.SPARK} **Spark:** {result['spark_points']}/300" if banner else "⚠️ Standard Pool (No Spark)"
+        scrapped_gems, scrapped_coins = result['scrapped_gems'], result['scrapped_coins']
+
+        try:
             # --- SINGLE PULL RESPONSE ---
             if amount == 1:
                 c = pulled_chars[0]
-                row = await pool.fetchrow("SELECT dupe_level FROM inventory WHERE user_id = $1 AND anilist_id = $2", str(ctx.author.id), c['id'])
-                dupe_lv = row['dupe_level'] if row else 0
+                dupe_lv = result['dupe_levels'][0]
                 boosted_power = int(c['true_power'] * (1 + (dupe_lv * 0.05)))
                 
                 desc = f"**{c['rarity']}** | Power: **{boosted_power:,}** (Lv.{dupe_lv})"
@@ -319,15 +414,11 @@ class Gacha(commands.Cog):
                 await ctx.reply(file=file, embed=embed)
 
         except Exception as e:
-            # 4. AUTO-REFUND ON FAILURE
-            # If anything in the 'try' block fails, we give the money back.
-            await pool.execute("UPDATE users SET gacha_gems = gacha_gems + $1 WHERE user_id = $2", cost, str(ctx.author.id))
-            print(f"⚠️ Refunded {cost} gems to {ctx.author.id} due to error: {e}")
-            
+            # The pull is already committed; only the display failed
             try: await loading.delete()
             except: pass
-            
-            await ctx.reply(f"⚠️ **Error:** `{e}`\n💎 **Your gems have been automatically refunded.**")
+            names = ", ".join(c['name'] for c in pulled_chars)
+            await ctx.reply(f"⚠️ **Display error:** `{e}`\n✅ Your pull went through: {names}")
 
     @commands.command(name="starter")
     async def starter_pull(self, ctx):
@@ -337,22 +428,19 @@ class Gacha(commands.Cog):
 
         loading = await ctx.reply("🎁 *Opening Starter Pack...*")
         try:
-            async with aiohttp.ClientSession() as session:
-                tasks = [self.fetch_character_by_rank(session, *self.get_rarity_and_page(guaranteed_ssr=True))]
-                for _ in range(9):
-                    tasks.append(self.fetch_character_by_rank(session, *self.get_rarity_and_page()))
-                
-                chars = [c for c in await asyncio.gather(*tasks) if c]
+            rarities = [self.roll_rarity(guaranteed_ssr=True)] + [self.roll_rarity() for _ in range(9)]
+            plans = [("tier", None, rarity) for rarity in rarities]
+
+            chars = [c for c in await self.resolve_pulls(plans) if c]
 
             if len(chars) < 10: return await loading.edit(content="❌ Sync Error. Please try again.")
 
-            await batch_cache_characters(chars)
-            await batch_add_to_inventory(ctx.author.id, chars)
-            await Tracker.increment_pulls(ctx.author.id, 10)
-            
-            
-            pool = await get_db_pool()
-            await pool.execute("UPDATE users SET has_claimed_starter = TRUE WHERE user_id = $1", str(ctx.author.id))
+            # The claim and the pull share one transaction: two concurrent !starter calls can't both
+            # succeed, and a failed commit leaves the starter unclaimed
+            result = await commit_pull(ctx.author.id, 0, None, chars, claim_starter=True)
+            if result.get('already_claimed'): return await loading.edit(content="❌ Already claimed!")
+            if not result['ok']: return await loading.edit(content="❌ Sync Error. Please try again.")
+            AchievementEngine.mark(ctx.author.id, Event.PULL)
             
             img = await generate_10_pull_image(chars)
             await loading.delete()
@@ -6,6 +6,7 @@ import math
 import json
 from core.database import get_db_pool, get_user, mass_scrap_r_rarity, mass_scrap_sr_rarity
 from core.emotes import Emotes
+from core.achievements import AchievementEngine, Event
 
 class ConfirmSRScrap(View):
     def __init__(self, author):
@@ -54,15 +55,11 @@ class InventoryView(discord.ui.View):
                 i.is_locked, 
                 i.dupe_level,
                 i.bond_level,
-                FLOOR(
-                    c.true_power 
-                    * (1 + (i.dupe_level * 0.05))
-                    * (1 + (i.bond_level * 0.005))
-                ) as true_power
+                i.effective_power as true_power
             FROM inventory i
             JOIN characters_cache c ON i.anilist_id = c.anilist_id
             WHERE i.user_id = $1
-            ORDER BY true_power DESC, i.obtained_at DESC
+            ORDER BY i.effective_power DESC, i.obtained_at DESC
             LIMIT $2 OFFSET $3
         """, user_id_str, self.per_page, offset)
 
@@ -208,7 +205,7 @@ class Inventory(commands.Cog):
                 i.dupe_level,
                 i.bond_level,
                 i.bond_exp,
-                FLOOR(c.true_power * (1 + (i.dupe_level * 0.05)) * (1 + (i.bond_level * 0.005))) as true_power
+                i.effective_power as true_power
             FROM inventory i
             JOIN characters_cache c ON i.anilist_id = c.anilist_id
             WHERE i.id = $1 AND i.user_id = $2
@@ -239,6 +236,7 @@ class Inventory(commands.Cog):
     async def lock_character(self, ctx, inventory_id: int):
         pool = await get_db_pool()
         await pool.execute("UPDATE inventory SET is_locked = TRUE WHERE id = $1 AND user_id = $2", inventory_id, str(ctx.author.id))
+        AchievementEngine.mark(ctx.author.id, Event.LOCK)
         await ctx.reply(f"🔒 Character `#{inventory_id}` locked.")
 
     @commands.command(name="unlock")
@@ -251,6 +249,7 @@ class Inventory(commands.Cog):
     async def scrap_all(self, ctx):
         count, gems, coins = await mass_scrap_r_rarity(ctx.author.id)
         if count > 0:
+            AchievementEngine.mark(ctx.author.id, Event.SCRAP)
             await ctx.reply(f"♻️ Scrapped **{count}** R units for **{gems:,}** {Emotes.GEMS} and **{coins:,}** {Emotes.COINS}!")
         else:
             await ctx.reply("❌ No unlocked R units found.")
@@ -267,6 +266,7 @@ class Inventory(commands.Cog):
         if view.value:
             count, gems, coins = await mass_scrap_sr_rarity(ctx.author.id)
             if count > 0:
+                AchievementEngine.mark(ctx.author.id, Event.SCRAP)
                 await msg.edit(content=f"♻️ Scrapped **{count}** SR units for **{gems:,}** {Emotes.GEMS} and **{coins:,}** {Emotes.COINS}!", view=None)
             else:
                 await msg.edit(content="❌ No unlocked SR units found.", view=None)
@@ -329,6 +329,7 @@ class Inventory(commands.Cog):
             async with conn.transaction():
                 await conn.execute("UPDATE user_items SET quantity = quantity - 1 WHERE user_id = $1 AND item_id = 'SSR Token'", str(ctx.author.id))
                 await conn.execute("UPDATE inventory SET dupe_level = dupe_level + 1 WHERE id = $1", char_id)
+        AchievementEngine.mark(ctx.author.id, Event.UPGRADE)
 
         await ctx.reply(f"**Success!** Upgraded **{char_row['name']}** to **Dupe Lv. {char_row['dupe_level'] + 1}**!")
 
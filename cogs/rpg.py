@@ -7,6 +7,7 @@ from core.economy import get_item_display_name
 from core.database import get_db_pool
 from core.game_math import calculate_effective_power
 from core.image_gen import generate_team_image
+from core.achievements import AchievementEngine, Event
 
 
 class RPG(commands.Cog):
@@ -24,40 +25,31 @@ class RPG(commands.Cog):
             team_list = []
             total_power = 0
             slot_ids = [row['slot_1'], row['slot_2'], row['slot_3'], row['slot_4'], row['slot_5']]
-            
+
+            # One query for the whole team; effective_power already includes dupe, team level and bond bonuses
+            chars = await conn.fetch("""
+                SELECT 
+                    i.id,
+                    c.name, 
+                    c.image_url, 
+                    i.effective_power, 
+                    c.rarity, 
+                    c.ability_tags 
+                FROM inventory i
+                JOIN characters_cache c ON i.anilist_id = c.anilist_id
+                WHERE i.id = ANY($1)
+            """, [cid for cid in slot_ids if cid is not None])
+            char_map = {c['id']: c for c in chars}
+
             for char_id in slot_ids:
-                if char_id is None:
-                    team_list.append(None)
-                    continue
-                
-                # UPDATED: This query now pulls dupe_level from inventory to calculate boosted power
-                #
-                # UPDATED SQL
-                char_data = await conn.fetchrow("""
-                    SELECT 
-                        c.name, 
-                        c.image_url, 
-                        FLOOR(
-                            c.true_power 
-                            * (1 + (i.dupe_level * 0.05)) 
-                            * (1 + (u.team_level * 0.01)) -- Team Level Bonus
-                        )::int as true_power, 
-                        c.rarity, 
-                        c.rarity_override, 
-                        c.ability_tags 
-                    FROM inventory i
-                    JOIN characters_cache c ON i.anilist_id = c.anilist_id
-                    JOIN users u ON i.user_id = u.user_id
-                    WHERE i.id = $1
-                """, char_id)
-                
+                char_data = char_map.get(char_id)
                 if char_data:
-                    power = int(char_data['true_power'])
+                    power = int(char_data['effective_power'])
                     total_power += power
                     team_list.append({
                         'name': char_data['name'], 
                         'image_url': char_data['image_url'], 
-                        'rarity': char_data['rarity_override'] or char_data['rarity'], 
+                        'rarity': char_data['rarity'], 
                         'power': power,
                         'ability_tags': char_data['ability_tags']
                     })
@@ -93,6 +85,7 @@ class RPG(commands.Cog):
                     slot_3=EXCLUDED.slot_3, slot_4=EXCLUDED.slot_4,
                     slot_5=EXCLUDED.slot_5
             """, str(ctx.author.id), *final_slots)
+            AchievementEngine.mark(ctx.author.id, Event.TEAM)
             
             await ctx.reply(f"✅ Squad composition updated.")
 
@@ -160,6 +153,7 @@ class RPG(commands.Cog):
                     slot_3=EXCLUDED.slot_3, slot_4=EXCLUDED.slot_4,
                     slot_5=EXCLUDED.slot_5
             """, str(ctx.author.id), preset['slot_1'], preset['slot_2'], preset['slot_3'], preset['slot_4'], preset['slot_5'])
+            AchievementEngine.mark(ctx.author.id, Event.TEAM)
             
             await ctx.reply(f"✅ Equipped preset **{name}**!")
 
@@ -5,6 +5,7 @@ import json
 import random
 from core.database import get_db_pool, get_user
 from core.emotes import Emotes
+from core.achievements import AchievementEngine, Event
 
 # --- CONFIGURATION ---
 STANDARD_ITEMS = [
@@ -84,6 +85,7 @@ class ShopDropdown(discord.ui.Select):
                     user_id, target_item['anilist_id']
                 )
                 msg = f"✅ **Purchased!**\n**{target_item['name']}** added to your inventory!"
+            AchievementEngine.mark(user_id, Event.PULL)
 
             if discount_active:
                 msg += f"\n📉 **Level 30 Discount Applied:** Saved {target_item['base_price'] - final_price:,} {Emotes.GEMS}!"
@@ -371,6 +373,7 @@ class Shop(commands.Cog):
                     ON CONFLICT (user_id, anilist_id) 
                     DO UPDATE SET dupe_level = inventory.dupe_level + 1
                 """, str(ctx.author.id), char_id)
+        AchievementEngine.mark(ctx.author.id, Event.PULL)
         
         spark_emote = getattr(Emotes, "SPARK", "✨") 
         await ctx.reply(f"{spark_emote} **SPARK SUCCESSFUL!**\nYou exchanged {cost} points for character ID `{char_id}`!")
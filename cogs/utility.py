@@ -1,10 +1,12 @@
 import discord
 from discord.ext import commands
-import aiohttp
 import json
 import os
 from core.database import get_db_pool
+from core.anilist import get_anilist
 from core.game_math import calculate_effective_power
+from core.catalog import determine_rarity
+from core.rank_index import get_rank_index
 # Updated import to include get_skill_info
 from core.skills import SKILL_DATA, get_skill_info
 from core.emotes import Emotes
@@ -83,7 +85,7 @@ class SkillDropdownView(discord.ui.View):
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.anilist_url = os.getenv("ANILIST_URL", "https://graphql.anilist.co")
+        self.anilist = get_anilist()
         
     @commands.command(name="whohas", aliases=["usersof", "skillsearch"])
     async def who_has_skill(self, ctx, *, skill_name: str):
@@ -92,18 +94,16 @@ class Utility(commands.Cog):
         Usage: !whohas Lucky 7
         """
         target_skill = skill_name.strip()
+        # Tags are stored under the canonical skill name, so resolve the casing here
+        # and let the GIN index answer a containment query instead of unpacking every row
+        target_skill = next((s for s in SKILL_DATA if s.lower() == target_skill.lower()), target_skill)
         pool = await get_db_pool()
         
         async with pool.acquire() as conn:
-            # We cast to ::jsonb to ensure compatibility, then expand elements and check lowercase
             rows = await conn.fetch("""
                 SELECT name, rarity, ability_tags 
                 FROM characters_cache 
-                WHERE EXISTS (
-                    SELECT 1 
-                    FROM jsonb_array_elements_text(ability_tags::jsonb) as tag 
-                    WHERE LOWER(tag) = LOWER($1)
-                )
+                WHERE ability_tags @> jsonb_build_array($1::text)
             """, target_skill)
 
         if not rows:
@@ -212,7 +212,7 @@ class Utility(commands.Cog):
         """
         Searches for a character.
         - Checks DB Cache first.
-        - Fallback: Uses Gacha Cog's JSON Map (100% Accurate).
+        - Fallback: Uses the compiled rank index (100% Accurate).
         """
         loading = await ctx.reply(f"🔍 Searching for **{name}**...")
 
@@ -223,61 +223,54 @@ class Utility(commands.Cog):
             }
         }
         """
-        async with aiohttp.ClientSession() as session:
-            try:
-                # 1. AniList Basic Data
-                async with session.post(self.anilist_url, json={'query': query, 'variables': {'search': name}}) as resp:
-                    if resp.status != 200: return await loading.edit(content="❌ API Error.")
-                    data = await resp.json()
-                    if 'errors' in data: return await loading.edit(content="❌ Not found.")
-                    
-                    char_data = data['data']['Character']
-                    anilist_id = char_data['id']
-                    favs = char_data['favourites']
-
-                # 2. Check Database Cache
-                pool = await get_db_pool()
-                db_char = await pool.fetchrow("SELECT rarity, true_power, ability_tags FROM characters_cache WHERE anilist_id = $1", anilist_id)
-
-                if db_char:
-                    rarity = db_char['rarity']
-                    power = db_char['true_power']
-                    skills = json.loads(db_char['ability_tags'])
-                    source_text = "Checking Database..."
-                else:
-                    # 3. USE LOCAL RANKINGS FROM GACHA COG
-                    gacha_cog = self.bot.get_cog("Gacha")
-                    if gacha_cog:
-                        # This is the "Backwards Implementation" in action:
-                        rank = gacha_cog.get_cached_rank(anilist_id)
-                        rarity = gacha_cog.determine_rarity(rank)
-                        power = calculate_effective_power(favs, rarity, rank)
-                        skills = []
-                        source_text = "Calculated via Rankings.json"
-                    else:
-                        return await loading.edit(content="❌ Gacha System Offline.")
+        try:
+            # 1. AniList Basic Data (unknown names come back as a 404, i.e. None here)
+            data = await self.anilist.query(query, {'search': name})
+            if not data or 'errors' in data or not data['data']['Character']:
+                return await loading.edit(content="❌ Not found or AniList unavailable.")
+
+            char_data = data['data']['Character']
+            anilist_id = char_data['id']
+            favs = char_data['favourites']
+
+            # 2. Check Database Cache
+            pool = await get_db_pool()
+            db_char = await pool.fetchrow("SELECT rarity, true_power, ability_tags FROM characters_cache WHERE anilist_id = $1", anilist_id)
+
+            if db_char:
+                rarity = db_char['rarity']
+                power = db_char['true_power']
+                skills = json.loads(db_char['ability_tags'])
+                source_text = "Checking Database..."
+            else:
+                # 3. USE THE SHARED RANK INDEX (same instance the Gacha cog reads)
+                rank = get_rank_index().get(anilist_id, 10001)
+                rarity = determine_rarity(rank)
+                power = calculate_effective_power(favs, rarity, rank)
+                skills = []
+                source_text = "Calculated via Rank Index"
                     
-                emoji = getattr(Emotes, rarity, rarity)
-                # 4. Embed Result
-                embed = discord.Embed(title=char_data['name']['full'], url=char_data['siteUrl'], color=0x00BFFF)
-                embed.set_thumbnail(url=char_data['image']['large'])
+            emoji = getattr(Emotes, rarity, rarity)
+            # 4. Embed Result
+            embed = discord.Embed(title=char_data['name']['full'], url=char_data['siteUrl'], color=0x00BFFF)
+            embed.set_thumbnail(url=char_data['image']['large'])
                 
-                embed.add_field(name="🆔", value=str(anilist_id), inline=True)
-                embed.add_field(name="Rarity", value=f"{emoji}", inline=True)
-                embed.add_field(name=f"Battle Power", value=f"**{power:,}**", inline=True)
+            embed.add_field(name="🆔", value=str(anilist_id), inline=True)
+            embed.add_field(name="Rarity", value=f"{emoji}", inline=True)
+            embed.add_field(name=f"Battle Power", value=f"**{power:,}**", inline=True)
                 
-                if skills:
-                    embed.add_field(name="✨ Skills", value="\n".join([f"• {s}" for s in skills]), inline=False)
-                else:
-                    embed.add_field(name="✨ Skills", value="*None*", inline=False)
+            if skills:
+                embed.add_field(name="✨ Skills", value="\n".join([f"• {s}" for s in skills]), inline=False)
+            else:
+                embed.add_field(name="✨ Skills", value="*None*", inline=False)
                 
-                embed.set_footer(text=f"{source_text} | Rank #{rank if 'rank' in locals() else '???'}")
+            embed.set_footer(text=f"{source_text} | Rank #{rank if 'rank' in locals() else '???'}")
                 
-                await loading.delete()
-                await ctx.reply(embed=embed)
+            await loading.delete()
+            await ctx.reply(embed=embed)
 
-            except Exception as e:
-                await loading.edit(content=f"⚠️ Error: `{e}`")
+        except Exception as e:
+            await loading.edit(content=f"⚠️ Error: `{e}`")
 
 async def setup(bot):
     await bot.add_cog(Utility(bot))
\ No newline at end of file
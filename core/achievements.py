@@ -1,9 +1,23 @@
 # core/achievements.py
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
 from core.database import get_db_pool
+from core.tracker import Tracker
 from core.emotes import Emotes
 
+class Event:
+    """Domain events that can move an achievement's condition. Cogs report them with AchievementEngine.mark()."""
+    PULL = "pull"              # gained units (pulls, starter, shop, event rewards)
+    UPGRADE = "upgrade"        # dupe level raised without a pull (SSR Token)
+    SCRAP = "scrap"
+    BOUNTY = "bounty"          # bounty win (boss kills, wins counter, coin loot)
+    BOND = "bond"              # bond level-up
+    EXPEDITION = "expedition"  # expedition claim (gems total, team level)
+    CHECKIN = "checkin"
+    TEAM = "team"              # active team changed
+    LOCK = "lock"
+    BOSS = "boss"              # world boss battle win
+
 @dataclass
 class Achievement:
     id: str
@@ -12,8 +26,14 @@ class Achievement:
     badge_emote: str  # The badge displayed in the profile row
     gem_reward: int = 0
     coin_reward: int = 0
-    # SQL logic to check if requirement is met
-    check_sql: str = "" 
+    # Events after which the requirement can newly be met
+    events: Set[str] = field(default_factory=set)
+    # Met when the stats snapshot's metric reaches threshold (see STATS_SQL)
+    metric: str = ""
+    threshold: int = 1
+
+    def progress(self, stats) -> int:
+        return min(stats.get(self.metric) or 0, self.threshold)
 
 # --- REGISTRY ---
 ACHIEVEMENTS: Dict[str, Achievement] = {
@@ -24,11 +44,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.UPSTART,
         gem_reward=1000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT COUNT(*) FROM inventory i
-            JOIN characters_cache c ON i.anilist_id = c.anilist_id
-            WHERE i.user_id = $1 AND c.rarity = 'SSR') >= 5
-        """
+        events={Event.PULL},
+        metric="ssr_count",
+        threshold=5
     ),
 
     "THE_ELITE": Achievement(
@@ -38,11 +56,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.ELITE,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT COUNT(*) FROM inventory i
-            JOIN characters_cache c ON i.anilist_id = c.anilist_id
-            WHERE i.user_id = $1 AND c.rarity = 'SSR') >= 10
-        """
+        events={Event.PULL},
+        metric="ssr_count",
+        threshold=10
     ),
 
     "SUPERNOVAE": Achievement(
@@ -52,11 +68,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.SUPERNOVAE,
         gem_reward=20000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT COUNT(*) FROM inventory i
-            JOIN characters_cache c ON i.anilist_id = c.anilist_id
-            WHERE i.user_id = $1 AND c.rarity = 'SSR') >= 50
-        """
+        events={Event.PULL},
+        metric="ssr_count",
+        threshold=50
     ),
 
     "ARMY_OF_MANY": Achievement(
@@ -66,10 +80,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.ARMY,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT COALESCE(SUM(dupe_level + 1), 0)
-            FROM inventory WHERE user_id = $1) >= 500
-        """
+        events={Event.PULL, Event.UPGRADE},
+        metric="total_copies",
+        threshold=500
     ),
 
     "PERFECT_COPY": Achievement(
@@ -79,9 +92,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.PERFECT_COPY,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT EXISTS(SELECT 1 FROM inventory WHERE user_id = $1 AND dupe_level >= 10)
-        """
+        events={Event.PULL, Event.UPGRADE},
+        metric="max_dupe",
+        threshold=10
     ),
     
     "PRISMATIC_TRANSCENDENCE": Achievement(
@@ -91,16 +104,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.PRISMATIC,
         gem_reward=50000,
         coin_reward=1000,
-        check_sql="""
-            SELECT EXISTS (
-            SELECT 1
-            FROM inventory i
-            JOIN characters_cache c ON i.anilist_id = c.anilist_id
-            WHERE i.user_id = $1
-            AND i.dupe_level >= 10
-            AND c.rarity = 'SSR'
-        );
-        """
+        events={Event.PULL, Event.UPGRADE},
+        metric="max_ssr_dupe",
+        threshold=10
     ),
 
     "DEEP_POCKETS": Achievement(
@@ -110,9 +116,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.DEEP_POCKETS,
         gem_reward=10000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT banner_points FROM users WHERE user_id = $1) >= 300
-        """
+        events={Event.PULL},
+        metric="banner_points",
+        threshold=300
     ),
 
     "NOVICE_GAMBLER": Achievement(
@@ -122,9 +128,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.NOVICE_GAMBER,
         gem_reward=1000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT total_pulls FROM users WHERE user_id = $1) >= 100
-        """
+        events={Event.PULL},
+        metric="total_pulls",
+        threshold=100
     ),
 
     "BIG_PLAYER": Achievement(
@@ -134,9 +140,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.BIG_PLAYER,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT total_pulls FROM users WHERE user_id = $1) >= 500
-        """
+        events={Event.PULL},
+        metric="total_pulls",
+        threshold=500
     ),
 
     "THOUSAND_PULL_CLUB": Achievement(
@@ -146,9 +152,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.ATHOUSANDCLUB,
         gem_reward=10000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT total_pulls FROM users WHERE user_id = $1) >= 1000
-        """
+        events={Event.PULL},
+        metric="total_pulls",
+        threshold=1000
     ),
 
     # --- Section 2: Bounties & Bosses ---
@@ -159,9 +165,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.R_TAKEDOWN,
         gem_reward=500,
         coin_reward=0,
-        check_sql="""
-            SELECT EXISTS(SELECT 1 FROM boss_kills WHERE user_id = $1 AND boss_id = 'BOUNTY_R')
-        """
+        events={Event.BOUNTY},
+        metric="r_bounty_kills",
+        threshold=1
     ),
 
     "SR_TAKEDOWN": Achievement(
@@ -171,9 +177,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.SR_TAKEDOWN,
         gem_reward=2000,
         coin_reward=0,
-        check_sql="""
-            SELECT EXISTS(SELECT 1 FROM boss_kills WHERE user_id = $1 AND boss_id = 'BOUNTY_SR')
-        """
+        events={Event.BOUNTY},
+        metric="sr_bounty_kills",
+        threshold=1
     ),
 
     "SSR_TAKEDOWN": Achievement(
@@ -183,9 +189,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.SSR_TAKEDOWN,
         gem_reward=10000,
         coin_reward=0,
-        check_sql="""
-            SELECT EXISTS(SELECT 1 FROM boss_kills WHERE user_id = $1 AND boss_id = 'BOUNTY_SSR')
-        """
+        events={Event.BOUNTY},
+        metric="ssr_bounty_kills",
+        threshold=1
     ),
 
     "UR_TAKEDOWN": Achievement(
@@ -195,9 +201,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.UR_TAKEDOWN,
         gem_reward=25000,
         coin_reward=0,
-        check_sql="""
-            SELECT EXISTS(SELECT 1 FROM boss_kills WHERE user_id = $1 AND boss_id = 'BOUNTY_UR')
-        """
+        events={Event.BOUNTY},
+        metric="ur_bounty_kills",
+        threshold=1
     ),
 
     "VETERAN_HUNTER": Achievement(
@@ -207,9 +213,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.VETERAN_HUNTER,
         gem_reward=10000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT total_bounties FROM users WHERE user_id = $1) >= 100
-        """
+        events={Event.BOUNTY},
+        metric="total_bounties",
+        threshold=100
     ),
 
     # --- Section 3: Power & Team Progression ---
@@ -220,13 +226,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.FORMIDABLE_TEAM,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT SUM(FLOOR(c.true_power * (1 + (i.dupe_level * 0.05))))
-            FROM teams t
-            JOIN inventory i ON i.id IN (t.slot_1, t.slot_2, t.slot_3, t.slot_4, t.slot_5)
-            JOIN characters_cache c ON i.anilist_id = c.anilist_id
-            WHERE t.user_id = $1) >= 50000
-        """
+        events={Event.TEAM, Event.PULL, Event.UPGRADE, Event.BOND, Event.EXPEDITION},
+        metric="team_power",
+        threshold=50000
     ),
 
     "TITAN_SQUAD": Achievement(
@@ -236,13 +238,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.TITAN_TEAM,
         gem_reward=20000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT SUM(FLOOR(c.true_power * (1 + (i.dupe_level * 0.05))))
-            FROM teams t
-            JOIN inventory i ON i.id IN (t.slot_1, t.slot_2, t.slot_3, t.slot_4, t.slot_5)
-            JOIN characters_cache c ON i.anilist_id = c.anilist_id
-            WHERE t.user_id = $1) >= 100000
-        """
+        events={Event.TEAM, Event.PULL, Event.UPGRADE, Event.BOND, Event.EXPEDITION},
+        metric="team_power",
+        threshold=100000
     ),
 
     "BOND_INITIATE": Achievement(
@@ -252,9 +250,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.BOND_INITIATE,
         gem_reward=1000,
         coin_reward=0,
-        check_sql="""
-            SELECT EXISTS(SELECT 1 FROM inventory WHERE user_id = $1 AND bond_level >= 10)
-        """
+        events={Event.BOND},
+        metric="max_bond",
+        threshold=10
     ),
 
     "SOUL_BOUND": Achievement(
@@ -264,9 +262,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.SOUL_BOUND,
         gem_reward=10000,
         coin_reward=0,
-        check_sql="""
-            SELECT EXISTS(SELECT 1 FROM inventory WHERE user_id = $1 AND bond_level >= 50)
-        """
+        events={Event.BOND},
+        metric="max_bond",
+        threshold=50
     ),
 
     "COMMANDING_OFFICER": Achievement(
@@ -276,9 +274,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.COMMAND_OFFICER,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT team_level FROM users WHERE user_id = $1) >= 10
-        """
+        events={Event.EXPEDITION},
+        metric="team_level",
+        threshold=10
     ),
 
     "SUPREME_COMMANDER": Achievement(
@@ -288,9 +286,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.SUPREME_COMMANDER,
         gem_reward=50000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT team_level FROM users WHERE user_id = $1) >= 50
-        """
+        events={Event.EXPEDITION},
+        metric="team_level",
+        threshold=50
     ),
 
     "GOLDEN_VANGUARD": Achievement(
@@ -300,12 +298,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.GOLDEN_VANGUARD,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT COUNT(*) FROM teams t
-            JOIN inventory i ON i.id IN (t.slot_1, t.slot_2, t.slot_3, t.slot_4, t.slot_5)
-            JOIN characters_cache c ON i.anilist_id = c.anilist_id
-            WHERE t.user_id = $1 AND c.rarity = 'SSR') = 5
-        """
+        events={Event.TEAM},
+        metric="team_ssr_count",
+        threshold=5
     ),
 
     # --- Section 4: Expeditions & Scrapping ---
@@ -316,9 +311,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.FIRST_VOYAGE,
         gem_reward=500,
         coin_reward=0,
-        check_sql="""
-            SELECT EXISTS(SELECT 1 FROM expeditions WHERE user_id = $1 AND last_claim IS NOT NULL)
-        """
+        events={Event.EXPEDITION},
+        metric="expeditions_claimed",
+        threshold=1
     ),
 
     "TREASURE_HUNTER": Achievement(
@@ -328,9 +323,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.TREASURE_HUNTER,
         gem_reward=15000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT expedition_gems_total FROM users WHERE user_id = $1) >= 500000
-        """
+        events={Event.EXPEDITION},
+        metric="expedition_gems_total",
+        threshold=500000
     ),
 
     "EFFICIENT_SCRAPPER": Achievement(
@@ -340,9 +335,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.EFFICIENT_SCRAPPER,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT total_scrapped FROM users WHERE user_id = $1) >= 100
-        """
+        events={Event.SCRAP},
+        metric="total_scrapped",
+        threshold=100
     ),
 
     "SAFE_KEEPING": Achievement(
@@ -352,9 +347,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.KEEPSAKE,
         gem_reward=1000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT COUNT(*) FROM inventory WHERE user_id = $1 AND is_locked = TRUE) >= 10
-        """
+        events={Event.LOCK},
+        metric="locked_count",
+        threshold=10
     ),
 
     # --- Section 5: Economy & Activity ---
@@ -365,9 +360,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.COIN_COLLECTOR,
         gem_reward=2000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT coins FROM users WHERE user_id = $1) >= 5000
-        """
+        events={Event.PULL, Event.SCRAP, Event.BOUNTY},
+        metric="coins",
+        threshold=5000
     ),
 
     "WEEKLY_HABIT": Achievement(
@@ -377,9 +372,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.WEEKLY_HABIT,
         gem_reward=5000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT checkin_streak FROM users WHERE user_id = $1) >= 7
-        """
+        events={Event.CHECKIN},
+        metric="checkin_streak",
+        threshold=7
     ),
 
     "MONTHLY_DEVOTION": Achievement(
@@ -389,9 +384,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.MONTHLY_DEVOTION,
         gem_reward=50000,
         coin_reward=0,
-        check_sql="""
-            SELECT (SELECT checkin_streak FROM users WHERE user_id = $1) >= 30
-        """
+        events={Event.CHECKIN},
+        metric="checkin_streak",
+        threshold=30
     ),
     
     "ULTIMATE_BATTLER": Achievement(
@@ -401,7 +396,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.ULTIMATE_BATTLER, # Replace with Emotes.GODSLAYER if defined in core/emotes.py
         gem_reward=50000,
         coin_reward=1000,
-        check_sql="SELECT EXISTS(SELECT 1 FROM boss_kills WHERE user_id = $1 AND boss_id = '1463071276036788392')"
+        events={Event.BOSS},
+        metric="boss_kills",
+        threshold=1
     ),
     "FIRST_PULL": Achievement(
         id="FIRST_PULL",
@@ -409,7 +406,9 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         description="Perform your very first gacha pull.",
         badge_emote=Emotes.FIRST_CONTRACT,
         gem_reward=500,
-        check_sql="SELECT EXISTS(SELECT 1 FROM inventory WHERE user_id = $1)"
+        events={Event.PULL},
+        metric="unit_count",
+        threshold=1
     ),
     "COLLECTOR_100": Achievement(
         id="COLLECTOR_100",
@@ -418,36 +417,161 @@ ACHIEVEMENTS: Dict[str, Achievement] = {
         badge_emote=Emotes.CENTURION,
         gem_reward=10000,
         coin_reward=100,
-        check_sql="SELECT (SELECT COUNT(*) FROM inventory WHERE user_id = $1) >= 100"
+        events={Event.PULL},
+        metric="unit_count",
+        threshold=100
     )
 }
 
+# Every metric the registry reads, one row per user selected by {where}.
+# One pass over the user's inventory, plus their users row, team, boss kills and expedition.
+STATS_SQL = """
+    SELECT u.user_id,
+           u.total_pulls, u.total_bounties, u.expedition_gems_total, u.total_scrapped,
+           u.checkin_streak, u.banner_points, u.team_level, u.coins,
+           inv.unit_count, inv.ssr_count, inv.total_copies, inv.max_dupe, inv.max_ssr_dupe, inv.max_bond, inv.locked_count,
+           team.team_power, team.team_ssr_count,
+           kills.r_bounty_kills, kills.sr_bounty_kills, kills.ssr_bounty_kills, kills.ur_bounty_kills, kills.boss_kills,
+           EXISTS(SELECT 1 FROM expeditions e WHERE e.user_id = u.user_id AND e.last_claim IS NOT NULL)::int AS expeditions_claimed,
+           ARRAY(SELECT a.achievement_id FROM achievements a WHERE a.user_id = u.user_id) AS earned
+    FROM users u
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS unit_count,
+               COUNT(*) FILTER (WHERE c.rarity = 'SSR') AS ssr_count,
+               COALESCE(SUM(i.dupe_level + 1), 0) AS total_copies,
+               COALESCE(MAX(i.dupe_level), 0) AS max_dupe,
+               COALESCE(MAX(i.dupe_level) FILTER (WHERE c.rarity = 'SSR'), 0) AS max_ssr_dupe,
+               COALESCE(MAX(i.bond_level), 0) AS max_bond,
+               COUNT(*) FILTER (WHERE i.is_locked) AS locked_count
+        FROM inventory i
+        LEFT JOIN characters_cache c ON c.anilist_id = i.anilist_id
+        WHERE i.user_id = u.user_id
+    ) inv
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(SUM(i.effective_power), 0) AS team_power,
+               COUNT(*) FILTER (WHERE c.rarity = 'SSR') AS team_ssr_count
+        FROM teams t
+        JOIN inventory i ON i.id IN (t.slot_1, t.slot_2, t.slot_3, t.slot_4, t.slot_5)
+        LEFT JOIN characters_cache c ON c.anilist_id = i.anilist_id
+        WHERE t.user_id = u.user_id
+    ) team
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) FILTER (WHERE boss_id = 'BOUNTY_R') AS r_bounty_kills,
+               COUNT(*) FILTER (WHERE boss_id = 'BOUNTY_SR') AS sr_bounty_kills,
+               COUNT(*) FILTER (WHERE boss_id = 'BOUNTY_SSR') AS ssr_bounty_kills,
+               COUNT(*) FILTER (WHERE boss_id = 'BOUNTY_UR') AS ur_bounty_kills,
+               COUNT(*) FILTER (WHERE boss_id = '1463071276036788392') AS boss_kills
+        FROM boss_kills b
+        WHERE b.user_id = u.user_id
+    ) kills
+    WHERE {where}
+"""
+USER_STATS_SQL = STATS_SQL.format(where="u.user_id = $1")
+BACKFILL_CHUNK = 5000
+
+# user_id -> events since their last evaluation
+_dirty: Dict[str, Set[str]] = {}
+
 class AchievementEngine:
     @staticmethod
-    async def process_all(user_id: str) -> List[Achievement]:
-        """Scans DB for met conditions and grants rewards/badges."""
+    def mark(user_id, *events: str):
+        """Records that something happened to a user; only achievements listening for it get re-checked."""
+        _dirty.setdefault(str(user_id), set()).update(events)
+
+    @staticmethod
+    async def get_stats(user_id, conn=None) -> dict:
+        """The user's stats snapshot (metric -> value, plus 'earned'). Empty for unknown users."""
         user_id = str(user_id)
-        pool = await get_db_pool()
-        newly_earned = []
+        # Stat achievements read the counters Tracker buffers
+        await Tracker.flush(user_id)
+        if conn is None:
+            pool = await get_db_pool()
+            row = await pool.fetchrow(USER_STATS_SQL, user_id)
+        else:
+            row = await conn.fetchrow(USER_STATS_SQL, user_id)
+        return dict(row) if row else {}
 
+    @staticmethod
+    async def process_dirty(user_id) -> List[Achievement]:
+        """Evaluates the achievements affected by the user's pending events. No events, no queries."""
+        events = _dirty.pop(str(user_id), None)
+        if not events: return []
+        try:
+            return await AchievementEngine.process_all(user_id, events)
+        except Exception:
+            AchievementEngine.mark(user_id, *events)
+            raise
+
+    @staticmethod
+    async def process_all(user_id: str, events: Optional[Iterable[str]] = None) -> List[Achievement]:
+        """Grants every met, unearned achievement from one stats snapshot. With events, only the affected ones."""
+        user_id = str(user_id)
+        candidates = ACHIEVEMENTS if events is None else {
+            aid: ach for aid, ach in ACHIEVEMENTS.items() if ach.events & set(events)
+        }
+        if not candidates: return []
+
+        pool = await get_db_pool()
         async with pool.acquire() as conn:
-            # Get already earned IDs
-            earned_rows = await conn.fetch("SELECT achievement_id FROM achievements WHERE user_id = $1", user_id)
-            earned_ids = {r['achievement_id'] for r in earned_rows}
-
-            for aid, ach in ACHIEVEMENTS.items():
-                if aid in earned_ids: continue
-
-                # Run the self-contained SQL check
-                if await conn.fetchval(ach.check_sql, user_id):
-                    async with conn.transaction():
-                        await conn.execute(
-                            "INSERT INTO achievements (user_id, achievement_id, earned_at) VALUES ($1, $2, CURRENT_TIMESTAMP)",
-                            user_id, aid
-                        )
-                        await conn.execute(
-                            "UPDATE users SET gacha_gems = gacha_gems + $1, coins = coins + $2 WHERE user_id = $3",
-                            ach.gem_reward, ach.coin_reward, user_id
-                        )
-                    newly_earned.append(ach)
-        return newly_earned
\ No newline at end of file
+            stats = await AchievementEngine.get_stats(user_id, conn)
+            if not stats: return []
+            earned_ids = set(stats['earned'])
+            met = [aid for aid, ach in candidates.items()
+                   if aid not in earned_ids and (stats.get(ach.metric) or 0) >= ach.threshold]
+            if not met: return []
+
+            async with conn.transaction():
+                # RETURNING only what this call inserted, so a concurrent check can't pay out twice
+                granted = await conn.fetch("""
+                    INSERT INTO achievements (user_id, achievement_id, earned_at)
+                    SELECT $1, aid, CURRENT_TIMESTAMP FROM unnest($2::text[]) AS aid
+                    ON CONFLICT (user_id, achievement_id) DO NOTHING
+                    RETURNING achievement_id
+                """, user_id, met)
+                newly_earned = [ACHIEVEMENTS[r['achievement_id']] for r in granted]
+                if newly_earned:
+                    await conn.execute(
+                        "UPDATE users SET gacha_gems = gacha_gems + $1, coins = coins + $2 WHERE user_id = $3",
+                        sum(a.gem_reward for a in newly_earned), sum(a.coin_reward for a in newly_earned), user_id
+                    )
+        return newly_earned
+
+    @staticmethod
+    async def backfill(achievement_id: str, chunk_size: int = BACKFILL_CHUNK):
+        """
+        Grants one achievement (and its rewards) to every user who already meets it.
+        Walks users in user_id order, one statement per chunk, so each chunk commits on its own
+        and locks are held only briefly. Returns (users_scanned, users_granted).
+        """
+        ach = ACHIEVEMENTS[achievement_id]
+        await Tracker.flush()
+        pool = await get_db_pool()
+        # ach.metric comes from the registry, never from user input
+        query = f"""
+            WITH chunk AS (
+                SELECT user_id FROM users WHERE user_id > $1 ORDER BY user_id LIMIT $2
+            ), met AS (
+                SELECT s.user_id FROM ({STATS_SQL.format(where="u.user_id IN (SELECT user_id FROM chunk)")}) s
+                WHERE s.{ach.metric} >= $3
+            ), granted AS (
+                INSERT INTO achievements (user_id, achievement_id, earned_at)
+                SELECT user_id, $4::text, CURRENT_TIMESTAMP FROM met
+                ON CONFLICT (user_id, achievement_id) DO NOTHING
+                RETURNING user_id
+            ), paid AS (
+                UPDATE users u SET gacha_gems = u.gacha_gems + $5, coins = u.coins + $6
+                FROM granted g WHERE u.user_id = g.user_id
+                RETURNING u.user_id
+            )
+            SELECT (SELECT MAX(user_id) FROM chunk) AS last_id,
+                   (SELECT COUNT(*) FROM chunk) AS scanned,
+                   (SELECT COUNT(*) FROM paid) AS granted
+        """
+        last_id, scanned, granted = "", 0, 0
+        while True:
+            row = await pool.fetchrow(query, last_id, chunk_size, ach.threshold, ach.id, ach.gem_reward, ach.coin_reward)
+            if not row['scanned']: break
+            last_id = row['last_id']
+            scanned += row['scanned']
+            granted += row['granted']
+        return scanned, granted
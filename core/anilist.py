@@ -0,0 +1,97 @@
+# core/anilist.py
+import asyncio
+import json
+import os
+import time
+from core.http import get_http_session
+
+# AniList allows 90 requests/minute per IP. Every caller (cogs and scripts) goes
+# through one client so the whole process stays under it together.
+ANILIST_URL = os.getenv("ANILIST_URL", "https://graphql.anilist.co")
+ANILIST_RATE_PER_MINUTE = int(os.getenv("ANILIST_RATE_PER_MINUTE", "90"))
+ANILIST_BURST = int(os.getenv("ANILIST_BURST", "10"))
+ANILIST_MAX_RETRIES = 3
+DEFAULT_RETRY_AFTER = 60  # seconds, used when a 429 comes back without the header
+
+_client = None
+
+class AniListClient:
+    """
+    Rate-limited AniList GraphQL client.
+    - Token bucket: ANILIST_RATE_PER_MINUTE sustained, ANILIST_BURST back-to-back.
+    - 429: honours Retry-After and pauses ALL callers, not just the one that got limited.
+    - Coalescing: identical (query, variables) already in flight share one request.
+    """
+    def __init__(self, url=ANILIST_URL, rate_per_minute=ANILIST_RATE_PER_MINUTE, burst=ANILIST_BURST):
+        self.url = url
+        self.rate = rate_per_minute / 60.0  # tokens per second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self._inflight = {}
+
+    async def _acquire(self):
+        """Waits until a token is available (and any 429 pause has passed), then takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def _pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    async def _send(self, query, variables):
+        session = await get_http_session()
+        for attempt in range(ANILIST_MAX_RETRIES + 1):
+            await self._acquire()
+            try:
+                async with session.post(self.url, json={'query': query, 'variables': variables}) as resp:
+                    if resp.status == 429:
+                        try:
+                            retry_after = int(resp.headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+                        except ValueError:
+                            retry_after = DEFAULT_RETRY_AFTER
+                        print(f"⏳ [AniList] Rate limited. Pausing all requests for {retry_after}s (attempt {attempt + 1})")
+                        self._pause(retry_after)
+                        continue
+                    if resp.status != 200:
+                        print(f"❌ [AniList] HTTP {resp.status}")
+                        return None
+                    return await resp.json()
+            except Exception as e:
+                print(f"❌ [AniList] Request failed: {e}")
+                return None
+        return None
+
+    async def query(self, query, variables=None):
+        """
+        Runs a GraphQL query. Returns the decoded JSON body, or None on failure.
+        Concurrent calls with the same query and variables await the same request.
+        """
+        variables = variables or {}
+        key = (query, json.dumps(variables, sort_keys=True))
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send(query, variables))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller being cancelled must not cancel the request for everyone else
+        return await asyncio.shield(task)
+
+def get_anilist():
+    global _client
+    if _client is None:
+        _client = AniListClient()
+    return _client
@@ -0,0 +1,93 @@
+# core/battle_records.py
+import hashlib
+import json
+import random
+import secrets
+from core.database import get_db_pool
+from core.skills import BattleEngine
+
+# A battle is fully determined by its two teams and its seed, so history only keeps those:
+# every distinct team snapshot is stored once in battle_teams (keyed by its hash) and a
+# battle_records row is just seed + two hashes + outcome/totals. !replay re-runs the engine
+# to rebuild the logs and image instead of anything rendered being stored.
+SNAPSHOT_KEYS = ("anilist_id", "name", "true_power", "ability_tags", "rarity", "image_url")
+
+def new_seed():
+    return secrets.randbits(63)  # fits a signed BIGINT
+
+def battle_rng(seed, stream="battle"):
+    """
+    A reproducible RNG stream for one battle. NPC line-ups roll on their own stream
+    ("npc") so a replay only has to rebuild the engine's.
+    """
+    return random.Random(f"{stream}:{seed}")
+
+def snapshot_team(team):
+    """The fields the engine and the battle image read, with tags decoded."""
+    snapshot = []
+    for char in team:
+        if not char:
+            snapshot.append(None)
+            continue
+        entry = {k: char.get(k) for k in SNAPSHOT_KEYS}
+        tags = entry['ability_tags'] or []
+        entry['ability_tags'] = json.loads(tags) if isinstance(tags, str) else list(tags)
+        snapshot.append(entry)
+    return snapshot
+
+def team_hash(snapshot):
+    blob = json.dumps(snapshot, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()[:32], blob
+
+async def record_battle(kind, attacker_id, defender_id, defender_name, seed, attacker_team, defender_team, result):
+    """Stores the compact record of a finished battle. Returns its id, or None if it could not be saved."""
+    att_hash, att_blob = team_hash(snapshot_team(attacker_team))
+    def_hash, def_blob = team_hash(snapshot_team(defender_team))
+    try:
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    INSERT INTO battle_teams (team_hash, team)
+                    SELECT * FROM unnest($1::text[], $2::jsonb[])
+                    ON CONFLICT (team_hash) DO NOTHING
+                """, [att_hash, def_hash], [att_blob, def_blob])
+                return await conn.fetchval("""
+                    INSERT INTO battle_records (
+                        kind, attacker_id, defender_id, defender_name, seed,
+                        attacker_hash, defender_hash, outcome, attacker_total, defender_total
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                    RETURNING id
+                """, kind, str(attacker_id), str(defender_id) if defender_id else None, defender_name, seed,
+                     att_hash, def_hash, result.outcome, int(result.totals["attacker"]), int(result.totals["defender"]))
+    except Exception as e:
+        print(f"Error recording battle: {e}")
+        return None
+
+async def get_battle_record(battle_id):
+    pool = await get_db_pool()
+    row = await pool.fetchrow("""
+        SELECT r.*, a.team AS attacker_team, d.team AS defender_team
+        FROM battle_records r
+        JOIN battle_teams a ON a.team_hash = r.attacker_hash
+        JOIN battle_teams d ON d.team_hash = r.defender_hash
+        WHERE r.id = $1
+    """, battle_id)
+    if not row: return None
+    record = dict(row)
+    for key in ("attacker_team", "defender_team"):
+        if isinstance(record[key], str): record[key] = json.loads(record[key])
+    return record
+
+def replay_battle(record):
+    """
+    Re-runs a recorded battle. Returns (result, matches): matches is False when the
+    current rules no longer reproduce the recorded outcome and totals.
+    """
+    result = BattleEngine(battle_rng(record['seed'])).run(record['attacker_team'], record['defender_team'])
+    matches = (
+        result.outcome == record['outcome']
+        and int(result.totals["attacker"]) == record['attacker_total']
+        and int(result.totals["defender"]) == record['defender_total']
+    )
+    return result, matches
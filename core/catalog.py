@@ -0,0 +1,93 @@
+# core/catalog.py
+import json
+import os
+from core.game_math import calculate_effective_power, calculate_effective_power_array
+
+# Built by scripts/update_ranks.py from the same scrape that produces the rank index
+CATALOG_PATH = "data/catalog.json"
+# Rank changes from the last update_ranks run; `load_catalog.py --diff` loads only these
+RANKINGS_DIFF_PATH = "data/rankings_diff.json"
+CATALOG_SIZE = 10000  # snapshot limit: only the top CATALOG_SIZE ranks are kept
+
+_catalog = None
+
+def determine_rarity(rank):
+    """Maps a favourites rank to its gacha tier."""
+    if rank <= 250: return "SSR"
+    if rank <= 1500: return "SR"
+    return "R"
+
+def build_catalog_entries(ranked_chars):
+    """
+    Converts a scraped list of AniList characters (already sorted by favourites)
+    into catalog entries. Rank is the 1-based position in the list.
+    """
+    entries = []
+    for rank, char in enumerate(ranked_chars[:CATALOG_SIZE], start=1):
+        rarity = determine_rarity(rank)
+        entries.append({
+            'id': char['id'],
+            'name': char['name']['full'],
+            'image_url': (char.get('image') or {}).get('large'),
+            'favs': char['favourites'],
+            'rank': rank,
+            'rarity': rarity,
+            'true_power': calculate_effective_power(char['favourites'], rarity, rank)
+        })
+    return entries
+
+def save_catalog(entries, path=CATALOG_PATH):
+    with open(path, "w") as f:
+        json.dump(entries, f, separators=(",", ":"))
+
+def recompute_catalog_file(path=CATALOG_PATH):
+    """Rewrites true_power in the catalog file with the current power curve. Returns entries updated."""
+    if not os.path.exists(path): return 0
+    with open(path, "r") as f:
+        entries = json.load(f)
+    powers = calculate_effective_power_array([e['favs'] for e in entries], [e['rarity'] for e in entries])
+    for entry, power in zip(entries, powers.tolist()):
+        entry['true_power'] = power
+    save_catalog(entries, path)
+    return len(entries)
+
+class CharacterCatalog:
+    """
+    In-process copy of the top characters on AniList.
+    Lets pulls resolve ranks and IDs without a network round trip.
+    """
+    def __init__(self, entries):
+        self._by_rank = {e['rank']: e for e in entries}
+        self._by_id = {e['id']: e for e in entries}
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        if not os.path.exists(path):
+            return cls([])
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self._by_rank)
+
+    def by_rank(self, rank):
+        return self._by_rank.get(rank)
+
+    def by_id(self, anilist_id):
+        return self._by_id.get(anilist_id)
+
+def get_catalog():
+    global _catalog
+    if _catalog is None:
+        _catalog = CharacterCatalog.load()
+        if len(_catalog):
+            print(f"✅ [Catalog] Loaded {len(_catalog)} characters from {CATALOG_PATH}")
+        else:
+            print(f"⚠️ [Catalog] '{CATALOG_PATH}' not found. Pulls will fall back to AniList. Run scripts/update_ranks.py")
+    return _catalog
+
+def reload_catalog():
+    """Re-reads the catalog file (e.g. after scripts/update_ranks.py has refreshed it)."""
+    global _catalog
+    _catalog = None
+    return get_catalog()
@@ -2,6 +2,8 @@
 import asyncpg
 import os
 import json
+from core.game_math import calculate_effective_power_array
+from core.migrations import run_migrations, LATEST_VERSION
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 _pool = None
@@ -20,220 +22,8 @@ async def get_db_pool():
 async def init_db():
     pool = await get_db_pool()
     async with pool.acquire() as conn:
-
-# Add this inside the init_db() function
-
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS boss_kills (
-                user_id TEXT,
-                boss_id TEXT,
-                PRIMARY KEY (user_id, boss_id)
-            );
-        """)     
-        # ACHIEVEMENTS: Tracks earned achievements
-        
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS achievements (
-                user_id TEXT,
-                achievement_id TEXT,
-                earned_at TEXT,
-                PRIMARY KEY (user_id, achievement_id)
-            );
-        """)
-        
-        # USERS: Gems, Pity, Starter Flag, Daily Boat Pulls
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS banners (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                rate_up_ids INTEGER[] NOT NULL,
-                rate_up_chance FLOAT DEFAULT 0.5,
-                is_active BOOLEAN DEFAULT FALSE,
-                end_timestamp BIGINT NOT NULL -- Stores Unix timestamp
-            );
-        """)
-        
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id TEXT PRIMARY KEY,
-                gacha_gems INTEGER DEFAULT 0,
-                boat_credits_spent BIGINT DEFAULT 0,
-                pity_counter INTEGER DEFAULT 0,
-                luck_boost_stacks INTEGER DEFAULT 0,
-                last_daily_exchange TIMESTAMP WITH TIME ZONE,
-                last_expedition_claim TIMESTAMP WITH TIME ZONE,
-                daily_boat_pulls INTEGER DEFAULT 0,
-                last_boat_pull_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                has_claimed_starter BOOLEAN DEFAULT FALSE
-            )
-        """)
-
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS banner_points INTEGER DEFAULT 0;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_banner_id INTEGER DEFAULT -1;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS team_level INTEGER DEFAULT 1;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS team_xp INTEGER DEFAULT 0;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS daily_boat_pulls INTEGER DEFAULT 0;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_boat_pull_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS boat_credits_spent BIGINT DEFAULT 0;")
-        # --- BOUNTY BOARD & BOND SYSTEM ---
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS total_pulls INTEGER DEFAULT 0;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS total_bounties INTEGER DEFAULT 0;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS expedition_gems_total INTEGER DEFAULT 0;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS total_scrapped INTEGER DEFAULT 0;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS checkin_streak INTEGER DEFAULT 0;")
-        # 1. Update Inventory for Bonds
-        await conn.execute("ALTER TABLE inventory ADD COLUMN IF NOT EXISTS bond_exp INTEGER DEFAULT 0;")
-        await conn.execute("ALTER TABLE inventory ADD COLUMN IF NOT EXISTS bond_level INTEGER DEFAULT 1;")
-        
-        # 2. Update Users for Bounty Keys
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS bounty_keys INTEGER DEFAULT 3;")
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_key_regen TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;")
-
-        # 3. Bounty Board Table (Shared Server State)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS bounty_board (
-                slot_id INTEGER PRIMARY KEY,
-                enemy_data JSONB,
-                tier TEXT,
-                expires_at TIMESTAMP
-            );
-        """)
-
-        # 4. User Status for Bounty Board (Tracks completion)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS user_bounty_status (
-                user_id TEXT,
-                slot_id INTEGER,
-                status TEXT, -- 'AVAILABLE', 'COMPLETED', 'FAILED'
-                PRIMARY KEY (user_id, slot_id)
-            );
-        """)
-        
-        # NEW: Coins Currency
-        await conn.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS coins INTEGER DEFAULT 0;")
-
-        # NEW: Items Storage (for Tokens, etc.)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS user_items (
-                user_id TEXT,
-                item_id TEXT,
-                quantity INTEGER DEFAULT 0,
-                PRIMARY KEY (user_id, item_id)
-            );
-        """)
-        
-        # NEW: Daily Shop Table
-        # Stores the date and a JSON list of {id, price, rarity}
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS daily_shop (
-                date TEXT PRIMARY KEY,
-                items JSONB
-            );
-        """)
-        
-        # Ensure column type is BIGINT even if it was created as INTEGER previously
-        await conn.execute("ALTER TABLE users ALTER COLUMN boat_credits_spent TYPE BIGINT;")
-
-        # INVENTORY: Unique ID for every unit owned
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS inventory (
-                id SERIAL PRIMARY KEY,
-                user_id TEXT REFERENCES users(user_id),
-                anilist_id INTEGER,
-                dupe_level INTEGER DEFAULT 0, -- 0 = base unit, 1 = first dupe, etc.
-                obtained_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_locked BOOLEAN DEFAULT FALSE,
-                UNIQUE(user_id, anilist_id) -- Prevents multiple rows for the same character
-            )
-        """)
-
-        # --- MIGRATION GUARDS ---
-        # Ensure existing databases get the column and constraint
-        await conn.execute("ALTER TABLE inventory ADD COLUMN IF NOT EXISTS dupe_level INTEGER DEFAULT 0;")
-        
-        # This adds the unique constraint if it doesn't exist (PostgreSQL 9.1+)
-        await conn.execute("""
-            DO $$ 
-            BEGIN 
-                IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'unique_user_character') THEN
-                    ALTER TABLE inventory ADD CONSTRAINT unique_user_character UNIQUE (user_id, anilist_id);
-                END IF;
-            END $$;
-        """)
-
-        # TEAMS: Battle squad (5 slots)
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS teams (
-                user_id TEXT PRIMARY KEY REFERENCES users(user_id),
-                slot_1 INTEGER DEFAULT NULL,
-                slot_2 INTEGER DEFAULT NULL,
-                slot_3 INTEGER DEFAULT NULL,
-                slot_4 INTEGER DEFAULT NULL,
-                slot_5 INTEGER DEFAULT NULL
-            )
-        """)
-        
-        # TEAM PRESETS: Saved loadouts
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS team_presets (
-                user_id TEXT,
-                preset_name TEXT,
-                slot_1 INTEGER,
-                slot_2 INTEGER,
-                slot_3 INTEGER,
-                slot_4 INTEGER,
-                slot_5 INTEGER,
-                PRIMARY KEY (user_id, preset_name)
-            )
-        """)
-
-        # EXPEDITIONS: Passive gem earners
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS expeditions (
-                user_id TEXT PRIMARY KEY REFERENCES users(user_id),
-                slot_ids INTEGER[] DEFAULT '{}',
-                start_time TIMESTAMP,
-                last_claim TIMESTAMP
-            )
-        """)
-
-        # CACHE: Stores AniList data to save API calls
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS characters_cache (
-                anilist_id INTEGER PRIMARY KEY,
-                name TEXT,
-                image_url TEXT,
-                rarity TEXT DEFAULT 'R',
-                rank INTEGER DEFAULT 10000,
-                base_power INTEGER DEFAULT 0,
-                true_power INTEGER DEFAULT 0,
-                ability_tags JSONB DEFAULT '[]'::jsonb,
-                squash_resistance FLOAT DEFAULT 0.0,
-                is_overridden BOOLEAN DEFAULT FALSE -- Protects manual edits
-            )
-        """)
-
-        # DAILY TASKS: Tracks progress for Battle/NPC tasks
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS daily_tasks (
-                user_id TEXT,
-                task_key TEXT,
-                progress INTEGER DEFAULT 0,
-                is_claimed BOOLEAN DEFAULT FALSE,
-                last_updated DATE DEFAULT CURRENT_DATE,
-                PRIMARY KEY (user_id, task_key)
-            )
-        """)
-
-        # GLOBAL SETTINGS: Fairness toggles
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS global_settings (
-                key TEXT PRIMARY KEY,
-                value_bool BOOLEAN DEFAULT TRUE
-            )
-        """)
-
-    print("✅ Database initialized successfully.")
+        applied = await run_migrations(conn)
+    print(f"✅ Database initialized successfully (schema v{LATEST_VERSION}, {len(applied)} migrations applied).")
 
 async def get_user(user_id):
     pool = await get_db_pool()
@@ -247,56 +37,63 @@ async def add_currency(user_id, amount):
     pool = await get_db_pool()
     await pool.execute("UPDATE users SET gacha_gems = gacha_gems + $1 WHERE user_id = $2", amount, str(user_id))
 
+# Max-dupe overflow pays out per copy (1 Coin = 20 Gems, matching manual scrap)
+SCRAP_GEM_VALUES = {"R": 100, "SR": 500, "SSR": 10000}
+SCRAP_COIN_VALUES = {"R": 5, "SR": 25, "SSR": 500}
+MAX_DUPE_LEVEL = 10
+
 async def batch_add_to_inventory(user_id, characters):
     """
     Adds characters to inventory. Increments dupe_level up to 10.
     If already at 10, scraps the character for gems AND COINS based on rarity.
-    Returns (total_gems, total_coins).
+    One add_to_inventory() call (the same cap rule commit_pull uses): the same character
+    may appear several times in a batch.
+    Returns (total_gems, total_coins, overflow): overflow maps anilist_id to the copies scrapped.
+    """
+    pool = await get_db_pool()
+    row = await pool.fetchrow(
+        "SELECT * FROM add_to_inventory($1, $2, $3, $4::jsonb, $5::jsonb, $6)",
+        str(user_id), [c['id'] for c in characters], [c['rarity'] for c in characters],
+        json.dumps(SCRAP_GEM_VALUES), json.dumps(SCRAP_COIN_VALUES), MAX_DUPE_LEVEL
+    )
+    return row['scrapped_gems'], row['scrapped_coins'], dict(zip(row['overflow_ids'], row['overflow_copies']))
+
+async def commit_pull(user_id, cost, banner_id, characters, claim_starter=False):
+    """
+    Runs the commit_pull() function for already-resolved pull records.
+    Returns a dict (ok, gems_left, spark_points, scrapped_gems, scrapped_coins, dupe_levels).
+    ok is False (and nothing is written) when the user cannot afford `cost`.
+    With claim_starter=True the has_claimed_starter flag is set in the same transaction; if it
+    was already set the dict is just (ok False, already_claimed True). A rejected pull rolls the claim back.
     """
     pool = await get_db_pool()
-    # Define your scrap values here
-    scrap_values = {"R": 100, "SR": 500, "SSR": 10000}
-    scrap_coins_values = {"R": 5, "SR": 25, "SSR": 500} # Matches manual scrap ratio (1 Coin = 20 Gems)
-    
-    total_scrapped_gems = 0
-    total_scrapped_coins = 0
-    
     async with pool.acquire() as conn:
-        for char in characters:
-            cid = char['id']
-            rarity = char['rarity']
-            
-            # Check current status of character in user's inventory
-            row = await conn.fetchrow(
-                "SELECT dupe_level FROM inventory WHERE user_id = $1 AND anilist_id = $2", 
-                str(user_id), cid
-            )
-            
-            if not row:
-                # New character: insert with dupe_level 0
-                await conn.execute(
-                    "INSERT INTO inventory (user_id, anilist_id, dupe_level) VALUES ($1, $2, 0)", 
-                    str(user_id), cid
-                )
-            elif row['dupe_level'] < 10:
-                # Under the cap: increment dupe level
-                await conn.execute(
-                    "UPDATE inventory SET dupe_level = dupe_level + 1 WHERE user_id = $1 AND anilist_id = $2", 
-                    str(user_id), cid
+        tx = conn.transaction()
+        await tx.start()
+        try:
+            if claim_starter:
+                claimed = await conn.fetchval(
+                    "UPDATE users SET has_claimed_starter = TRUE WHERE user_id = $1 AND has_claimed_starter = FALSE RETURNING TRUE",
+                    str(user_id)
                 )
-            else:
-                # At max dupes (10): add to scrap total
-                total_scrapped_gems += scrap_values.get(rarity, 0)
-                total_scrapped_coins += scrap_coins_values.get(rarity, 0)
-        
-        # If any characters were scrapped, update the user's gem and coin balance
-        if total_scrapped_gems > 0 or total_scrapped_coins > 0:
-            await conn.execute(
-                "UPDATE users SET gacha_gems = gacha_gems + $1, coins = coins + $2 WHERE user_id = $3", 
-                total_scrapped_gems, total_scrapped_coins, str(user_id)
+                if not claimed:
+                    await tx.rollback()
+                    return {'ok': False, 'already_claimed': True}
+            row = await conn.fetchrow(
+                "SELECT * FROM commit_pull($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11::jsonb, $12::jsonb, $13)",
+                str(user_id), cost, banner_id,
+                [c['id'] for c in characters], [c['rarity'] for c in characters],
+                [c['name'] for c in characters], [c['image_url'] for c in characters],
+                [c['page'] for c in characters], [c['favs'] for c in characters],
+                [int(c['true_power']) for c in characters],
+                json.dumps(SCRAP_GEM_VALUES), json.dumps(SCRAP_COIN_VALUES), MAX_DUPE_LEVEL
             )
-            
-    return total_scrapped_gems, total_scrapped_coins
+        except Exception:
+            await tx.rollback()
+            raise
+        # commit_pull() writes nothing when it rejects, but the starter claim above must not stick either
+        await (tx.commit() if row['ok'] else tx.rollback())
+    return dict(row)
 
 async def batch_cache_characters(chars):
     pool = await get_db_pool()
@@ -312,6 +109,66 @@ async def batch_cache_characters(chars):
         WHERE characters_cache.is_overridden = FALSE
     """, data)
 
+async def bulk_load_catalog(entries):
+    """
+    Bulk upsert of catalog entries (see core/catalog.py) into characters_cache.
+    Streams rows with COPY into a temp staging table, then merges in one statement.
+    Overridden units keep their rarity/true_power; skills are never touched.
+    Returns the number of rows merged.
+    """
+    records = [(e['id'], e['name'], e['image_url'], e['rarity'], e['rank'], e['favs'], e['true_power']) for e in entries]
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute("""
+                CREATE TEMP TABLE characters_staging (
+                    anilist_id INTEGER, name TEXT, image_url TEXT, rarity TEXT,
+                    rank INTEGER, base_power INTEGER, true_power INTEGER
+                ) ON COMMIT DROP
+            """)
+            await conn.copy_records_to_table(
+                'characters_staging', records=records,
+                columns=['anilist_id', 'name', 'image_url', 'rarity', 'rank', 'base_power', 'true_power']
+            )
+            status = await conn.execute("""
+                INSERT INTO characters_cache (anilist_id, name, image_url, rarity, rank, base_power, true_power)
+                SELECT DISTINCT ON (anilist_id) anilist_id, name, image_url, rarity, rank, base_power, true_power
+                FROM characters_staging
+                ORDER BY anilist_id, rank
+                ON CONFLICT (anilist_id) DO UPDATE
+                SET name = EXCLUDED.name,
+                    image_url = EXCLUDED.image_url,
+                    rank = EXCLUDED.rank,
+                    base_power = EXCLUDED.base_power,
+                    rarity = CASE WHEN characters_cache.is_overridden THEN characters_cache.rarity ELSE EXCLUDED.rarity END,
+                    true_power = CASE WHEN characters_cache.is_overridden THEN characters_cache.true_power ELSE EXCLUDED.true_power END
+            """)
+    # Status is "INSERT 0 <rows>"
+    return int(status.split()[-1])
+
+async def recompute_catalog_power():
+    """
+    Re-applies the current power curve to every non-overridden cached character
+    (base_power holds the AniList favourites). One vectorized pass, one bulk UPDATE.
+    Returns (rows_checked, rows_changed).
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT anilist_id, base_power, rarity FROM characters_cache WHERE is_overridden = FALSE")
+        if not rows: return 0, 0
+
+        ids = [r['anilist_id'] for r in rows]
+        powers = calculate_effective_power_array([r['base_power'] or 0 for r in rows], [r['rarity'] for r in rows])
+        status = await conn.execute("""
+            UPDATE characters_cache c
+            SET true_power = v.true_power
+            FROM unnest($1::int[], $2::int[]) AS v(anilist_id, true_power)
+            WHERE c.anilist_id = v.anilist_id
+              AND c.is_overridden = FALSE
+              AND c.true_power IS DISTINCT FROM v.true_power
+        """, ids, powers.tolist())
+    return len(rows), int(status.split()[-1])
+
 async def get_inventory_details(user_id, sort_by="date"):
     pool = await get_db_pool()
     query = """
@@ -319,8 +176,7 @@ async def get_inventory_details(user_id, sort_by="date"):
             i.id, 
             i.anilist_id, 
             c.name, 
-            -- Calculation: Base Power * (1 + (dupe_level * 0.05))
-            FLOOR(c.true_power * (1 + (i.dupe_level * 0.05))) as true_power, 
+            i.effective_power as true_power, -- maintained by triggers (see core/migrations.py)
             c.rarity, 
             c.rank, 
             i.dupe_level + 1 as dupe_count -- Displaying total units (base + dupes)
@@ -330,7 +186,7 @@ async def get_inventory_details(user_id, sort_by="date"):
     """
     
     if sort_by == "power": 
-        query += " ORDER BY true_power DESC"
+        query += " ORDER BY i.effective_power DESC"
     else: 
         query += " ORDER BY i.obtained_at DESC"
     
@@ -386,10 +242,9 @@ async def mass_scrap_r_rarity(user_id):
                 gems = count * 100
                 coins = count * 5
                 await conn.execute(
-                    "UPDATE users SET gacha_gems = gacha_gems + $1, coins = coins + $2 WHERE user_id = $3", 
-                    gems, coins, str(user_id)
+                    "UPDATE users SET gacha_gems = gacha_gems + $1, coins = coins + $2, total_scrapped = total_scrapped + $3 WHERE user_id = $4",
+                    gems, coins, count, str(user_id)
                 )
-                await conn.execute("UPDATE users SET total_scrapped = total_scrapped + $1 WHERE user_id = $2", count, str(user_id))
                 return count, gems, coins
             return 0, 0, 0
 
@@ -418,9 +273,8 @@ async def mass_scrap_sr_rarity(user_id):
                 gems = count * 500
                 coins = count * 25
                 await conn.execute(
-                    "UPDATE users SET gacha_gems = gacha_gems + $1, coins = coins + $2 WHERE user_id = $3", 
-                    gems, coins, str(user_id)
+                    "UPDATE users SET gacha_gems = gacha_gems + $1, coins = coins + $2, total_scrapped = total_scrapped + $3 WHERE user_id = $4",
+                    gems, coins, count, str(user_id)
                 )
-                await conn.execute("UPDATE users SET total_scrapped = total_scrapped + $1 WHERE user_id = $2", count, str(user_id))
                 return count, gems, coins
             return 0, 0, 0
\ No newline at end of file
@@ -1,10 +1,10 @@
 # core/economy.py
 
 import os
-import aiohttp
 import datetime
 import asyncio
 from core.database import get_db_pool
+from core.http import get_http_session
 
 # --- CONSTANTS ---
 GEMS_PER_PULL = 1000  # 1 Multi = 10,000 Gems
@@ -103,18 +103,17 @@ class Economy:
                 target_guild_id = ECONOMY_GUILD_ID if ECONOMY_GUILD_ID != 0 else guild_id
                 url = f"https://unbelievaboat.com/api/v1/guilds/{target_guild_id}/users/{user_id}"
                 
-                # FIX: Added timeout to prevent the command from being stuck forever on network issues
-                timeout = aiohttp.ClientTimeout(total=15)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    data = {"bank": -total_cost}
-                    async with session.patch(url, headers=headers, json=data) as resp:
-                        if resp.status != 200:
-                            try:
-                                error_data = await resp.json()
-                                error_msg = error_data.get('message', 'Insufficient funds in bank.')
-                            except:
-                                error_msg = f"HTTP {resp.status} Error"
-                            return {"success": False, "message": f"Unbelievaboat Error: {error_msg}"}
+                # Shared client carries the 15s timeout so the command can't hang on network issues
+                session = await get_http_session()
+                data = {"bank": -total_cost}
+                async with session.patch(url, headers=headers, json=data) as resp:
+                    if resp.status != 200:
+                        try:
+                            error_data = await resp.json()
+                            error_msg = error_data.get('message', 'Insufficient funds in bank.')
+                        except:
+                            error_msg = f"HTTP {resp.status} Error"
+                        return {"success": False, "message": f"Unbelievaboat Error: {error_msg}"}
 
                 # Update DB
                 await conn.execute("""
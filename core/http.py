@@ -0,0 +1,29 @@
+# core/http.py
+import aiohttp
+
+# One pooled client for every outbound call (AniList, image CDNs, Unbelievaboat).
+# Keep-alive reuses TCP+TLS connections and the DNS cache skips repeat lookups.
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=15, connect=5, sock_read=10)
+HTTP_CONNECTION_LIMIT = 100
+HTTP_CONNECTIONS_PER_HOST = 20
+HTTP_DNS_CACHE_TTL = 300  # seconds
+
+_session = None
+
+async def get_http_session():
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_CONNECTION_LIMIT,
+            limit_per_host=HTTP_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            enable_cleanup_closed=True
+        )
+        _session = aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT)
+    return _session
+
+async def close_http_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
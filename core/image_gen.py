@@ -1,10 +1,10 @@
 from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageEnhance
-import aiohttp
 import io
 import os
 import pathlib
 import asyncio
 from datetime import datetime
+from core.http import get_http_session
 
 # --- ROBUST PATH SETUP ---
 current_dir = pathlib.Path(__file__).parent.absolute()
@@ -231,9 +231,9 @@ async def generate_10_pull_image(character_list):
     except:
         base_img = Image.new("RGBA", (canvas_w, canvas_h), "#121212")
 
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_image(session, char['image_url']) for char in character_list]
-        downloaded_images = await asyncio.gather(*tasks)
+    session = await get_http_session()
+    tasks = [fetch_image(session, char['image_url']) for char in character_list]
+    downloaded_images = await asyncio.gather(*tasks)
     
     for i, img in enumerate(downloaded_images):
         character_list[i]['image_obj'] = img
@@ -273,18 +273,18 @@ async def generate_team_image(team_list):
     tx_w = bbox[2] - bbox[0]
     draw.text(((canvas_w - tx_w) / 2, 25), header_text, font=font_large, fill="#FFD700")
 
-    async with aiohttp.ClientSession() as session:
-        tasks = []
-        indices = []
-        for i, char in enumerate(team_list):
-            if char:
-                tasks.append(fetch_image(session, char['image_url']))
-                indices.append(i)
+    session = await get_http_session()
+    tasks = []
+    indices = []
+    for i, char in enumerate(team_list):
+        if char:
+            tasks.append(fetch_image(session, char['image_url']))
+            indices.append(i)
         
-        if tasks:
-            downloaded = await asyncio.gather(*tasks)
-            for i, img in zip(indices, downloaded):
-                team_list[i]['image_obj'] = img
+    if tasks:
+        downloaded = await asyncio.gather(*tasks)
+        for i, img in zip(indices, downloaded):
+            team_list[i]['image_obj'] = img
 
     start_x, start_y, gap_x = 70, 100, 15
 
@@ -336,21 +336,21 @@ async def generate_banner_image(character_data_list, banner_name, end_timestamp)
     canvas = Image.new('RGB', (banner_w, banner_h), (20, 20, 20))
     strip_w = banner_w // len(character_data_list)
 
-    async with aiohttp.ClientSession() as session:
-        for i, char in enumerate(character_data_list):
-            async with session.get(char['image_url']) as resp:
-                if resp.status == 200:
-                    img_data = await resp.read()
-                    char_img = Image.open(io.BytesIO(img_data)).convert("RGBA")
+    session = await get_http_session()
+    for i, char in enumerate(character_data_list):
+        async with session.get(char['image_url']) as resp:
+            if resp.status == 200:
+                img_data = await resp.read()
+                char_img = Image.open(io.BytesIO(img_data)).convert("RGBA")
                     
-                    aspect = char_img.width / char_img.height
-                    target_h = banner_h
-                    target_w = int(target_h * aspect)
-                    char_img = char_img.resize((target_w, target_h), Image.LANCZOS)
+                aspect = char_img.width / char_img.height
+                target_h = banner_h
+                target_w = int(target_h * aspect)
+                char_img = char_img.resize((target_w, target_h), Image.LANCZOS)
                     
-                    left = (char_img.width - strip_w) // 2
-                    char_img = char_img.crop((left, 0, left + strip_w, banner_h))
-                    canvas.paste(char_img, (i * strip_w, 0), char_img)
+                left = (char_img.width - strip_w) // 2
+                char_img = char_img.crop((left, 0, left + strip_w, banner_h))
+                canvas.paste(char_img, (i * strip_w, 0), char_img)
 
     draw = ImageDraw.Draw(canvas)
     font_bold = ImageFont.truetype("assets/fonts/bold_font.ttf", 45)
@@ -374,29 +374,29 @@ async def generate_battle_image(team1, team2, name1, name2, winner_idx=None):
     canvas = Image.new("RGBA", (W, H), (15, 15, 15, 255))
     draw = ImageDraw.Draw(canvas)
     
-    async with aiohttp.ClientSession() as session:
-        async def prep_team_cards(team_list, is_right_side=False):
-            tasks = []
-            for char in team_list:
-                if char.get('image_url'):
-                    tasks.append(fetch_image(session, char['image_url']))
-                else:
-                    tasks.append(asyncio.sleep(0, result=None))
+    session = await get_http_session()
+    async def prep_team_cards(team_list, is_right_side=False):
+        tasks = []
+        for char in team_list:
+            if char.get('image_url'):
+                tasks.append(fetch_image(session, char['image_url']))
+            else:
+                tasks.append(asyncio.sleep(0, result=None))
             
-            images = await asyncio.gather(*tasks)
-            cards = []
-            for i, img in enumerate(images):
-                team_list[i]['image_obj'] = img
-                card = create_character_card(team_list[i])
-                if is_right_side:
-                    card = ImageOps.mirror(card)
-                cards.append(card)
-            return cards
-
-        cards1, cards2 = await asyncio.gather(
-            prep_team_cards(team1, is_right_side=False),
-            prep_team_cards(team2, is_right_side=True)
-        )
+        images = await asyncio.gather(*tasks)
+        cards = []
+        for i, img in enumerate(images):
+            team_list[i]['image_obj'] = img
+            card = create_character_card(team_list[i])
+            if is_right_side:
+                card = ImageOps.mirror(card)
+            cards.append(card)
+        return cards
+
+    cards1, cards2 = await asyncio.gather(
+        prep_team_cards(team1, is_right_side=False),
+        prep_team_cards(team2, is_right_side=True)
+    )
 
     card_w, card_h, gap = 200, 300, 20
     start_x = (W - (5 * card_w + 4 * gap)) // 2
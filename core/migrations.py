@@ -0,0 +1,628 @@
+# core/migrations.py
+import asyncpg
+
+# Ordered schema migrations. Each entry is (version, description, statements).
+# run_migrations() applies only the versions newer than schema_version, each in
+# its own transaction, so a restart on a current schema is a single SELECT.
+# Never edit a migration that has shipped: append a new one instead.
+MIGRATION_LOCK_ID = 0x5374617264  # pg_advisory_lock key, one runner at a time across shards
+
+# Charges gems, advances spark, caches the pulled characters, upserts inventory with
+# the dupe cap, credits overflow scrap and bumps total_pulls in ONE transaction.
+# Locking the user row first serializes concurrent pulls by the same user (no double-spend).
+# As shipped in v3; v8 replaces it with COMMIT_PULL_FUNCTION_V8.
+COMMIT_PULL_FUNCTION = """
+    CREATE OR REPLACE FUNCTION commit_pull(
+        p_user_id TEXT, p_cost INTEGER, p_banner_id INTEGER,
+        p_ids INTEGER[], p_rarities TEXT[], p_names TEXT[], p_images TEXT[],
+        p_ranks INTEGER[], p_favs INTEGER[], p_powers INTEGER[],
+        p_scrap_gems JSONB, p_scrap_coins JSONB, p_max_dupe INTEGER
+    ) RETURNS TABLE (
+        ok BOOLEAN, gems_left INTEGER, spark_points INTEGER,
+        scrapped_gems INTEGER, scrapped_coins INTEGER, dupe_levels INTEGER[]
+    ) LANGUAGE plpgsql AS $$
+    DECLARE
+        v_amount INTEGER := cardinality(p_ids);
+        v_gems INTEGER;
+        v_spark INTEGER;
+        v_scrap_gems INTEGER;
+        v_scrap_coins INTEGER;
+        v_levels INTEGER[];
+    BEGIN
+        -- 1. Charge + spark + pull counter (row lock held until commit)
+        UPDATE users u
+        SET gacha_gems = u.gacha_gems - p_cost,
+            banner_points = CASE
+                WHEN p_banner_id IS NULL THEN u.banner_points
+                WHEN u.last_banner_id IS DISTINCT FROM p_banner_id THEN v_amount
+                ELSE COALESCE(u.banner_points, 0) + v_amount END,
+            last_banner_id = COALESCE(p_banner_id, u.last_banner_id),
+            total_pulls = u.total_pulls + v_amount
+        WHERE u.user_id = p_user_id AND u.gacha_gems >= p_cost
+        RETURNING u.gacha_gems, u.banner_points INTO v_gems, v_spark;
+
+        IF NOT FOUND THEN
+            SELECT u.gacha_gems INTO v_gems FROM users u WHERE u.user_id = p_user_id;
+            RETURN QUERY SELECT FALSE, COALESCE(v_gems, 0), 0, 0, 0, NULL::INTEGER[];
+            RETURN;
+        END IF;
+
+        -- 2. Cache the characters (overridden units keep their manual rarity/power)
+        INSERT INTO characters_cache (anilist_id, name, image_url, rarity, rank, base_power, true_power)
+        SELECT DISTINCT ON (c.id) c.id, c.name, c.image, c.rarity, c.rank, c.favs, c.power
+        FROM unnest(p_ids, p_names, p_images, p_rarities, p_ranks, p_favs, p_powers)
+             AS c(id, name, image, rarity, rank, favs, power)
+        ORDER BY c.id
+        ON CONFLICT (anilist_id) DO UPDATE
+        SET true_power = EXCLUDED.true_power,
+            rarity = EXCLUDED.rarity
+        WHERE characters_cache.is_overridden = FALSE;
+
+        -- 3. Upsert inventory with the cap and price the overflow (the user row lock makes the read of prior levels safe)
+        WITH pulled AS (
+            SELECT p.id AS anilist_id, COUNT(*)::int AS n, MIN(p.rarity) AS rarity
+            FROM unnest(p_ids, p_rarities) AS p(id, rarity)
+            GROUP BY p.id
+        ),
+        prior AS (
+            SELECT pl.anilist_id, pl.n, pl.rarity, COALESCE(i.dupe_level, -1) AS prior_level
+            FROM pulled pl
+            LEFT JOIN inventory i ON i.user_id = p_user_id AND i.anilist_id = pl.anilist_id
+        ),
+        upserted AS (
+            INSERT INTO inventory (user_id, anilist_id, dupe_level)
+            SELECT p_user_id, pr.anilist_id, LEAST(pr.prior_level + pr.n, p_max_dupe)
+            FROM prior pr
+            WHERE pr.prior_level < p_max_dupe
+            ON CONFLICT (user_id, anilist_id) DO UPDATE SET dupe_level = EXCLUDED.dupe_level
+            RETURNING 1
+        )
+        -- 4. Copies past the cap pay out as scrap
+        SELECT COALESCE(SUM(GREATEST(pr.prior_level + pr.n - p_max_dupe, 0) * (p_scrap_gems ->> pr.rarity)::int), 0)::int,
+               COALESCE(SUM(GREATEST(pr.prior_level + pr.n - p_max_dupe, 0) * (p_scrap_coins ->> pr.rarity)::int), 0)::int
+        INTO v_scrap_gems, v_scrap_coins
+        FROM prior pr;
+
+        IF v_scrap_gems > 0 OR v_scrap_coins > 0 THEN
+            UPDATE users u SET gacha_gems = u.gacha_gems + v_scrap_gems, coins = u.coins + v_scrap_coins
+            WHERE u.user_id = p_user_id
+            RETURNING u.gacha_gems INTO v_gems;
+        END IF;
+
+        -- 5. Dupe level of each pulled character after this pull, in pull order
+        SELECT array_agg(COALESCE(i.dupe_level, 0) ORDER BY p.ord) INTO v_levels
+        FROM unnest(p_ids) WITH ORDINALITY AS p(id, ord)
+        LEFT JOIN inventory i ON i.user_id = p_user_id AND i.anilist_id = p.id;
+
+        RETURN QUERY SELECT TRUE, v_gems, COALESCE(v_spark, 0), v_scrap_gems, v_scrap_coins, v_levels;
+    END;
+    $$
+"""
+
+# The one dupe-cap rule, shared by commit_pull() and database.batch_add_to_inventory():
+# upserts the pulled copies (duplicates in the batch included) and credits copies past the
+# cap as scrap. The level is incremented in place, so writers that don't hold the user row
+# lock (shop, !upgrade, admin grants) are never overwritten. Returns the scrap totals and
+# the overflowing anilist_ids with the copies each one scrapped.
+ADD_TO_INVENTORY_FUNCTION = """
+    CREATE OR REPLACE FUNCTION add_to_inventory(
+        p_user_id TEXT, p_ids INTEGER[], p_rarities TEXT[],
+        p_scrap_gems JSONB, p_scrap_coins JSONB, p_max_dupe INTEGER
+    ) RETURNS TABLE (
+        scrapped_gems INTEGER, scrapped_coins INTEGER, overflow_ids INTEGER[], overflow_copies INTEGER[]
+    ) LANGUAGE plpgsql AS $$
+    DECLARE
+        v_gems INTEGER;
+        v_coins INTEGER;
+        v_ids INTEGER[];
+        v_copies INTEGER[];
+    BEGIN
+        WITH pulled AS (
+            SELECT p.id AS anilist_id, COUNT(*)::int AS n, MIN(p.rarity) AS rarity
+            FROM unnest(p_ids, p_rarities) AS p(id, rarity)
+            GROUP BY p.id
+        ),
+        prior AS (
+            -- -1 = not owned yet, so the first copy lands on dupe_level 0
+            SELECT pl.anilist_id, pl.n, pl.rarity, COALESCE(i.dupe_level, -1) AS prior_level
+            FROM pulled pl
+            LEFT JOIN inventory i ON i.user_id = p_user_id AND i.anilist_id = pl.anilist_id
+        ),
+        upserted AS (
+            INSERT INTO inventory (user_id, anilist_id, dupe_level)
+            SELECT p_user_id, pr.anilist_id, LEAST(pr.n - 1, p_max_dupe)
+            FROM prior pr
+            WHERE pr.prior_level < p_max_dupe
+            ON CONFLICT (user_id, anilist_id) DO UPDATE
+            SET dupe_level = LEAST(inventory.dupe_level + EXCLUDED.dupe_level + 1, p_max_dupe)
+            RETURNING 1
+        ),
+        overflow AS (
+            SELECT pr.anilist_id, pr.rarity, pr.prior_level + pr.n - p_max_dupe AS copies
+            FROM prior pr
+            WHERE pr.prior_level + pr.n > p_max_dupe
+        )
+        SELECT COALESCE(SUM(o.copies * (p_scrap_gems ->> o.rarity)::int), 0)::int,
+               COALESCE(SUM(o.copies * (p_scrap_coins ->> o.rarity)::int), 0)::int,
+               COALESCE(array_agg(o.anilist_id ORDER BY o.anilist_id), '{}'),
+               COALESCE(array_agg(o.copies ORDER BY o.anilist_id), '{}')
+        INTO v_gems, v_coins, v_ids, v_copies
+        FROM overflow o;
+
+        IF v_gems > 0 OR v_coins > 0 THEN
+            UPDATE users u SET gacha_gems = COALESCE(u.gacha_gems, 0) + v_gems, coins = COALESCE(u.coins, 0) + v_coins
+            WHERE u.user_id = p_user_id;
+        END IF;
+
+        RETURN QUERY SELECT v_gems, v_coins, v_ids, v_copies;
+    END;
+    $$
+"""
+
+# commit_pull() on top of add_to_inventory(). A NULL gem balance counts as 0.
+COMMIT_PULL_FUNCTION_V8 = """
+    CREATE OR REPLACE FUNCTION commit_pull(
+        p_user_id TEXT, p_cost INTEGER, p_banner_id INTEGER,
+        p_ids INTEGER[], p_rarities TEXT[], p_names TEXT[], p_images TEXT[],
+        p_ranks INTEGER[], p_favs INTEGER[], p_powers INTEGER[],
+        p_scrap_gems JSONB, p_scrap_coins JSONB, p_max_dupe INTEGER
+    ) RETURNS TABLE (
+        ok BOOLEAN, gems_left INTEGER, spark_points INTEGER,
+        scrapped_gems INTEGER, scrapped_coins INTEGER, dupe_levels INTEGER[]
+    ) LANGUAGE plpgsql AS $$
+    DECLARE
+        v_amount INTEGER := cardinality(p_ids);
+        v_gems INTEGER;
+        v_spark INTEGER;
+        v_scrap_gems INTEGER;
+        v_scrap_coins INTEGER;
+        v_levels INTEGER[];
+    BEGIN
+        -- 1. Charge + spark + pull counter (row lock held until commit)
+        UPDATE users u
+        SET gacha_gems = COALESCE(u.gacha_gems, 0) - p_cost,
+            banner_points = CASE
+                WHEN p_banner_id IS NULL THEN u.banner_points
+                WHEN u.last_banner_id IS DISTINCT FROM p_banner_id THEN v_amount
+                ELSE COALESCE(u.banner_points, 0) + v_amount END,
+            last_banner_id = COALESCE(p_banner_id, u.last_banner_id),
+            total_pulls = COALESCE(u.total_pulls, 0) + v_amount
+        WHERE u.user_id = p_user_id AND COALESCE(u.gacha_gems, 0) >= p_cost
+        RETURNING u.gacha_gems, u.banner_points INTO v_gems, v_spark;
+
+        IF NOT FOUND THEN
+            SELECT u.gacha_gems INTO v_gems FROM users u WHERE u.user_id = p_user_id;
+            RETURN QUERY SELECT FALSE, COALESCE(v_gems, 0), 0, 0, 0, NULL::INTEGER[];
+            RETURN;
+        END IF;
+
+        -- 2. Cache the characters (overridden units keep their manual rarity/power)
+        INSERT INTO characters_cache (anilist_id, name, image_url, rarity, rank, base_power, true_power)
+        SELECT DISTINCT ON (c.id) c.id, c.name, c.image, c.rarity, c.rank, c.favs, c.power
+        FROM unnest(p_ids, p_names, p_images, p_rarities, p_ranks, p_favs, p_powers)
+             AS c(id, name, image, rarity, rank, favs, power)
+        ORDER BY c.id
+        ON CONFLICT (anilist_id) DO UPDATE
+        SET true_power = EXCLUDED.true_power,
+            rarity = EXCLUDED.rarity
+        WHERE characters_cache.is_overridden = FALSE;
+
+        -- 3. Inventory, dupe cap and scrap payout
+        SELECT a.scrapped_gems, a.scrapped_coins INTO v_scrap_gems, v_scrap_coins
+        FROM add_to_inventory(p_user_id, p_ids, p_rarities, p_scrap_gems, p_scrap_coins, p_max_dupe) a;
+        v_gems := v_gems + v_scrap_gems;
+
+        -- 4. Dupe level of each pulled character after this pull, in pull order
+        SELECT array_agg(COALESCE(i.dupe_level, 0) ORDER BY p.ord) INTO v_levels
+        FROM unnest(p_ids) WITH ORDINALITY AS p(id, ord)
+        LEFT JOIN inventory i ON i.user_id = p_user_id AND i.anilist_id = p.id;
+
+        RETURN QUERY SELECT TRUE, v_gems, COALESCE(v_spark, 0), v_scrap_gems, v_scrap_coins, v_levels;
+    END;
+    $$
+"""
+
+MIGRATIONS = [
+    (1, "baseline schema (formerly replayed by init_db on every boot)", [
+        """
+        CREATE TABLE IF NOT EXISTS boss_kills (
+            user_id TEXT,
+            boss_id TEXT,
+            PRIMARY KEY (user_id, boss_id)
+        );
+        """,
+        # ACHIEVEMENTS: Tracks earned achievements
+        """
+        CREATE TABLE IF NOT EXISTS achievements (
+            user_id TEXT,
+            achievement_id TEXT,
+            earned_at TEXT,
+            PRIMARY KEY (user_id, achievement_id)
+        );
+        """,
+        # BANNERS: Rate-up pools
+        """
+        CREATE TABLE IF NOT EXISTS banners (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL,
+            rate_up_ids INTEGER[] NOT NULL,
+            rate_up_chance FLOAT DEFAULT 0.5,
+            is_active BOOLEAN DEFAULT FALSE,
+            end_timestamp BIGINT NOT NULL -- Stores Unix timestamp
+        );
+        """,
+        # USERS: Gems, Pity, Starter Flag, Daily Boat Pulls
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            gacha_gems INTEGER DEFAULT 0,
+            boat_credits_spent BIGINT DEFAULT 0,
+            pity_counter INTEGER DEFAULT 0,
+            luck_boost_stacks INTEGER DEFAULT 0,
+            last_daily_exchange TIMESTAMP WITH TIME ZONE,
+            last_expedition_claim TIMESTAMP WITH TIME ZONE,
+            daily_boat_pulls INTEGER DEFAULT 0,
+            last_boat_pull_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            has_claimed_starter BOOLEAN DEFAULT FALSE
+        )
+        """,
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS banner_points INTEGER DEFAULT 0;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_banner_id INTEGER DEFAULT -1;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS team_level INTEGER DEFAULT 1;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS team_xp INTEGER DEFAULT 0;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS daily_boat_pulls INTEGER DEFAULT 0;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_boat_pull_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS boat_credits_spent BIGINT DEFAULT 0;",
+        # --- BOUNTY BOARD & BOND SYSTEM ---
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS total_pulls INTEGER DEFAULT 0;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS total_bounties INTEGER DEFAULT 0;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS expedition_gems_total INTEGER DEFAULT 0;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS total_scrapped INTEGER DEFAULT 0;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS checkin_streak INTEGER DEFAULT 0;",
+        # Bounty keys
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS bounty_keys INTEGER DEFAULT 3;",
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_key_regen TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;",
+        # Bounty board (shared server state)
+        """
+        CREATE TABLE IF NOT EXISTS bounty_board (
+            slot_id INTEGER PRIMARY KEY,
+            enemy_data JSONB,
+            tier TEXT,
+            expires_at TIMESTAMP
+        );
+        """,
+        # Per-user bounty board status
+        """
+        CREATE TABLE IF NOT EXISTS user_bounty_status (
+            user_id TEXT,
+            slot_id INTEGER,
+            status TEXT, -- 'AVAILABLE', 'COMPLETED', 'FAILED'
+            PRIMARY KEY (user_id, slot_id)
+        );
+        """,
+        # NEW: Coins Currency
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS coins INTEGER DEFAULT 0;",
+        # NEW: Items Storage (for Tokens, etc.)
+        """
+        CREATE TABLE IF NOT EXISTS user_items (
+            user_id TEXT,
+            item_id TEXT,
+            quantity INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id, item_id)
+        );
+        """,
+        # NEW: Daily Shop Table
+        # Stores the date and a JSON list of {id, price, rarity}
+        """
+        CREATE TABLE IF NOT EXISTS daily_shop (
+            date TEXT PRIMARY KEY,
+            items JSONB
+        );
+        """,
+        # Ensure column type is BIGINT even if it was created as INTEGER previously
+        "ALTER TABLE users ALTER COLUMN boat_credits_spent TYPE BIGINT;",
+        # INVENTORY: Unique ID for every unit owned
+        """
+        CREATE TABLE IF NOT EXISTS inventory (
+            id SERIAL PRIMARY KEY,
+            user_id TEXT REFERENCES users(user_id),
+            anilist_id INTEGER,
+            dupe_level INTEGER DEFAULT 0, -- 0 = base unit, 1 = first dupe, etc.
+            obtained_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_locked BOOLEAN DEFAULT FALSE,
+            UNIQUE(user_id, anilist_id) -- Prevents multiple rows for the same character
+        )
+        """,
+        # --- MIGRATION GUARDS ---
+        # Ensure existing databases get the column and constraint
+        "ALTER TABLE inventory ADD COLUMN IF NOT EXISTS dupe_level INTEGER DEFAULT 0;",
+        # Bond system
+        "ALTER TABLE inventory ADD COLUMN IF NOT EXISTS bond_exp INTEGER DEFAULT 0;",
+        "ALTER TABLE inventory ADD COLUMN IF NOT EXISTS bond_level INTEGER DEFAULT 1;",
+        # This adds the unique constraint if it doesn't exist (PostgreSQL 9.1+)
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'unique_user_character') THEN
+                ALTER TABLE inventory ADD CONSTRAINT unique_user_character UNIQUE (user_id, anilist_id);
+            END IF;
+        END $$;
+        """,
+        # TEAMS: Battle squad (5 slots)
+        """
+        CREATE TABLE IF NOT EXISTS teams (
+            user_id TEXT PRIMARY KEY REFERENCES users(user_id),
+            slot_1 INTEGER DEFAULT NULL,
+            slot_2 INTEGER DEFAULT NULL,
+            slot_3 INTEGER DEFAULT NULL,
+            slot_4 INTEGER DEFAULT NULL,
+            slot_5 INTEGER DEFAULT NULL
+        )
+        """,
+        # TEAM PRESETS: Saved loadouts
+        """
+        CREATE TABLE IF NOT EXISTS team_presets (
+            user_id TEXT,
+            preset_name TEXT,
+            slot_1 INTEGER,
+            slot_2 INTEGER,
+            slot_3 INTEGER,
+            slot_4 INTEGER,
+            slot_5 INTEGER,
+            PRIMARY KEY (user_id, preset_name)
+        )
+        """,
+        # EXPEDITIONS: Passive gem earners
+        """
+        CREATE TABLE IF NOT EXISTS expeditions (
+            user_id TEXT PRIMARY KEY REFERENCES users(user_id),
+            slot_ids INTEGER[] DEFAULT '{}',
+            start_time TIMESTAMP,
+            last_claim TIMESTAMP
+        )
+        """,
+        # CACHE: Stores AniList data to save API calls
+        """
+        CREATE TABLE IF NOT EXISTS characters_cache (
+            anilist_id INTEGER PRIMARY KEY,
+            name TEXT,
+            image_url TEXT,
+            rarity TEXT DEFAULT 'R',
+            rank INTEGER DEFAULT 10000,
+            base_power INTEGER DEFAULT 0,
+            true_power INTEGER DEFAULT 0,
+            ability_tags JSONB DEFAULT '[]'::jsonb,
+            squash_resistance FLOAT DEFAULT 0.0,
+            is_overridden BOOLEAN DEFAULT FALSE -- Protects manual edits
+        )
+        """,
+        # DAILY TASKS: Tracks progress for Battle/NPC tasks
+        """
+        CREATE TABLE IF NOT EXISTS daily_tasks (
+            user_id TEXT,
+            task_key TEXT,
+            progress INTEGER DEFAULT 0,
+            is_claimed BOOLEAN DEFAULT FALSE,
+            last_updated DATE DEFAULT CURRENT_DATE,
+            PRIMARY KEY (user_id, task_key)
+        )
+        """,
+        # GLOBAL SETTINGS: Fairness toggles
+        """
+        CREATE TABLE IF NOT EXISTS global_settings (
+            key TEXT PRIMARY KEY,
+            value_bool BOOLEAN DEFAULT TRUE
+        )
+        """,
+    ]),
+    (2, "event_ranking table (formerly created on every Event._get_event_data call)", [
+        """
+        CREATE TABLE IF NOT EXISTS event_ranking (
+            user_id TEXT PRIMARY KEY,
+            score INTEGER DEFAULT 0,
+            tickets INTEGER DEFAULT 3,
+            last_reset TEXT
+        )
+        """,
+    ]),
+    (3, "commit_pull() function", [
+        COMMIT_PULL_FUNCTION,
+    ]),
+    (4, "inventory.effective_power maintained by triggers", [
+        "ALTER TABLE inventory ADD COLUMN IF NOT EXISTS effective_power INTEGER DEFAULT 0;",
+        # The one definition of a unit's power: base * dupe bonus * team level bonus * bond bonus
+        """
+        CREATE OR REPLACE FUNCTION compute_effective_power(
+            p_true_power INTEGER, p_dupe_level INTEGER, p_team_level INTEGER, p_bond_level INTEGER
+        ) RETURNS INTEGER LANGUAGE sql IMMUTABLE AS $$
+            SELECT FLOOR(
+                COALESCE(p_true_power, 0)
+                * (1 + (COALESCE(p_dupe_level, 0) * 0.05))
+                * (1 + (COALESCE(p_team_level, 1) * 0.01))
+                * (1 + (COALESCE(p_bond_level, 1) * 0.005))
+            )::int
+        $$
+        """,
+        # Inventory row gained a unit, a dupe or a bond level
+        """
+        CREATE OR REPLACE FUNCTION inventory_effective_power() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.effective_power := compute_effective_power(
+                (SELECT true_power FROM characters_cache WHERE anilist_id = NEW.anilist_id),
+                NEW.dupe_level,
+                (SELECT team_level FROM users WHERE user_id = NEW.user_id),
+                NEW.bond_level
+            );
+            RETURN NEW;
+        END;
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS trg_inventory_effective_power ON inventory;",
+        """
+        CREATE TRIGGER trg_inventory_effective_power
+        BEFORE INSERT OR UPDATE OF dupe_level, bond_level, anilist_id, user_id ON inventory
+        FOR EACH ROW EXECUTE FUNCTION inventory_effective_power()
+        """,
+        # Base power changed (pull cache refresh, override, catalog recompute): one set-based pass per statement
+        """
+        CREATE OR REPLACE FUNCTION characters_cache_effective_power() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE inventory i
+            SET effective_power = compute_effective_power(n.true_power, i.dupe_level, u.team_level, i.bond_level)
+            FROM new_rows n, users u
+            WHERE i.anilist_id = n.anilist_id
+              AND u.user_id = i.user_id
+              AND i.effective_power IS DISTINCT FROM compute_effective_power(n.true_power, i.dupe_level, u.team_level, i.bond_level);
+            RETURN NULL;
+        END;
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS trg_characters_cache_insert_power ON characters_cache;",
+        "DROP TRIGGER IF EXISTS trg_characters_cache_update_power ON characters_cache;",
+        """
+        CREATE TRIGGER trg_characters_cache_insert_power
+        AFTER INSERT ON characters_cache
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION characters_cache_effective_power()
+        """,
+        """
+        CREATE TRIGGER trg_characters_cache_update_power
+        AFTER UPDATE ON characters_cache
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION characters_cache_effective_power()
+        """,
+        # Team level applies to every unit the user owns
+        """
+        CREATE OR REPLACE FUNCTION users_effective_power() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE inventory i
+            SET effective_power = compute_effective_power(c.true_power, i.dupe_level, NEW.team_level, i.bond_level)
+            FROM characters_cache c
+            WHERE i.user_id = NEW.user_id AND c.anilist_id = i.anilist_id;
+            RETURN NULL;
+        END;
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS trg_users_effective_power ON users;",
+        """
+        CREATE TRIGGER trg_users_effective_power
+        AFTER UPDATE OF team_level ON users
+        FOR EACH ROW WHEN (OLD.team_level IS DISTINCT FROM NEW.team_level)
+        EXECUTE FUNCTION users_effective_power()
+        """,
+        # Backfill, then index for power-sorted inventories and the per-character refresh
+        """
+        UPDATE inventory i
+        SET effective_power = compute_effective_power(c.true_power, i.dupe_level, u.team_level, i.bond_level)
+        FROM characters_cache c, users u
+        WHERE c.anilist_id = i.anilist_id AND u.user_id = i.user_id
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_inventory_user_power ON inventory (user_id, effective_power DESC);",
+        "CREATE INDEX IF NOT EXISTS idx_inventory_anilist ON inventory (anilist_id);",
+    ]),
+    (5, "indexes for hot queries (see scripts/bench_queries.py)", [
+        # Default inventory order and get_inventory_details(sort_by="date")
+        "CREATE INDEX IF NOT EXISTS idx_inventory_user_obtained ON inventory (user_id, obtained_at DESC);",
+        # Scrap/shop/achievement filters on rarity
+        "CREATE INDEX IF NOT EXISTS idx_characters_cache_rarity ON characters_cache (rarity);",
+        # !whohas containment lookups: ability_tags @> '["Skill"]'
+        "CREATE INDEX IF NOT EXISTS idx_characters_cache_tags ON characters_cache USING GIN (ability_tags jsonb_path_ops);",
+        # Event leaderboard (ORDER BY score DESC LIMIT 10)
+        "CREATE INDEX IF NOT EXISTS idx_event_ranking_score ON event_ranking (score DESC);",
+        # get_active_banner: only the few active rows are indexed
+        "CREATE INDEX IF NOT EXISTS idx_banners_active ON banners (end_timestamp) WHERE is_active = TRUE;",
+    ]),
+    (6, "seeded battle records for !replay (see core/battle_records.py)", [
+        # Team snapshots, stored once per distinct line-up
+        """
+        CREATE TABLE IF NOT EXISTS battle_teams (
+            team_hash TEXT PRIMARY KEY,
+            team JSONB NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS battle_records (
+            id BIGSERIAL PRIMARY KEY,
+            kind TEXT NOT NULL,
+            attacker_id TEXT NOT NULL,
+            defender_id TEXT,
+            defender_name TEXT,
+            seed BIGINT NOT NULL,
+            attacker_hash TEXT NOT NULL REFERENCES battle_teams (team_hash),
+            defender_hash TEXT NOT NULL REFERENCES battle_teams (team_hash),
+            outcome TEXT NOT NULL,
+            attacker_total BIGINT NOT NULL,
+            defender_total BIGINT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_battle_records_attacker ON battle_records (attacker_id, id DESC);",
+    ]),
+    (7, "characters_cache update trigger only touches units whose true_power changed", [
+        # commit_pull and batch_cache_characters upsert every pulled unit; most keep their power,
+        # so comparing the transition tables keeps the pull path off the owners scan
+        """
+        CREATE OR REPLACE FUNCTION characters_cache_power_changed() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE inventory i
+            SET effective_power = compute_effective_power(n.true_power, i.dupe_level, u.team_level, i.bond_level)
+            FROM new_rows n JOIN old_rows o ON o.anilist_id = n.anilist_id, users u
+            WHERE o.true_power IS DISTINCT FROM n.true_power
+              AND i.anilist_id = n.anilist_id
+              AND u.user_id = i.user_id
+              AND i.effective_power IS DISTINCT FROM compute_effective_power(n.true_power, i.dupe_level, u.team_level, i.bond_level);
+            RETURN NULL;
+        END;
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS trg_characters_cache_update_power ON characters_cache;",
+        """
+        CREATE TRIGGER trg_characters_cache_update_power
+        AFTER UPDATE ON characters_cache
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION characters_cache_power_changed()
+        """,
+    ]),
+    (8, "add_to_inventory(): one dupe-cap rule for commit_pull and batch_add_to_inventory", [
+        ADD_TO_INVENTORY_FUNCTION,
+        COMMIT_PULL_FUNCTION_V8,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+async def get_schema_version(conn):
+    try:
+        return await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    except asyncpg.UndefinedTableError:
+        return 0
+
+async def run_migrations(conn):
+    """Applies pending migrations. Returns the list of versions applied (empty when current)."""
+    # Fast path: one read, no DDL, no locks
+    if await get_schema_version(conn) >= LATEST_VERSION:
+        return []
+
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Another process may have migrated while we waited for the lock
+        current = await get_schema_version(conn)
+        applied = []
+        for version, description, statements in MIGRATIONS:
+            if version <= current: continue
+            async with conn.transaction():
+                for sql in statements:
+                    await conn.execute(sql)
+                await conn.execute("INSERT INTO schema_version (version, description) VALUES ($1, $2)", version, description)
+            print(f"🧱 [Migrations] Applied v{version}: {description}")
+            applied.append(version)
+        return applied
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
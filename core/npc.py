@@ -0,0 +1,76 @@
+# core/npc.py
+import random
+import numpy as np
+from core.game_math import calculate_effective_power, calculate_effective_power_array
+
+# Slot rules per difficulty: (rarity, min_rank, max_rank), one entry per NPC unit
+NPC_RULES = {
+    "easy":      [("R", 1501, 10000)] * 5,
+    "normal":    [("R", 1501, 10000)] * 3 + [("SR", 251, 1500)] * 2,
+    "hard":      [("SR", 251, 1500)] * 5,
+    "expert":    [("SSR", 1, 250)] * 2 + [("SR", 251, 1500)] * 2 + [("R", 1501, 10000)] * 1,
+    "nightmare": [("SSR", 1, 250)] * 3 + [("SR", 251, 1500)] * 2,
+    "hell":      [("SSR", 1, 50)] * 2 + [("SSR", 1, 250)] * 3
+}
+NPC_DIFFICULTIES = list(NPC_RULES)
+
+def npc_favs(rank):
+    return int(600000 / (rank**0.5))
+
+def generate_npc_team(difficulty, rng=None):
+    """Generates a mock NPC team based on difficulty. Unknown difficulties play as normal."""
+    rng = rng or random
+    team = []
+    setup = NPC_RULES.get(difficulty.lower(), NPC_RULES["normal"])
+
+    for rarity, min_rank, max_rank in setup:
+        rank = rng.randint(min_rank, max_rank)
+        power = calculate_effective_power(npc_favs(rank), rarity, rank)
+        team.append({
+            'name': f"NPC {rarity}",
+            'true_power': power,
+            'ability_tags': [],
+            'rarity': rarity,
+            'image_url': None
+        })
+    return team
+
+def sample_npc_powers(difficulty, n, rng: np.random.Generator):
+    """n independent NPC line-ups at once: an (n, slots) array of true_power."""
+    setup = NPC_RULES.get(difficulty.lower(), NPC_RULES["normal"])
+    columns = []
+    for rarity, min_rank, max_rank in setup:
+        ranks = rng.integers(min_rank, max_rank + 1, n)
+        favs = (600000 / np.sqrt(ranks)).astype(np.int64)
+        columns.append(calculate_effective_power_array(favs, np.full(n, rarity)))
+    return np.stack(columns, axis=1)
+
+# Bounty board tiers: total enemy team power range per tier. Any slot can instead
+# roll the rare UR tier at a fixed total power.
+BOUNTY_TIERS = {
+    "R": (30000, 35000),
+    "SR": (50000, 55000),
+    "SSR": (75000, 80000)
+}
+BOUNTY_UR_CHANCE = 0.01
+BOUNTY_UR_POWER = 90000
+
+def roll_bounty(rng=None):
+    """Rolls one bounty slot. Returns (tier, total_power)."""
+    rng = rng or random
+    base_tier = rng.choice(list(BOUNTY_TIERS.keys()))
+    if rng.random() < BOUNTY_UR_CHANCE:
+        return "UR", BOUNTY_UR_POWER
+    return base_tier, rng.randint(*BOUNTY_TIERS[base_tier])
+
+def generate_bounty_team(tier, total_power):
+    """Five identical enemies splitting the tier's total power."""
+    member_power = total_power // 5
+    return [{
+        'name': f"{tier} Enemy",
+        'true_power': member_power,
+        'rarity': tier,
+        'ability_tags': [],
+        'anilist_id': 0,
+        'image_url': None
+    } for _ in range(5)]
@@ -0,0 +1,116 @@
+# core/rank_index.py
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+# Compiled form of data/rankings.json, written by scripts/update_ranks.py (or on load when
+# missing or older than the JSON). It is a build artifact and is not committed.
+# Layout: 8-byte header (magic, count) then two int32 arrays of `count` entries:
+# AniList IDs sorted ascending, and the rank for each ID at the same position.
+# The file is mmapped read-only, so shard processes share the same pages.
+RANK_INDEX_PATH = "data/rankings.idx"
+RANKINGS_JSON_PATH = "data/rankings.json"
+MAGIC = b"RNK1"
+HEADER = struct.Struct("<4sI")
+
+_index = None
+
+def compile_rank_index(rank_map, path=RANK_INDEX_PATH):
+    """Writes {anilist_id: rank} as a sorted binary index. Replaces the file atomically."""
+    pairs = sorted((int(cid), int(rank)) for cid, rank in rank_map.items())
+    ids = array("i", (cid for cid, _ in pairs))
+    ranks = array("i", (rank for _, rank in pairs))
+    if ids.itemsize != 4: raise RuntimeError("int32 array type unavailable on this platform")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(pairs)))
+        if sys.byteorder != "little":
+            ids.byteswap(); ranks.byteswap()
+        ids.tofile(f)
+        ranks.tofile(f)
+    # Readers that already mmapped the old file keep their (old) pages
+    os.replace(tmp_path, path)
+    return len(pairs)
+
+class RankIndex:
+    """Read-only AniList ID -> rank lookup over a compiled index file."""
+    def __init__(self, ids, ranks, mm=None):
+        self._ids = ids
+        self._ranks = ranks
+        self._mm = mm
+
+    @classmethod
+    def empty(cls):
+        return cls(array("i"), array("i"))
+
+    @classmethod
+    def open(cls, path=RANK_INDEX_PATH):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a rank index")
+        if sys.byteorder != "little":
+            # Rare on real hosts; fall back to an in-memory, byte-swapped copy
+            ids = array("i", mm[HEADER.size:HEADER.size + 4 * count]); ids.byteswap()
+            ranks = array("i", mm[HEADER.size + 4 * count:HEADER.size + 8 * count]); ranks.byteswap()
+            return cls(ids, ranks)
+        view = memoryview(mm)[HEADER.size:HEADER.size + 8 * count].cast("i")
+        return cls(view[:count], view[count:], mm)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get(self, anilist_id, default=None):
+        i = bisect_left(self._ids, anilist_id)
+        if i < len(self._ids) and self._ids[i] == anilist_id:
+            return self._ranks[i]
+        return default
+
+def index_is_stale(path=RANK_INDEX_PATH, json_path=RANKINGS_JSON_PATH):
+    """True when the index is missing or older than the rankings.json it is built from."""
+    if not os.path.exists(json_path): return False
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(json_path)
+
+def load_rank_index():
+    """Opens the compiled index, (re)compiling it from rankings.json first if it is missing or stale."""
+    if index_is_stale():
+        with open(RANKINGS_JSON_PATH, "r") as f:
+            compile_rank_index(json.load(f))
+        print(f"🛠️ [Ranks] Compiled {RANK_INDEX_PATH} from {RANKINGS_JSON_PATH}")
+
+    if not os.path.exists(RANK_INDEX_PATH):
+        print(f"⚠️ [Ranks] '{RANK_INDEX_PATH}' not found. Please run scripts/update_ranks.py")
+        return RankIndex.empty()
+
+    index = RankIndex.open()
+    print(f"✅ [Ranks] Loaded {len(index)} ranks from {RANK_INDEX_PATH}")
+    return index
+
+def get_rank_index():
+    global _index
+    if _index is None:
+        _index = load_rank_index()
+    return _index
+
+def reload_rank_index():
+    """Swaps in a freshly opened index. Lookups already in progress finish on the old one."""
+    global _index
+    _index = load_rank_index()
+    return _index
+
+if __name__ == "__main__":
+    # Rebuild the index from rankings.json and check every entry round-trips
+    with open(RANKINGS_JSON_PATH, "r") as f:
+        rank_map = json.load(f)
+    count = compile_rank_index(rank_map)
+    index = RankIndex.open()
+    mismatches = [cid for cid, rank in rank_map.items() if index.get(int(cid)) != rank]
+    print(f"Compiled {count} entries -> {RANK_INDEX_PATH} ({os.path.getsize(RANK_INDEX_PATH)} bytes)")
+    print(f"Unknown ID lookup: {index.get(-1, 10001)}")
+    print("OK" if not mismatches else f"MISMATCH on {len(mismatches)} ids, e.g. {mismatches[:5]}")
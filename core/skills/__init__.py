@@ -1,3 +1,4 @@
 # core/skills/__init__.py
 from .registry import SKILL_DATA, get_skill_info, list_all_skills, create_skill_instance
-from .engine import BattleContext
\ No newline at end of file
+from .engine import BattleContext
+from .battle import BattleEngine, BattleResult
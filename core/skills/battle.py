@@ -0,0 +1,106 @@
+# core/skills/battle.py
+
+import heapq
+import random
+from .engine import BattleContext
+from .plan import compile_team
+
+SIDES = ("attacker", "defender")
+
+class BattleResult:
+    """Outcome of one battle: final per-slot powers, team totals and the context (logs, flags)."""
+    def __init__(self, outcome, final_powers, ctx: BattleContext):
+        self.outcome = outcome            # "WIN" / "LOSS" / "DRAW", from the attacker's side
+        self.final_powers = final_powers  # {'attacker': [p1..p5], 'defender': [...]}
+        self.totals = {side: sum(final_powers[side]) for side in SIDES}
+        self.ctx = ctx
+
+    @property
+    def initial_win(self):
+        return self.totals["attacker"] > self.totals["defender"]
+
+    def side_logs(self, side):
+        """Slot logs in slot order, then the side's team-wide logs."""
+        return [l for slot in self.ctx.logs[side].values() for l in slot] + self.ctx.misc_logs[side]
+
+    def all_logs(self):
+        """Team-wide logs of both sides first, then every slot log."""
+        logs = self.ctx.misc_logs["attacker"] + self.ctx.misc_logs["defender"]
+        for side in SIDES:
+            for slot_idx in sorted(self.ctx.logs[side]):
+                logs.extend(self.ctx.logs[side][slot_idx])
+        return logs
+
+class BattleEngine:
+    """
+    The one battle pipeline, shared by !battle and bounty hunts. Pure and synchronous:
+    the only inputs are the two teams and the RNG, the only output is a BattleResult.
+    Every skill and the variance rolls draw from their own substream of the RNG, so the
+    same seed without one skill leaves every other roll unchanged.
+    """
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def run(self, attacker_team, defender_team) -> BattleResult:
+        plans = {"attacker": compile_team(attacker_team), "defender": compile_team(defender_team)}
+        ctx = BattleContext(attacker_team, defender_team, self.rng, plans)
+
+        # --- 1. SKILLS (highest priority first: Zodiacs / Onyx Moon act before the rest) ---
+        # Each plan is already in priority order; the merge keeps attacker before defender on ties
+        all_skills = list(heapq.merge(
+            plans["attacker"].instantiate(attacker_team, "attacker"),
+            plans["defender"].instantiate(defender_team, "defender"),
+            key=lambda s: -s.priority
+        ))
+        for skill in all_skills:
+            skill.rng = ctx.stream(f"skill:{skill.side}:{skill.idx}:{skill.name}")
+
+        # --- 2. START OF BATTLE (Zodiacs, Disables, Kamikaze, Team Debuffs) ---
+        for skill in all_skills:
+            skill.on_battle_start(ctx)
+
+        # --- 3. CALCULATION (Base * own skill mods * context mods + flat, then variance) ---
+        final_powers = {"attacker": [], "defender": []}
+        variance_override = ctx.flags.get("variance_override", {})
+        variance_rng = ctx.stream("variance", many_draws=True)
+        for side in SIDES:
+            for i, char in enumerate(ctx.get_team(side)):
+                if not char:
+                    final_powers[side].append(0)
+                    continue
+
+                p = char['true_power']
+                for s in all_skills:
+                    if s.side == side and s.idx == i:
+                        p *= s.get_power_modifier(ctx, p)
+
+                p *= ctx.multipliers[side][i]
+                p += ctx.flat_bonuses[side][i]
+
+                # Dragon Zodiac locks the variance roll (still drawn, so later slots keep theirs)
+                roll = variance_rng.uniform(0.9, 1.1)
+                variance = variance_override.get(f"{side}_{i}") or roll
+                final_powers[side].append(max(0, int(p * variance)))
+
+        # Post-Calculation Logic (Monkey swap, Dog copy, Sheep mirror)
+        for skill in all_skills:
+            skill.on_post_power_calculation(ctx, final_powers)
+
+        # --- 4. OUTCOME ---
+        initial_win = sum(final_powers["attacker"]) > sum(final_powers["defender"])
+        outcome = "WIN" if initial_win else "LOSS"
+
+        if not initial_win and ctx.flags.get("snake_trap"):
+            outcome = "DRAW"
+            ctx.add_log("attacker", None, "🐍 The **Snake Zodiac** trap triggered! Defeat -> **DRAW**.")
+
+        # Revive (attacker only, first one to fire wins)
+        if outcome == "LOSS":
+            for skill in all_skills:
+                if skill.side == "attacker":
+                    new_outcome = skill.on_battle_end(ctx, outcome)
+                    if new_outcome:
+                        outcome = new_outcome
+                        break
+
+        return BattleResult(outcome, final_powers, ctx)
@@ -1,13 +1,67 @@
+import functools
+import hashlib
+import random
+
+MASK64 = (1 << 64) - 1
+
+@functools.lru_cache(maxsize=4096)
+def stream_key(name):
+    """64-bit key for a substream name (a skill slot or "variance"), hashed once per name."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big")
+
+class StreamRandom(random.Random):
+    """
+    random.Random on splitmix64: seeding is an int store instead of filling a Mersenne Twister,
+    so a battle can afford a fresh stream per skill. Only random() and getrandbits() are
+    overridden; choice, uniform and the rest come from random.Random.
+    """
+    def __init__(self, seed):
+        self._state = seed & MASK64
+
+    def seed(self, a=None, version=2):
+        self._state = (a or 0) & MASK64
+
+    def _next(self):
+        self._state = z = (self._state + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        return z ^ (z >> 31)
+
+    def random(self):
+        return (self._next() >> 11) * (1.0 / (1 << 53))
+
+    def getrandbits(self, k):
+        bits, n = 0, 0
+        while n < k:
+            bits = (bits << 64) | self._next()
+            n += 64
+        return bits >> (n - k)
+
+    def getstate(self):
+        return self._state
+
+    def setstate(self, state):
+        self._state = state
+
 class BattleContext:
     """
     Holds the state of the battle (teams, logs, suppressed skills, modifiers).
     Passed to every skill so they can read/write the battle state.
+    All randomness goes through named substreams of ctx.rng (see stream()).
     """
-    def __init__(self, attacker_team, defender_team):
+    def __init__(self, attacker_team, defender_team, rng=None, plans=None):
+        self.rng = rng or random.Random()
+        # Substreams are keyed off one draw, so removing a skill never shifts another's rolls
+        self.stream_seed = self.rng.getrandbits(64)
         self.teams = {
             "attacker": attacker_team,
             "defender": defender_team
         }
+        if plans is None:
+            from .plan import compile_team
+            plans = {side: compile_team(team) for side, team in self.teams.items()}
+        # Compiled TeamPlans: member ID sets and silenceable skills per side
+        self.plans = plans
         # Logs organized by [Side][SlotIndex]
         # SlotIndex None implies a team-wide/misc log
         self.logs = {
@@ -34,6 +88,15 @@ class BattleContext:
         # Global Flags (e.g. for Snake Zodiac trap)
         self.flags = {}
 
+    def stream(self, name, many_draws=False):
+        """
+        An independent, reproducible RNG for one consumer of this battle (a skill, the variance rolls).
+        Skills draw a few times and get a StreamRandom; many_draws pays for a Mersenne Twister
+        seed once to get C-speed draws after it.
+        """
+        seed = self.stream_seed ^ stream_key(name)
+        return random.Random(seed) if many_draws else StreamRandom(seed)
+
     def add_log(self, side, idx, message):
         """Adds a log message to the battle record."""
         if idx is not None and 0 <= idx < 5:
@@ -52,6 +115,14 @@ class BattleContext:
     def get_team(self, side):
         return self.teams[side]
 
+    def has_member(self, side, anilist_id):
+        """True if a character is on that side's team (set lookup, no team scan)."""
+        return anilist_id in self.plans[side].member_ids
+
+    def silence_targets(self, side):
+        """(slot, tag) pairs on that side that Pig / Onyx Moon may disable."""
+        return self.plans[side].silence_targets
+
     def get_enemy_side(self, my_side):
         return "defender" if my_side == "attacker" else "attacker"
 
@@ -65,15 +136,16 @@ class BattleSkill:
         self.val = config_value # The value from SKILL_DATA (e.g. 0.25)
         self.enemy_side = "defender" if side == "attacker" else "attacker"
         self.priority = getattr(self.__class__, 'priority', 0)
+        self.rng = random         # BattleEngine.run swaps in the skill's own battle substream
 
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
         """
         Phase 1: Triggered before any calculations.
         Used for: Disabling skills, setting initial debuffs (Onyx Moon), Zodiac rolls, Kamikaze.
         """
         pass
 
-    async def get_power_modifier(self, ctx: BattleContext, current_base_power):
+    def get_power_modifier(self, ctx: BattleContext, current_base_power):
         """
         Phase 2: Returns a multiplier for THIS unit.
         Used for: Simple buffs (Surge), Conditional buffs (Amber Sun).
@@ -81,7 +153,7 @@ class BattleSkill:
         """
         return 1.0
 
-    async def on_post_power_calculation(self, ctx: BattleContext, final_powers):
+    def on_post_power_calculation(self, ctx: BattleContext, final_powers):
         """
         Phase 3: Triggered after base power * multipliers is done, but before Team aggregation.
         Used for: Swapping power (Monkey), Copying power (Dog), Setting fixed power (Sheep).
@@ -89,7 +161,7 @@ class BattleSkill:
         """
         pass
 
-    async def on_battle_end(self, ctx: BattleContext, result):
+    def on_battle_end(self, ctx: BattleContext, result):
         """
         Phase 4: Triggered after win/loss determination.
         Used for: Revive, Snake Zodiac (forced Draw).
@@ -1,14 +1,12 @@
 # core/skills/implementations.py
 
-import random
-import json
 from .engine import BattleSkill, BattleContext
 
 # --- BUFFS ---
 
 class SimpleBuffSkill(BattleSkill):
     """Handles standard percentage buffs like Surge and Berserk."""
-    async def get_power_modifier(self, ctx: BattleContext, current_power):
+    def get_power_modifier(self, ctx: BattleContext, current_power):
         if ctx.is_suppressed(self.side, self.name): return 1.0
         
         if self.name == "Surge":
@@ -16,34 +14,34 @@ class SimpleBuffSkill(BattleSkill):
             return 1.0 + self.val
             
         if self.name == "Berserk":
-            if random.random() < 0.25:
+            if self.rng.random() < 0.25:
                 ctx.add_log(self.side, self.idx, f"💢 **{self.owner['name']}** went **Berserk** (+{int(self.val*100)}%)!")
                 return 1.0 + self.val
 
         if self.name == "Golden Egg":
-             if random.random() < 0.01:
+             if self.rng.random() < 0.01:
                 ctx.add_log(self.side, self.idx, f"🥚 **{self.owner['name']}** hatched a **Golden Egg** ({self.val}x Power)!")
                 return self.val
         
         return 1.0
 
 class Lucky7Skill(BattleSkill):
-    async def get_power_modifier(self, ctx: BattleContext, current_power):
+    def get_power_modifier(self, ctx: BattleContext, current_power):
         if ctx.is_suppressed(self.side, self.name): return 1.0
         
-        if random.random() < 0.07:
+        if self.rng.random() < 0.07:
             ctx.add_log(self.side, self.idx, f"✨ **{self.owner['name']}** hit the Lucky 7 Jackpot (+777% Power)!")
             return 8.77
-        elif random.random() < 0.77:
+        elif self.rng.random() < 0.77:
             ctx.add_log(self.side, self.idx, f"🍀 **{self.owner['name']}** gained a Lucky 7 flat bonus (+7,777)!")
             ctx.flat_bonuses[self.side][self.idx] += 7777
         return 1.0
 
 class JokerSkill(BattleSkill):
-    async def get_power_modifier(self, ctx: BattleContext, current_power):
+    def get_power_modifier(self, ctx: BattleContext, current_power):
         if ctx.is_suppressed(self.side, self.name): return 1.0
         
-        if random.random() < 0.5:
+        if self.rng.random() < 0.5:
             ctx.add_log(self.side, self.idx, f"🃏 **{self.owner['name']}**'s Joker was a BUFF (+{int(self.val*100)}%)!")
             return 1.0 + self.val
         else:
@@ -51,23 +49,21 @@ class JokerSkill(BattleSkill):
             return 1.0 - self.val
 
 class AmberSunSkill(BattleSkill):
-    async def get_power_modifier(self, ctx: BattleContext, current_power):
+    def get_power_modifier(self, ctx: BattleContext, current_power):
         if ctx.is_suppressed(self.side, self.name): return 1.0
         
         # Value is [129842, 0.15] (Agott ID, percent)
         agott_id = self.val[0]
         bonus = self.val[1]
         
-        my_team = ctx.get_team(self.side)
-        
         # Logic 1: If Agott is present, this unit gains power
-        if any(c.get('anilist_id') == agott_id for c in my_team if c):
+        if ctx.has_member(self.side, agott_id):
             ctx.add_log(self.side, self.idx, f"☀️ **{self.owner['name']}** resonated with Agott (+{int(bonus*100)}%)!")
             return 1.0 + bonus
             
         return 1.0
 
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
        
         if ctx.is_suppressed(self.side, self.name): return
         
@@ -84,36 +80,33 @@ class AmberSunSkill(BattleSkill):
                     ctx.add_log(self.side, i, f"☀️ **{char['name']}** was empowered by The Amber Sun (+{int(bonus*100)}%)!")
 
 class EternitySkill(BattleSkill):
-    async def get_power_modifier(self, ctx: BattleContext, current_power):
+    def get_power_modifier(self, ctx: BattleContext, current_power):
         if ctx.is_suppressed(self.side, self.name): return 1.0
         
         himmel_id = self.val[0]
         bonus = self.val[1]
-        my_team = ctx.get_team(self.side)
         
-        if any(c.get('anilist_id') == himmel_id for c in my_team if c):
+        if ctx.has_member(self.side, himmel_id):
             ctx.add_log(self.side, self.idx, f"🌌 **Duo Skill - Eternity**: {self.owner['name']} found strength in memory of Himmel (+{int(bonus*100)}%)!")
             return 1.0 + bonus
         return 1.0
 
 class FelineFealtySkill(BattleSkill):
-    async def get_power_modifier(self, ctx: BattleContext, current_power):
+    def get_power_modifier(self, ctx: BattleContext, current_power):
         if ctx.is_suppressed(self.side, self.name): return 1.0
         
         # Value is [207, 0.10, 0.025] (Tohru ID, Buff, Debuff)
         tohru_id = self.val[0]
         buff = self.val[1]
         
-        my_team = ctx.get_team(self.side)
-        
         # Effect 1 (Self): If Tohru is present, this unit gains power
-        if any(c.get('anilist_id') == tohru_id for c in my_team if c):
+        if ctx.has_member(self.side, tohru_id):
             ctx.add_log(self.side, self.idx, f"🍙 **{self.owner['name']}** is devoted to Tohru (+{int(buff*100)}%)!")
             return 1.0 + buff
             
         return 1.0
 
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
         if ctx.is_suppressed(self.side, self.name): return
         
         tohru_id = self.val[0]
@@ -123,7 +116,7 @@ class FelineFealtySkill(BattleSkill):
         my_team = ctx.get_team(self.side)
         
         # Check if Tohru is present
-        has_tohru = any(c.get('anilist_id') == tohru_id for c in my_team if c)
+        has_tohru = ctx.has_member(self.side, tohru_id)
         
         if has_tohru:
             # Effect 1 (Partner): Find Tohru and buff her (if she isn't the skill owner)
@@ -142,21 +135,19 @@ class FelineFealtySkill(BattleSkill):
 
 class EntwinedSoulsSkill(BattleSkill):
     priority = 10
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
         if ctx.is_suppressed(self.side, self.name): return
         
         kyo_id = self.val[0]
         effectiveness = self.val[1] # 1.2 (+20% effectiveness)
         
-        my_team = ctx.get_team(self.side)
-        
         # Condition: Kyo Sohma must be present
-        if not any(c.get('anilist_id') == kyo_id for c in my_team if c):
+        if not ctx.has_member(self.side, kyo_id):
             return
 
         # Restricted Effect Pool
         pool = ["Ox", "Tiger", "Rabbit", "Rooster", "Pig", "Horse"]
-        chosen = random.choice(pool)
+        chosen = self.rng.choice(pool)
         
         prefix = f"📿 **{self.owner['name']}**'s Soul Entwined with Kyo ({chosen}): "
         
@@ -168,7 +159,7 @@ class EntwinedSoulsSkill(BattleSkill):
             enemy_team = ctx.get_team(self.enemy_side)
             valid = [i for i, c in enumerate(enemy_team) if c]
             if valid:
-                t = random.choice(valid)
+                t = self.rng.choice(valid)
                 ctx.multipliers[self.enemy_side][t] *= (1 - val)
                 ctx.add_log(self.side, self.idx, prefix + f"Crushed **{enemy_team[t]['name']}** (-{int(val*100)}% Power)!")
             else:
@@ -199,17 +190,10 @@ class EntwinedSoulsSkill(BattleSkill):
 
         elif chosen == "Pig":
             # Logic same as base Zodiac, just triggered via this skill
-            enemy_team = ctx.get_team(self.enemy_side)
-            valid_targets = []
-            for i, c in enumerate(enemy_team):
-                if not c: continue
-                tags = c.get('ability_tags', [])
-                if isinstance(tags, str): tags = json.loads(tags)
-                for tag in tags:
-                    if tag not in ["Queen of the Zodiacs", "The Onyx Moon", "Entwined Souls"]: valid_targets.append(tag)
+            valid_targets = [tag for _, tag in ctx.silence_targets(self.enemy_side)]
             
             if valid_targets:
-                target_skill = random.choice(valid_targets)
+                target_skill = self.rng.choice(valid_targets)
                 ctx.suppress_skill(self.enemy_side, target_skill)
                 ctx.add_log(self.side, self.idx, prefix + f"Boar Spirit muddied the waters, disabling **{target_skill}**!")
             else:
@@ -224,7 +208,7 @@ class EntwinedSoulsSkill(BattleSkill):
             my_team = ctx.get_team(self.side)
             others = [i for i, c in enumerate(my_team) if c and i != self.idx]
             if others:
-                t = random.choice(others)
+                t = self.rng.choice(others)
                 ctx.multipliers[self.side][t] *= (1 + val_ally_buff)
                 ctx.add_log(self.side, self.idx, prefix + f"Horse Spirit sacrificed strength (-{int(val_self_debuff*100)}%) to empower **{my_team[t]['name']}** (+{int(val_ally_buff*100)}%)!")
             else:
@@ -233,30 +217,21 @@ class EntwinedSoulsSkill(BattleSkill):
 
 class OnyxMoonSkill(BattleSkill):
     priority = 10
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
         # if ctx.is_suppressed(self.side, self.name): return
 
-        enemy_team = ctx.get_team(self.enemy_side)
-        valid_targets = []
-        for i, char in enumerate(enemy_team):
-            if not char: continue
-            tags = char.get('ability_tags', [])
-            if isinstance(tags, str): tags = json.loads(tags)
-            for tag in tags:
-                if tag not in ["Queen of the Zodiacs", "The Onyx Moon", "Entwined Souls"]:
-                    valid_targets.append((i, tag))
+        valid_targets = ctx.silence_targets(self.enemy_side)
         
         if not valid_targets:
             ctx.add_log(self.side, self.idx, f"🌑 **{self.owner['name']}** cast **The Onyx Moon**, but no skills to silence.")
             return
 
-        target_idx, target_skill = random.choice(valid_targets)
+        target_idx, target_skill = self.rng.choice(valid_targets)
         ctx.suppress_skill(self.enemy_side, target_skill)
 
         # Check for Coco Synergy (ID 129840)
         coco_id = self.val[0]
-        my_team = ctx.get_team(self.side)
-        has_coco = any(c.get('anilist_id') == coco_id for c in my_team if c)
+        has_coco = ctx.has_member(self.side, coco_id)
 
         if has_coco:
             # Eclipse: Apply Debuff (-25%)
@@ -266,7 +241,7 @@ class OnyxMoonSkill(BattleSkill):
             ctx.add_log(self.side, self.idx, f"🌑 **{self.owner['name']}** cast **Umbra**! Silenced **{target_skill}**.")
 
 class KamikazeSkill(BattleSkill):
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
         if ctx.is_suppressed(self.side, self.name): return
         
         enemy_team = ctx.get_team(self.enemy_side)
@@ -274,12 +249,12 @@ class KamikazeSkill(BattleSkill):
         valid_targets = [i for i, c in enumerate(enemy_team) if c and ctx.multipliers[self.enemy_side][i] > 0]
         
         if valid_targets:
-            target_idx = random.choice(valid_targets)
+            target_idx = self.rng.choice(valid_targets)
             ctx.multipliers[self.enemy_side][target_idx] = 0.0 # Eliminated
             ctx.add_log(self.side, self.idx, f"💥 **Kamikaze** eliminated **{enemy_team[target_idx]['name']}**!")
 
 class GuardSkill(BattleSkill):
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
         # 1. Check if skill is suppressed (e.g. by Onyx Moon)
         if ctx.is_suppressed(self.side, self.name): 
             return
@@ -308,14 +283,14 @@ class GuardSkill(BattleSkill):
         ctx.add_log(self.side, self.idx, f"🛡️ **{self.owner['name']}** activated **Guard** (-{int(self.val * 100)}% to Enemy Team)!")
 
 class EphemeralitySkill(BattleSkill):
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
         if ctx.is_suppressed(self.side, self.name): return
         
         frieren_id = self.val[0]
         bonus = self.val[1]
         my_team = ctx.get_team(self.side)
         
-        if any(c.get('anilist_id') == frieren_id for c in my_team if c):
+        if ctx.has_member(self.side, frieren_id):
              for i in range(len(my_team)):
                 ctx.multipliers[self.side][i] *= (1.0 + bonus)
              ctx.add_log(self.side, self.idx, f"🌿 **Duo Skill - Ephemerality**: Frieren's presence boosted the party!")
@@ -324,11 +299,11 @@ class EphemeralitySkill(BattleSkill):
 
 class ZodiacSkill(BattleSkill):
     priority = 10
-    async def on_battle_start(self, ctx: BattleContext):
+    def on_battle_start(self, ctx: BattleContext):
         if ctx.is_suppressed(self.side, self.name): return
 
         zodiacs = ["Rat", "Ox", "Tiger", "Rabbit", "Dragon", "Snake", "Horse", "Sheep", "Monkey", "Rooster", "Dog", "Pig"]
-        chosen = random.choice(zodiacs)
+        chosen = self.rng.choice(zodiacs)
         vals = self.val # The list of values from SKILL_DATA
         
         prefix = f"👑 **{self.owner['name']}** invoked the **{chosen}** Zodiac: "
@@ -341,7 +316,7 @@ class ZodiacSkill(BattleSkill):
             enemy_team = ctx.get_team(self.enemy_side)
             valid = [i for i, c in enumerate(enemy_team) if c]
             if valid:
-                t = random.choice(valid)
+                t = self.rng.choice(valid)
                 ctx.multipliers[self.enemy_side][t] *= (1 - vals[1])
                 ctx.add_log(self.side, self.idx, prefix + f"Crushed **{enemy_team[t]['name']}** (-{int(vals[1]*100)}% Power)!")
             else:
@@ -373,7 +348,7 @@ class ZodiacSkill(BattleSkill):
             my_team = ctx.get_team(self.side)
             others = [i for i, c in enumerate(my_team) if c and i != self.idx]
             if others:
-                t = random.choice(others)
+                t = self.rng.choice(others)
                 ctx.multipliers[self.side][t] *= (1 + vals[6][1])
                 ctx.add_log(self.side, self.idx, prefix + f"Sacrificed strength to empower **{my_team[t]['name']}**!")
             else:
@@ -388,17 +363,10 @@ class ZodiacSkill(BattleSkill):
             ctx.add_log(self.side, self.idx, prefix + "The dawn awakens! Self and Team power increased!")
 
         elif chosen == "Pig":
-            enemy_team = ctx.get_team(self.enemy_side)
-            valid_targets = []
-            for i, c in enumerate(enemy_team):
-                if not c: continue
-                tags = c.get('ability_tags', [])
-                if isinstance(tags, str): tags = json.loads(tags)
-                for tag in tags:
-                    if tag not in ["Queen of the Zodiacs", "The Onyx Moon", "Entwined Souls"]: valid_targets.append(tag)
+            valid_targets = [tag for _, tag in ctx.silence_targets(self.enemy_side)]
             
             if valid_targets:
-                target_skill = random.choice(valid_targets)
+                target_skill = self.rng.choice(valid_targets)
                 ctx.suppress_skill(self.enemy_side, target_skill)
                 ctx.add_log(self.side, self.idx, prefix + f"Muddied the waters, disabling **{target_skill}**!")
             else:
@@ -421,7 +389,7 @@ class ZodiacSkill(BattleSkill):
             elif chosen == "Dog":
                 ctx.add_log(self.side, self.idx, prefix + "Loyally copied the power of the strongest ally!")
 
-    async def on_post_power_calculation(self, ctx: BattleContext, final_powers):
+    def on_post_power_calculation(self, ctx: BattleContext, final_powers):
         # Handle Sheep, Monkey, Dog
         if "zodiac_post_effects" not in ctx.flags: return
         
@@ -453,7 +421,7 @@ class ZodiacSkill(BattleSkill):
                 opp_powers = final_powers[self.enemy_side]
                 valid_opp_indices = [i for i, p in enumerate(opp_powers) if p > 0]
                 if valid_opp_indices:
-                    target = random.choice(valid_opp_indices)
+                    target = self.rng.choice(valid_opp_indices)
                     # Swap
                     my_val = final_powers[self.side][idx]
                     opp_val = final_powers[self.enemy_side][target]
@@ -466,9 +434,9 @@ class ZodiacSkill(BattleSkill):
 # --- OUTCOME MODIFIERS ---
 
 class ReviveSkill(BattleSkill):
-    async def on_battle_end(self, ctx, result):
+    def on_battle_end(self, ctx, result):
         if result == "LOSS":
-             if random.random() < self.val:
+             if self.rng.random() < self.val:
                  ctx.add_log(self.side, self.idx, f"💖 **Revive** triggered! The defeat was turned into a **DRAW**.")
                  return "DRAW"
         return None
\ No newline at end of file
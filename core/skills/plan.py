@@ -0,0 +1,65 @@
+# core/skills/plan.py
+
+import functools
+import json
+from .registry import resolve_skill
+
+# Skills that Pig / Onyx Moon can never silence
+UNSILENCEABLE = frozenset(["Queen of the Zodiacs", "The Onyx Moon", "Entwined Souls"])
+PLAN_CACHE_SIZE = 2048
+
+class TeamPlan:
+    """
+    Everything a battle needs to know about a team's skills, resolved once:
+    the skill classes in priority order, the member AniList IDs and the
+    (slot, tag) pairs an enemy Pig / Onyx Moon can silence.
+    """
+    __slots__ = ("entries", "member_ids", "silence_targets")
+
+    def __init__(self, entries, member_ids, silence_targets):
+        self.entries = entries                  # ((klass, name, slot, value), ...) highest priority first
+        self.member_ids = member_ids            # frozenset of anilist_id
+        self.silence_targets = silence_targets  # ((slot, tag), ...) in slot order
+
+    def instantiate(self, team, side):
+        """Fresh skill instances for one battle (they hold per-battle state like side and owner)."""
+        return [klass(name, team[slot], slot, side, value) for klass, name, slot, value in self.entries]
+
+def team_key(team):
+    """
+    Cache key: each slot's anilist_id and its raw ability_tags. Swapping a unit or editing
+    a character's tags changes the key, so stale plans are never hit and age out of the LRU.
+    """
+    key = []
+    for char in team:
+        if not char:
+            key.append(None)
+            continue
+        tags = char.get('ability_tags') or ()
+        key.append((char.get('anilist_id'), tags if isinstance(tags, str) else tuple(tags)))
+    return tuple(key)
+
+@functools.lru_cache(maxsize=PLAN_CACHE_SIZE)
+def _compile(key):
+    entries, members, silence_targets = [], set(), []
+    for slot, entry in enumerate(key):
+        if entry is None: continue
+        anilist_id, tags = entry
+        members.add(anilist_id)
+        if isinstance(tags, str): tags = json.loads(tags)
+        for tag in tags:
+            if tag not in UNSILENCEABLE:
+                silence_targets.append((slot, tag))
+            resolved = resolve_skill(tag)
+            if resolved:
+                klass, value = resolved
+                entries.append((klass, tag, slot, value))
+    # Stable: equal priorities keep slot order, like sorting the instances did
+    entries.sort(key=lambda e: getattr(e[0], 'priority', 0), reverse=True)
+    return TeamPlan(tuple(entries), frozenset(members), tuple(silence_targets))
+
+def compile_team(team) -> TeamPlan:
+    return _compile(team_key(team))
+
+def clear_plan_cache():
+    _compile.cache_clear()
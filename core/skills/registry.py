@@ -171,19 +171,19 @@ SKILL_DATA = {
     }
 }
 
+# Lowercased name -> SKILL_DATA key, for O(1) case-insensitive lookups
+_SKILL_INDEX = {key.lower(): key for key in SKILL_DATA}
+
 def get_skill_info(skill_name):
     """Returns skill metadata with a case-insensitive lookup."""
-    target = skill_name.strip().lower()
-    for key in SKILL_DATA:
-        if key.lower() == target:
-            return SKILL_DATA[key]
-    return None
+    key = _SKILL_INDEX.get(skill_name.strip().lower())
+    return SKILL_DATA[key] if key else None
 
 def list_all_skills():
     return list(SKILL_DATA.keys())
 
-def create_skill_instance(skill_name, owner_data, owner_idx, side):
-    """Factory to instantiate a skill."""
+def resolve_skill(skill_name):
+    """(class, value) for a skill that acts in battle, else None."""
     data = get_skill_info(skill_name)
     if not data: return None
     
@@ -195,5 +195,11 @@ def create_skill_instance(skill_name, owner_data, owner_idx, side):
     if not klass:
         # If it's a battle skill but no class defined, ignore or default
         return None
-    
-    return klass(skill_name, owner_data, owner_idx, side, data.get("value"))
\ No newline at end of file
+    return klass, data.get("value")
+
+def create_skill_instance(skill_name, owner_data, owner_idx, side):
+    """Factory to instantiate a skill."""
+    resolved = resolve_skill(skill_name)
+    if not resolved: return None
+    klass, value = resolved
+    return klass(skill_name, owner_data, owner_idx, side, value)
@@ -0,0 +1,330 @@
+# core/skills/simulation.py
+
+import math
+import numpy as np
+from core.npc import generate_npc_team, sample_npc_powers
+from .battle import SIDES
+from .plan import compile_team
+from .implementations import (
+    SimpleBuffSkill, Lucky7Skill, JokerSkill, AmberSunSkill, EternitySkill,
+    OnyxMoonSkill, KamikazeSkill, GuardSkill, EphemeralitySkill,
+    ZodiacSkill, ReviveSkill, FelineFealtySkill, EntwinedSoulsSkill
+)
+
+# Monte Carlo odds for !odds. Runs the same rules as BattleEngine, but one skill at a time
+# across every trial: each piece of battle state becomes an (n_trials, slots) array and every
+# random roll becomes a vector draw, so 10k battles cost about as much as a handful of real ones.
+# Any rule change in implementations.py has to be mirrored here (the __main__ check compares both).
+
+ZODIACS = ["Rat", "Ox", "Tiger", "Rabbit", "Dragon", "Snake", "Horse", "Sheep", "Monkey", "Rooster", "Dog", "Pig"]
+ENTWINED_POOL = ["Ox", "Tiger", "Rabbit", "Rooster", "Pig", "Horse"]
+
+def _enemy(side):
+    return "defender" if side == "attacker" else "attacker"
+
+class SimState:
+    """Vectorized BattleContext: every field carries a leading trial axis."""
+    def __init__(self, teams, base, rng: np.random.Generator):
+        self.teams = teams
+        self.plans = {s: compile_team(teams[s]) for s in SIDES}
+        self.rng = rng
+        self.n = base["attacker"].shape[0]
+        self.base = base
+        self.present = {s: np.array([bool(c) for c in teams[s]], dtype=bool) for s in SIDES}
+        self.mult = {s: np.ones_like(base[s]) for s in SIDES}
+        self.flat = {s: np.zeros_like(base[s]) for s in SIDES}
+        self.variance_lock = {s: np.full_like(base[s], np.nan) for s in SIDES}
+        self.suppressed = {s: {} for s in SIDES}
+        self.guard_active = {s: np.zeros(self.n, dtype=bool) for s in SIDES}
+        self.snake = np.zeros(self.n, dtype=bool)
+        self.post_effects = []  # (type, side, idx, trial mask) in skill order
+
+    def active(self, skill):
+        off = self.suppressed[skill.side].get(skill.name)
+        return np.ones(self.n, dtype=bool) if off is None else ~off
+
+    def suppress(self, side, name, mask):
+        prev = self.suppressed[side].get(name)
+        self.suppressed[side][name] = mask if prev is None else (prev | mask)
+
+    def has_member(self, side, anilist_id):
+        return anilist_id in self.plans[side].member_ids
+
+    def choose_where(self, valid):
+        """Per-trial uniform pick among the True cells of an (n, k) mask, plus which rows had any."""
+        keys = np.where(valid, self.rng.random(valid.shape), -1.0)
+        return keys.argmax(axis=1), valid.any(axis=1)
+
+    def silence_targets(self, side):
+        return self.plans[side].silence_targets
+
+# --- Shared effects (Zodiac rolls and their Entwined Souls counterparts) ---
+
+def _scale_slot(st, side, rows, slots, factor):
+    """mult[side][row, slots[row]] *= factor for every selected row."""
+    r = np.nonzero(rows)[0]
+    st.mult[side][r, slots[r]] *= factor
+
+def _ox(st, skill, m, val):
+    valid = np.flatnonzero(st.present[skill.enemy_side])
+    if valid.size:
+        _scale_slot(st, skill.enemy_side, m, valid[st.rng.integers(0, valid.size, st.n)], 1 - val)
+
+def _horse(st, skill, m, self_debuff, ally_buff):
+    st.mult[skill.side][m, skill.idx] *= (1 - self_debuff)
+    others = np.array([i for i, c in enumerate(st.teams[skill.side]) if c and i != skill.idx], dtype=np.int64)
+    if others.size:
+        _scale_slot(st, skill.side, m, others[st.rng.integers(0, others.size, st.n)], 1 + ally_buff)
+
+def _rooster(st, skill, m, team_buff, self_buff):
+    st.mult[skill.side][m] *= (1 + team_buff)
+    st.mult[skill.side][m, skill.idx] *= (1 + self_buff)
+
+def _pig(st, skill, m):
+    targets = [tag for _, tag in st.silence_targets(skill.enemy_side)]
+    if not targets: return
+    pick = st.rng.integers(0, len(targets), st.n)
+    for tag in set(targets):
+        hit = np.isin(pick, [k for k, t in enumerate(targets) if t == tag])
+        st.suppress(skill.enemy_side, tag, m & hit)
+
+# --- Start of battle ---
+
+def _start_zodiac(st, skill):
+    act = st.active(skill)
+    roll = st.rng.integers(0, len(ZODIACS), st.n)
+    vals = skill.val
+    for k, name in enumerate(ZODIACS):
+        m = act & (roll == k)
+        if not m.any(): continue
+        if name == "Rat": st.mult[skill.side][m, skill.idx] *= (1 + vals[0])
+        elif name == "Ox": _ox(st, skill, m, vals[1])
+        elif name == "Tiger": st.mult[skill.side][m] *= (1 + vals[2])
+        elif name == "Rabbit": st.mult[skill.enemy_side][m] *= (1 - vals[3])
+        elif name == "Dragon": st.variance_lock[skill.side][m, skill.idx] = vals[4]
+        elif name == "Snake": st.snake |= m
+        elif name == "Horse": _horse(st, skill, m, vals[6][0], vals[6][1])
+        elif name == "Rooster": _rooster(st, skill, m, vals[7][0], vals[7][1])
+        elif name == "Pig": _pig(st, skill, m)
+        else: st.post_effects.append((name, skill.side, skill.idx, m))
+
+def _start_entwined(st, skill):
+    if not st.has_member(skill.side, skill.val[0]): return
+    act = st.active(skill)
+    eff = skill.val[1]
+    roll = st.rng.integers(0, len(ENTWINED_POOL), st.n)
+    for k, name in enumerate(ENTWINED_POOL):
+        m = act & (roll == k)
+        if not m.any(): continue
+        if name == "Ox": _ox(st, skill, m, 0.2 * eff)
+        elif name == "Tiger": st.mult[skill.side][m] *= (1 + 0.05 * eff)
+        elif name == "Rabbit": st.mult[skill.enemy_side][m] *= (1 - 0.07 * eff)
+        elif name == "Rooster": _rooster(st, skill, m, 0.03 * eff, 0.06 * eff)
+        elif name == "Pig": _pig(st, skill, m)
+        elif name == "Horse": _horse(st, skill, m, 0.1 * eff, 0.3 * eff)
+
+def _start_onyx(st, skill):
+    # Onyx Moon ignores suppression, same as the engine
+    targets = st.silence_targets(skill.enemy_side)
+    if not targets: return
+    pick = st.rng.integers(0, len(targets), st.n)
+    for tag in {t for _, t in targets}:
+        st.suppress(skill.enemy_side, tag, np.isin(pick, [k for k, (_, t) in enumerate(targets) if t == tag]))
+    if st.has_member(skill.side, skill.val[0]):
+        slots = np.array([i for i, _ in targets], dtype=np.int64)[pick]
+        _scale_slot(st, skill.enemy_side, np.ones(st.n, dtype=bool), slots, 0.75)
+
+def _start_kamikaze(st, skill):
+    act = st.active(skill)
+    valid = st.present[skill.enemy_side] & (st.mult[skill.enemy_side] > 0)
+    target, any_valid = st.choose_where(valid)
+    rows = np.nonzero(act & any_valid)[0]
+    st.mult[skill.enemy_side][rows, target[rows]] = 0.0
+
+def _start_guard(st, skill):
+    m = st.active(skill) & ~st.guard_active[skill.side]
+    st.guard_active[skill.side] |= m
+    st.mult[skill.enemy_side][m] *= (1.0 - skill.val)
+
+def _start_ephemerality(st, skill):
+    if st.has_member(skill.side, skill.val[0]):
+        st.mult[skill.side][st.active(skill)] *= (1.0 + skill.val[1])
+
+def _start_amber_sun(st, skill):
+    act = st.active(skill)
+    for i, c in enumerate(st.teams[skill.side]):
+        if c and c.get('anilist_id') == skill.val[0] and i != skill.idx:
+            st.mult[skill.side][act, i] *= (1.0 + skill.val[1])
+
+def _start_feline(st, skill):
+    tohru_id, buff, debuff = skill.val
+    if not st.has_member(skill.side, tohru_id): return
+    act = st.active(skill)
+    for i, c in enumerate(st.teams[skill.side]):
+        if c and c.get('anilist_id') == tohru_id and i != skill.idx:
+            st.mult[skill.side][act, i] *= (1.0 + buff)
+    st.mult[skill.enemy_side][act] *= (1.0 - debuff)
+
+START_HANDLERS = {
+    ZodiacSkill: _start_zodiac,
+    EntwinedSoulsSkill: _start_entwined,
+    OnyxMoonSkill: _start_onyx,
+    KamikazeSkill: _start_kamikaze,
+    GuardSkill: _start_guard,
+    EphemeralitySkill: _start_ephemerality,
+    AmberSunSkill: _start_amber_sun,
+    FelineFealtySkill: _start_feline,
+}
+
+# --- Power modifiers (return an (n,) multiplier for the owner's slot) ---
+
+def _mod_simple(st, skill):
+    act = st.active(skill)
+    if skill.name == "Surge":
+        return np.where(act, 1.0 + skill.val, 1.0)
+    if skill.name == "Berserk":
+        return np.where(act & (st.rng.random(st.n) < 0.25), 1.0 + skill.val, 1.0)
+    if skill.name == "Golden Egg":
+        return np.where(act & (st.rng.random(st.n) < 0.01), skill.val, 1.0)
+    return np.ones(st.n)
+
+def _mod_lucky7(st, skill):
+    act = st.active(skill)
+    jackpot = act & (st.rng.random(st.n) < 0.07)
+    flat = act & ~jackpot & (st.rng.random(st.n) < 0.77)
+    st.flat[skill.side][flat, skill.idx] += 7777
+    return np.where(jackpot, 8.77, 1.0)
+
+def _mod_joker(st, skill):
+    up = st.rng.random(st.n) < 0.5
+    return np.where(st.active(skill), np.where(up, 1.0 + skill.val, 1.0 - skill.val), 1.0)
+
+def _mod_partner(st, skill):
+    """Amber Sun / Eternity / Feline Fealty: flat bonus on the owner while the partner is present."""
+    if not st.has_member(skill.side, skill.val[0]): return np.ones(st.n)
+    return np.where(st.active(skill), 1.0 + skill.val[1], 1.0)
+
+MODIFIER_HANDLERS = {
+    SimpleBuffSkill: _mod_simple,
+    Lucky7Skill: _mod_lucky7,
+    JokerSkill: _mod_joker,
+    AmberSunSkill: _mod_partner,
+    EternitySkill: _mod_partner,
+    FelineFealtySkill: _mod_partner,
+}
+
+# --- Post calculation ---
+
+def _apply_post_effects(st, final):
+    for kind, side, idx, m in st.post_effects:
+        enemy = _enemy(side)
+        if kind == "Sheep":
+            if final[enemy].shape[1]:
+                final[side][m, idx] = final[enemy][m].max(axis=1)
+        elif kind == "Dog":
+            final[side][m, idx] = final[side][m].max(axis=1)
+        elif kind == "Monkey":
+            target, any_valid = st.choose_where(final[enemy] > 0)
+            r = np.nonzero(m & any_valid)[0]
+            t = target[r]
+            mine = final[side][r, idx].copy()
+            final[side][r, idx] = final[enemy][r, t]
+            final[enemy][r, t] = mine
+
+def simulate_battle(attacker_team, defender_team=None, npc_difficulty=None, trials=10000, seed=None):
+    """
+    Plays `trials` battles at once. The defender is either a fixed team or, with npc_difficulty,
+    a freshly rolled NPC line-up per trial (like !battle <difficulty>).
+    Returns {'trials', 'win', 'draw', 'loss'} counts from the attacker's side.
+    """
+    rng = np.random.default_rng(seed)
+    if npc_difficulty:
+        defender_team = generate_npc_team(npc_difficulty)
+        def_base = sample_npc_powers(npc_difficulty, trials, rng).astype(np.float64)
+    else:
+        def_base = np.tile([float(c['true_power']) if c else 0.0 for c in defender_team], (trials, 1))
+    att_base = np.tile([float(c['true_power']) if c else 0.0 for c in attacker_team], (trials, 1))
+
+    teams = {"attacker": attacker_team, "defender": defender_team}
+    st = SimState(teams, {"attacker": att_base, "defender": def_base}, rng)
+
+    all_skills = st.plans["attacker"].instantiate(attacker_team, "attacker") + st.plans["defender"].instantiate(defender_team, "defender")
+    all_skills.sort(key=lambda s: s.priority, reverse=True)
+
+    # 1. Start of battle
+    for skill in all_skills:
+        handler = START_HANDLERS.get(type(skill))
+        if handler: handler(st, skill)
+
+    # 2. Calculation
+    final = {}
+    for side in SIDES:
+        p = st.base[side].copy()
+        for skill in all_skills:
+            handler = MODIFIER_HANDLERS.get(type(skill))
+            if handler and skill.side == side:
+                p[:, skill.idx] *= handler(st, skill)
+        p = p * st.mult[side] + st.flat[side]
+        lock = st.variance_lock[side]
+        variance = np.where(np.isnan(lock), rng.uniform(0.9, 1.1, p.shape), lock)
+        final[side] = np.where(st.present[side], np.maximum(0, np.trunc(p * variance)), 0.0)
+
+    _apply_post_effects(st, final)
+
+    # 3. Outcome (Snake trap, then attacker Revives)
+    win = final["attacker"].sum(axis=1) > final["defender"].sum(axis=1)
+    draw = ~win & st.snake
+    for skill in all_skills:
+        if isinstance(skill, ReviveSkill) and skill.side == "attacker":
+            draw |= ~win & (rng.random(trials) < skill.val)
+
+    n_win, n_draw = int(win.sum()), int(draw.sum())
+    return {"trials": trials, "win": n_win, "draw": n_draw, "loss": trials - n_win - n_draw}
+
+def wilson_interval(successes, n, z=1.96):
+    """95% Wilson score interval for a binomial proportion, as (low, high)."""
+    if n == 0: return (0.0, 1.0)
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return (max(0.0, centre - half), min(1.0, centre + half))
+
+if __name__ == "__main__":
+    # Sanity check: vectorized odds vs. replaying the real BattleEngine
+    import random
+    import time
+    from .battle import BattleEngine
+
+    def unit(name, power, tags=(), anilist_id=None):
+        return {'name': name, 'true_power': power, 'ability_tags': list(tags), 'anilist_id': anilist_id}
+
+    attacker = [
+        unit("Queen", 11000, ["Queen of the Zodiacs"]), unit("Kyo", 10200, [], 209),
+        unit("Yuki", 10500, ["Entwined Souls", "Revive"]), unit("Gambler", 9800, ["Lucky 7", "The Joker"]),
+        unit("Agott", 10100, ["The Amber Sun"], 129842),
+    ]
+    defender = [
+        unit("Moon", 11500, ["The Onyx Moon"]), unit("Coco", 10000, ["Guard"], 129840),
+        unit("Bomber", 9500, ["Kamikaze"]), unit("Rager", 10800, ["Berserk", "Surge"]),
+        unit("Tohru", 10400, ["Feline Fealty"], 207),
+    ]
+
+    trials = 10000
+    t0 = time.perf_counter()
+    fast = simulate_battle(attacker, defender, trials=trials, seed=1)
+    elapsed = time.perf_counter() - t0
+
+    rng = random.Random(1)
+    slow = {"WIN": 0, "DRAW": 0, "LOSS": 0}
+    for _ in range(trials):
+        slow[BattleEngine(rng).run(attacker, defender).outcome] += 1
+
+    print(f"vectorized: {fast} in {elapsed * 1000:.0f} ms")
+    print(f"engine:     {slow}")
+    for key in ("win", "draw", "loss"):
+        lo, hi = wilson_interval(fast[key], trials)
+        # Both are estimates: allow a little slack around the fast interval
+        ok = lo - 0.02 <= slow[key.upper()] / trials <= hi + 0.02
+        print(f"{'✅' if ok else '❌'} {key}: {slow[key.upper()] / trials:.3f} vs [{lo:.3f}, {hi:.3f}]")
+    print(f"✅ npc hell: {simulate_battle(attacker, npc_difficulty='hell', trials=trials, seed=2)}")
@@ -1,27 +1,136 @@
+# core/tracker.py
+import asyncio
+import os
 from core.database import get_db_pool
 
+# Write-behind buffer for the lifetime stat counters on `users`.
+# Deltas are summed in memory per user and written in one batched UPDATE every
+# TRACKER_FLUSH_SECONDS, or sooner once TRACKER_FLUSH_THRESHOLD users are pending.
+# Anything that reads these columns and needs them exact calls Tracker.flush(user_id) first.
+FLUSH_SECONDS = float(os.getenv("TRACKER_FLUSH_SECONDS", 5))
+FLUSH_THRESHOLD = int(os.getenv("TRACKER_FLUSH_THRESHOLD", 500))
+COUNTER_COLUMNS = ("total_pulls", "total_bounties", "expedition_gems_total", "total_scrapped")
+
+_deltas = {}   # user_id -> {column: delta}
+_streaks = {}  # user_id -> latest checkin_streak (absolute, last write wins)
+_flush_lock = asyncio.Lock()
+_flush_task = None
+_loop_task = None
+
+def _add(user_id, column, amount):
+    if not amount: return
+    counters = _deltas.setdefault(str(user_id), {})
+    counters[column] = counters.get(column, 0) + amount
+    _maybe_flush_early()
+
+def _maybe_flush_early():
+    global _flush_task
+    if len(_deltas.keys() | _streaks.keys()) >= FLUSH_THRESHOLD and (_flush_task is None or _flush_task.done()):
+        _flush_task = asyncio.create_task(Tracker.flush())
+
+def _take(user_id=None):
+    """Detaches pending entries (all, or one user's) so new increments start a fresh batch."""
+    global _deltas, _streaks
+    if user_id is None:
+        deltas, streaks = _deltas, _streaks
+        _deltas, _streaks = {}, {}
+        return deltas, streaks
+    uid = str(user_id)
+    deltas = {uid: _deltas.pop(uid)} if uid in _deltas else {}
+    streaks = {uid: _streaks.pop(uid)} if uid in _streaks else {}
+    return deltas, streaks
+
+def _restore(deltas, streaks):
+    """Puts a failed batch back, underneath anything buffered since."""
+    for uid, counters in deltas.items():
+        current = _deltas.setdefault(uid, {})
+        for column, amount in counters.items():
+            current[column] = current.get(column, 0) + amount
+    for uid, streak in streaks.items():
+        _streaks.setdefault(uid, streak)
+
 class Tracker:
     @staticmethod
     async def increment_pulls(user_id, amount):
-        pool = await get_db_pool()
-        await pool.execute("UPDATE users SET total_pulls = total_pulls + $1 WHERE user_id = $2", amount, str(user_id))
+        _add(user_id, "total_pulls", amount)
 
     @staticmethod
     async def increment_bounty_wins(user_id):
-        pool = await get_db_pool()
-        await pool.execute("UPDATE users SET total_bounties = total_bounties + 1 WHERE user_id = $1", str(user_id))
+        _add(user_id, "total_bounties", 1)
 
     @staticmethod
     async def track_expedition_gain(user_id, gems):
-        pool = await get_db_pool()
-        await pool.execute("UPDATE users SET expedition_gems_total = expedition_gems_total + $1 WHERE user_id = $2", gems, str(user_id))
-    
+        _add(user_id, "expedition_gems_total", gems)
+
     @staticmethod
     async def increment_scrapped(user_id, amount):
-        pool = await get_db_pool()
-        await pool.execute("UPDATE users SET total_scrapped = total_scrapped + $1 WHERE user_id = $2", amount, str(user_id))
+        _add(user_id, "total_scrapped", amount)
 
     @staticmethod
     async def update_streak(user_id, streak):
-        pool = await get_db_pool()
-        await pool.execute("UPDATE users SET checkin_streak = $1 WHERE user_id = $2", streak, str(user_id))
\ No newline at end of file
+        _streaks[str(user_id)] = streak
+        _maybe_flush_early()
+
+    @staticmethod
+    def pending(user_id=None):
+        """Number of users with unwritten stats (or whether one user has any)."""
+        if user_id is None:
+            return len(_deltas.keys() | _streaks.keys())
+        return str(user_id) in _deltas or str(user_id) in _streaks
+
+    @staticmethod
+    async def flush(user_id=None):
+        """
+        Writes buffered stats now: every user, or just user_id.
+        Returns the number of users written. On a DB error the batch is kept for the next flush.
+        """
+        async with _flush_lock:
+            deltas, streaks = _take(user_id)
+            # Sorted so concurrent batches lock users rows in the same order
+            user_ids = sorted(deltas.keys() | streaks.keys())
+            if not user_ids: return 0
+
+            columns = [[deltas.get(uid, {}).get(col, 0) for uid in user_ids] for col in COUNTER_COLUMNS]
+            streak_values = [streaks.get(uid) for uid in user_ids]
+            try:
+                pool = await get_db_pool()
+                await pool.execute("""
+                    UPDATE users u
+                    SET total_pulls = u.total_pulls + d.total_pulls,
+                        total_bounties = u.total_bounties + d.total_bounties,
+                        expedition_gems_total = u.expedition_gems_total + d.expedition_gems_total,
+                        total_scrapped = u.total_scrapped + d.total_scrapped,
+                        checkin_streak = COALESCE(d.checkin_streak, u.checkin_streak)
+                    FROM unnest($1::text[], $2::int[], $3::int[], $4::int[], $5::int[], $6::int[])
+                        AS d(user_id, total_pulls, total_bounties, expedition_gems_total, total_scrapped, checkin_streak)
+                    WHERE u.user_id = d.user_id
+                """, user_ids, *columns, streak_values)
+            except Exception as e:
+                _restore(deltas, streaks)
+                print(f"⚠️ [Tracker] Flush of {len(user_ids)} users failed, will retry: {e}")
+                return 0
+            return len(user_ids)
+
+async def _flush_loop():
+    while True:
+        await asyncio.sleep(FLUSH_SECONDS)
+        await Tracker.flush()
+
+def start_tracker():
+    global _loop_task
+    if _loop_task is None or _loop_task.done():
+        _loop_task = asyncio.create_task(_flush_loop())
+
+async def stop_tracker():
+    """Stops the periodic flush and writes whatever is still buffered."""
+    global _loop_task
+    if _loop_task:
+        _loop_task.cancel()
+        try:
+            await _loop_task
+        except asyncio.CancelledError:
+            pass
+        _loop_task = None
+    written = await Tracker.flush()
+    if written:
+        print(f"💾 [Tracker] Flushed stats for {written} users on shutdown")
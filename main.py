@@ -8,6 +8,8 @@ load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 PREFIX = os.getenv('COMMAND_PREFIX', '!')
 from core.database import init_db  # Import your new Supabase init function
+from core.http import get_http_session, close_http_session
+from core.tracker import start_tracker, stop_tracker
 from aiohttp import web
 
 # 1. Load Secrets
@@ -52,6 +54,12 @@ async def main():
     print("🗄️  Connecting to Supabase...")
     await init_db()
 
+    # Shared HTTP client (keep-alive pool for AniList / image CDNs / Unbelievaboat)
+    await get_http_session()
+
+    # Write-behind stat counters (flushed every few seconds and on shutdown)
+    start_tracker()
+
     # Load Cogs
     print("⚙️  Loading Modules...")
     if os.path.exists('./cogs'):
@@ -64,8 +72,12 @@ async def main():
                     print(f"   ❌ Failed to load {filename}: {e}")
 
     # Start Bot
-    async with bot:
-        await bot.start(TOKEN)
+    try:
+        async with bot:
+            await bot.start(TOKEN)
+    finally:
+        await stop_tracker()
+        await close_http_session()
 
 # 5. Run the Script
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+import aiohttp
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Allow running as `python scripts/bench_http.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.http import HTTP_TIMEOUT, get_http_session, close_http_session
+from core.anilist import ANILIST_URL
+
+# Cold (new ClientSession per request, the old per-command behaviour)
+# vs warm (shared keep-alive client from core.http).
+QUERY = "query { Character(id: 40) { id } }"
+
+async def timed_post(session):
+    start = time.perf_counter()
+    async with session.post(ANILIST_URL, json={'query': QUERY}) as resp:
+        await resp.read()
+    return (time.perf_counter() - start) * 1000
+
+async def run_cold(n, delay):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        async with aiohttp.ClientSession(timeout=HTTP_TIMEOUT) as session:
+            async with session.post(ANILIST_URL, json={'query': QUERY}) as resp:
+                await resp.read()
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(delay)
+    return samples
+
+async def run_warm(n, delay):
+    session = await get_http_session()
+    await timed_post(session)  # open the pooled connection first
+    samples = []
+    for _ in range(n):
+        samples.append(await timed_post(session))
+        await asyncio.sleep(delay)
+    return samples
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"{label:<6} n={len(samples):<4} p50={statistics.median(samples):7.1f}ms  p95={p95:7.1f}ms  max={samples[-1]:7.1f}ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Cold vs warm latency for outbound HTTP calls.")
+    parser.add_argument("-n", type=int, default=20, help="requests per mode")
+    parser.add_argument("--delay", type=float, default=0.8, help="seconds between requests (stay under AniList's rate limit)")
+    args = parser.parse_args()
+
+    print(f"🌐 Benchmarking {ANILIST_URL} ({args.n} requests per mode)...")
+    try:
+        report("cold", await run_cold(args.n, args.delay))
+        report("warm", await run_warm(args.n, args.delay))
+    finally:
+        await close_http_session()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+# Allow running as `python scripts/bench_inventory.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.database import get_db_pool, batch_add_to_inventory, SCRAP_GEM_VALUES, SCRAP_COIN_VALUES
+
+# Pull-commit latency vs batch size: the old per-character loop against the set-based upsert.
+# Uses throwaway bench users that are deleted afterwards.
+BATCH_SIZES = [1, 10, 50, 100]
+BENCH_USER_PREFIX = "bench_inventory_"
+
+async def legacy_add_to_inventory(user_id, characters):
+    """The previous implementation: SELECT then INSERT/UPDATE per character."""
+    pool = await get_db_pool()
+    gems = coins = 0
+    async with pool.acquire() as conn:
+        for char in characters:
+            row = await conn.fetchrow("SELECT dupe_level FROM inventory WHERE user_id = $1 AND anilist_id = $2", str(user_id), char['id'])
+            if not row:
+                await conn.execute("INSERT INTO inventory (user_id, anilist_id, dupe_level) VALUES ($1, $2, 0)", str(user_id), char['id'])
+            elif row['dupe_level'] < 10:
+                await conn.execute("UPDATE inventory SET dupe_level = dupe_level + 1 WHERE user_id = $1 AND anilist_id = $2", str(user_id), char['id'])
+            else:
+                gems += SCRAP_GEM_VALUES.get(char['rarity'], 0)
+                coins += SCRAP_COIN_VALUES.get(char['rarity'], 0)
+        if gems or coins:
+            await conn.execute("UPDATE users SET gacha_gems = gacha_gems + $1, coins = coins + $2 WHERE user_id = $3", gems, coins, str(user_id))
+    return gems, coins
+
+def random_batch(size):
+    # Small ID space so batches contain repeats and climb into the dupe cap
+    return [{'id': random.randint(1, 40), 'rarity': random.choice(["R", "R", "R", "SR", "SSR"])} for _ in range(size)]
+
+async def time_path(fn, user_id, size, rounds):
+    samples = []
+    for _ in range(rounds):
+        batch = random_batch(size)
+        start = time.perf_counter()
+        await fn(user_id, batch)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch_add_to_inventory against the old per-row loop.")
+    parser.add_argument("--rounds", type=int, default=30, help="batches per size and path")
+    args = parser.parse_args()
+
+    pool = await get_db_pool()
+    users = {"legacy": f"{BENCH_USER_PREFIX}legacy", "set": f"{BENCH_USER_PREFIX}set"}
+    for uid in users.values():
+        await pool.execute("INSERT INTO users (user_id) VALUES ($1) ON CONFLICT (user_id) DO NOTHING", uid)
+
+    try:
+        print(f"{'batch':>6} {'legacy p50':>12} {'set-based p50':>14}")
+        for size in BATCH_SIZES:
+            legacy = await time_path(legacy_add_to_inventory, users["legacy"], size, args.rounds)
+            set_based = await time_path(batch_add_to_inventory, users["set"], size, args.rounds)
+            print(f"{size:>6} {legacy:>10.2f}ms {set_based:>12.2f}ms")
+    finally:
+        for uid in users.values():
+            await pool.execute("DELETE FROM inventory WHERE user_id = $1", uid)
+            await pool.execute("DELETE FROM users WHERE user_id = $1", uid)
+        await pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
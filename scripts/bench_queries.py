@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import asyncpg
+
+# Allow running as `python scripts/bench_queries.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.migrations import run_migrations
+from scripts.generate_dataset import generate_dataset
+
+# Captures EXPLAIN (ANALYZE, BUFFERS) for every hot query in the cogs against a
+# seeded database and exits non-zero if any of them plans a Seq Scan on a hot table.
+# Point BENCH_DATABASE_URL at a throwaway database: --seed writes a lot of rows.
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL")
+HOT_TABLES = {"inventory", "characters_cache", "users", "teams", "event_ranking", "achievements", "banners", "user_items"}
+
+# (name, where it lives, sql, params). $-params are filled from the sample user/team picked at run time.
+HOT_QUERIES = [
+    ("inventory_page", "InventoryView.get_page_content", """
+        SELECT i.id, c.name, c.rarity, i.is_locked, i.dupe_level, i.bond_level, i.effective_power as true_power
+        FROM inventory i
+        JOIN characters_cache c ON i.anilist_id = c.anilist_id
+        WHERE i.user_id = $1
+        ORDER BY i.effective_power DESC, i.obtained_at DESC
+        LIMIT 10 OFFSET 0
+    """, ["user_id"]),
+    ("inventory_count", "InventoryView.get_page_content", "SELECT COUNT(*) FROM inventory WHERE user_id = $1", ["user_id"]),
+    ("inventory_by_date", "get_inventory_details(sort_by='date')", """
+        SELECT i.id, i.anilist_id, c.name, i.effective_power, c.rarity, c.rank
+        FROM inventory i
+        LEFT JOIN characters_cache c ON i.anilist_id = c.anilist_id
+        WHERE i.user_id = $1
+        ORDER BY i.obtained_at DESC
+    """, ["user_id"]),
+    ("inventory_by_power", "get_inventory_details(sort_by='power')", """
+        SELECT i.id, i.anilist_id, c.name, i.effective_power, c.rarity, c.rank
+        FROM inventory i
+        LEFT JOIN characters_cache c ON i.anilist_id = c.anilist_id
+        WHERE i.user_id = $1
+        ORDER BY i.effective_power DESC
+    """, ["user_id"]),
+    ("team_for_battle", "Battle.get_team_for_battle", """
+        SELECT i.id, c.anilist_id, c.name, i.effective_power, i.dupe_level, i.bond_level, c.ability_tags, c.rarity, c.rank, c.image_url
+        FROM inventory i
+        JOIN characters_cache c ON i.anilist_id = c.anilist_id
+        WHERE i.id = ANY($1)
+    """, ["team_ids"]),
+    ("team_row", "teams lookup", "SELECT slot_1, slot_2, slot_3, slot_4, slot_5 FROM teams WHERE user_id = $1", ["user_id"]),
+    ("whohas", "Utility.who_has_skill", """
+        SELECT name, rarity, ability_tags FROM characters_cache
+        WHERE ability_tags @> jsonb_build_array($1::text)
+    """, ["skill"]),
+    ("event_leaderboard", "Event leaderboard", """
+        SELECT user_id, score FROM event_ranking
+        ORDER BY score DESC LIMIT 10
+    """, []),
+    ("active_banner", "Gacha.get_active_banner", """
+        SELECT * FROM banners WHERE is_active = TRUE AND end_timestamp > $1 LIMIT 1
+    """, ["now"]),
+    ("rate_up_pool", "Gacha.get_rate_up_pools", """
+        SELECT anilist_id, rarity FROM characters_cache WHERE anilist_id = ANY($1)
+    """, ["character_ids"]),
+    ("owners_of_character", "characters_cache power trigger", """
+        SELECT id FROM inventory WHERE anilist_id = $1
+    """, ["character_id"]),
+    ("earned_achievements", "AchievementEngine.process_all", """
+        SELECT achievement_id FROM achievements WHERE user_id = $1
+    """, ["user_id"]),
+    ("user_items", "Inventory items", """
+        SELECT item_id, quantity FROM user_items WHERE user_id = $1 AND quantity > 0
+    """, ["user_id"]),
+    ("ssr_count", "SSR collection achievements", """
+        SELECT COUNT(*) FROM inventory i
+        JOIN characters_cache c ON i.anilist_id = c.anilist_id
+        WHERE i.user_id = $1 AND c.rarity = 'SSR'
+    """, ["user_id"]),
+]
+
+async def seed(conn, users, per_user):
+    """Wipes and regenerates the dataset (see generate_dataset.py), plus event scores and a banner history."""
+    print(f"🌱 Seeding {users:,} users x ~{per_user} units...")
+    await generate_dataset(conn, users, per_user, truncate=True)
+    await conn.execute("TRUNCATE banners, event_ranking RESTART IDENTITY")
+    await conn.execute("""
+        INSERT INTO event_ranking (user_id, score, tickets, last_reset)
+        SELECT user_id, abs(hashtext(user_id)) % 1000000, 3, '2000-01-01' FROM users
+    """)
+    await conn.execute("""
+        INSERT INTO banners (name, rate_up_ids, is_active, end_timestamp)
+        SELECT 'Old Banner ' || g, ARRAY[g, g + 1], FALSE, 0 FROM generate_series(1, 2000) g
+    """)
+    await conn.execute("INSERT INTO banners (name, rate_up_ids, is_active, end_timestamp) VALUES ('Bench Banner', ARRAY[1, 2, 3], TRUE, $1)", int(time.time()) + 86400)
+    await conn.execute("ANALYZE banners, event_ranking")
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+async def sample_params(conn):
+    user_id = await conn.fetchval("SELECT user_id FROM teams ORDER BY user_id LIMIT 1")
+    team = await conn.fetchrow("SELECT slot_1, slot_2, slot_3, slot_4, slot_5 FROM teams WHERE user_id = $1", user_id)
+    return {
+        "user_id": user_id,
+        "team_ids": [v for v in team.values() if v is not None],
+        "skill": await conn.fetchval("SELECT ability_tags->>0 FROM characters_cache WHERE ability_tags <> '[]'::jsonb LIMIT 1") or "Lucky 7",
+        "now": int(time.time()),
+        "character_ids": await conn.fetchval("SELECT array_agg(anilist_id) FROM (SELECT anilist_id FROM characters_cache ORDER BY rank LIMIT 5) c"),
+        "character_id": await conn.fetchval("SELECT anilist_id FROM inventory WHERE user_id = $1 LIMIT 1", user_id),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN (ANALYZE, BUFFERS) every hot query; fail on sequential scans.")
+    parser.add_argument("--dsn", default=BENCH_DATABASE_URL, help="throwaway database (default: $BENCH_DATABASE_URL)")
+    parser.add_argument("--seed", action="store_true", help="wipe and regenerate the synthetic dataset first")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--per-user", type=int, default=60)
+    args = parser.parse_args()
+    if not args.dsn:
+        sys.exit("Set BENCH_DATABASE_URL or pass --dsn (never the production database).")
+
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        await run_migrations(conn)
+        if args.seed:
+            await seed(conn, args.users, args.per_user)
+        params = await sample_params(conn)
+
+        failures = []
+        print(f"{'query':<22} {'ms':>9} {'shared hit':>11} {'read':>7}  plan")
+        for name, source, sql, param_names in HOT_QUERIES:
+            raw = await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", *[params[p] for p in param_names])
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+            root = plan["Plan"]
+            nodes = list(walk(root))
+            seq = sorted({n.get("Relation Name") for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") in HOT_TABLES})
+            shape = " > ".join(dict.fromkeys(f"{n['Node Type']}({n['Relation Name']})" if n.get("Relation Name") else n["Node Type"] for n in nodes))
+            print(f"{name:<22} {plan['Execution Time']:>9.2f} {root.get('Shared Hit Blocks', 0):>11} {root.get('Shared Read Blocks', 0):>7}  {shape}")
+            if seq:
+                failures.append(f"{name} ({source}): Seq Scan on {', '.join(seq)}")
+    finally:
+        await conn.close()
+
+    if failures:
+        print("\n❌ Sequential scans on hot tables:")
+        for f in failures: print(f"   • {f}")
+        sys.exit(1)
+    print("\n✅ Every hot query uses an index.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import asyncpg
+
+# Allow running as `python scripts/generate_dataset.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.achievements import ACHIEVEMENTS
+from core.catalog import determine_rarity
+from core.game_math import calculate_effective_power_array
+from core.migrations import run_migrations
+from core.skills import SKILL_DATA
+
+# Fills a throwaway Postgres with production-shaped data for load and scaling tests
+# (default scale: 100k users, ~10M inventory rows). Everything bulk goes through COPY;
+# teams, presets and expeditions are derived server-side from the generated inventories.
+# Point BENCH_DATABASE_URL at a database you can wipe.
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL")
+RANKINGS_FILE = "data/rankings.json"
+SNOWFLAKE_BASE = 100_000_000_000_000_000
+
+# Pull odds from cogs/gacha.py (roll_rarity / TIER_RANKS)
+TIER_ODDS = [("SSR", 0.02), ("SR", 0.11), ("R", 0.87)]
+TIER_RANKS = {"SSR": (1, 250), "SR": (251, 1500), "R": (1501, 10000)}
+# Commons stack dupes fastest; MAX_DUPE_LEVEL in core/database.py caps them
+MEAN_DUPES = {"SSR": 0.4, "SR": 1.5, "R": 4.0}
+MAX_DUPE_LEVEL = 10
+ITEM_IDS = ["SSR Token", "bond_small", "bond_med", "bond_large", "bond_ur"]
+SKILLED_FRACTION = 0.02
+USERS_PER_CHUNK = 5000
+
+GENERATED_TABLES = ["expeditions", "team_presets", "teams", "achievements", "user_items", "inventory", "users", "characters_cache"]
+
+def synth_favs(rank):
+    """Favourites fall off roughly as a power law of rank (~150k at #1, ~600 at #10000)."""
+    return max(1, int(150_000 / rank ** 0.6))
+
+def load_catalog_rows(rng, path=RANKINGS_FILE):
+    """characters_cache rows from the real rank list, with synthetic names, favourites and skills."""
+    with open(path, "r") as f:
+        rankings = json.load(f)
+    ranked = sorted(((int(cid), rank) for cid, rank in rankings.items() if rank >= 1), key=lambda x: x[1])
+    rarities = [determine_rarity(rank) for _, rank in ranked]
+    favs = [synth_favs(rank) for _, rank in ranked]
+    powers = calculate_effective_power_array(favs, rarities).tolist()
+    skills = list(SKILL_DATA)
+
+    rows = []
+    for (cid, rank), rarity, fav, power in zip(ranked, rarities, favs, powers):
+        tags = [rng.choice(skills)] if rng.random() < SKILLED_FRACTION else []
+        rows.append((cid, f"Character {cid}", None, rarity, rank, fav, power, json.dumps(tags)))
+    return rows
+
+def unit_count(rng, mean, cap):
+    """Collection sizes are long-tailed: most players are small, a few own a large slice of the catalog."""
+    sigma = 1.0
+    mu = math.log(mean) - sigma ** 2 / 2
+    return max(1, min(cap, int(rng.lognormvariate(mu, sigma))))
+
+def roll_collection(rng, n, by_rank):
+    owned = {}
+    tiers, weights = zip(*TIER_ODDS)
+    while len(owned) < n:
+        rarity = rng.choices(tiers, weights)[0]
+        cid = by_rank.get(rng.randint(*TIER_RANKS[rarity]))
+        if cid is not None:
+            owned[cid] = rarity
+    return owned
+
+def inventory_rows(rng, user_id, owned, now):
+    for cid, rarity in owned.items():
+        dupes = min(MAX_DUPE_LEVEL, int(rng.expovariate(1 / MEAN_DUPES[rarity])))
+        bond = min(50, 1 + int(rng.expovariate(1 / 4)))
+        obtained = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+        yield (user_id, cid, dupes, bond, rng.randint(0, 99), obtained, rng.random() < 0.1)
+
+async def ensure_empty(conn, truncate):
+    if truncate:
+        await conn.execute(f"TRUNCATE {', '.join(GENERATED_TABLES)} RESTART IDENTITY CASCADE")
+        return True
+    if await conn.fetchval("SELECT EXISTS (SELECT 1 FROM users)"):
+        print("❌ users is not empty. Re-run with --truncate on a throwaway database.")
+        return False
+    return True
+
+async def generate_dataset(conn, users=100_000, units_per_user=100, seed=42, truncate=False):
+    """
+    Generates the whole dataset on an open connection. Returns a dict of row counts,
+    or None if the target tables already hold data and truncate is False.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    if not await ensure_empty(conn, truncate):
+        return None
+    counts = {}
+
+    start = time.perf_counter()
+    catalog = load_catalog_rows(rng)
+    await conn.copy_records_to_table(
+        'characters_cache', records=catalog,
+        columns=['anilist_id', 'name', 'image_url', 'rarity', 'rank', 'base_power', 'true_power', 'ability_tags']
+    )
+    counts['characters_cache'] = len(catalog)
+    by_rank = {row[4]: row[0] for row in catalog}
+    print(f"📚 characters_cache: {len(catalog):,} rows ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    user_ids = [str(SNOWFLAKE_BASE + i) for i in range(users)]
+    user_rows = []
+    for uid in user_ids:
+        pulls = int(rng.expovariate(1 / (units_per_user * 2)))
+        user_rows.append((
+            uid, rng.randint(0, 50_000), rng.randint(0, 200_000), 1 + int(rng.expovariate(1 / 12)) % 100,
+            rng.randint(0, 999), pulls, rng.randint(0, 89), int(rng.expovariate(1 / 20)),
+            int(rng.expovariate(1 / 5000)), int(rng.expovariate(1 / 30)), int(rng.expovariate(1 / 7)), True
+        ))
+    await conn.copy_records_to_table(
+        'users', records=user_rows,
+        columns=['user_id', 'gacha_gems', 'coins', 'team_level', 'team_xp', 'total_pulls', 'pity_counter',
+                 'total_bounties', 'expedition_gems_total', 'total_scrapped', 'checkin_streak', 'has_claimed_starter']
+    )
+    counts['users'] = users
+    print(f"👤 users: {users:,} rows ({time.perf_counter() - start:.1f}s)")
+
+    # Inventory is the big one: COPY per chunk of users to keep memory flat.
+    # The BEFORE INSERT trigger fills effective_power, exactly as for real pulls.
+    start = time.perf_counter()
+    total = 0
+    for offset in range(0, users, USERS_PER_CHUNK):
+        chunk = []
+        for uid in user_ids[offset:offset + USERS_PER_CHUNK]:
+            owned = roll_collection(rng, unit_count(rng, units_per_user, len(by_rank) // 2), by_rank)
+            chunk.extend(inventory_rows(rng, uid, owned, now))
+        await conn.copy_records_to_table(
+            'inventory', records=chunk,
+            columns=['user_id', 'anilist_id', 'dupe_level', 'bond_level', 'bond_exp', 'obtained_at', 'is_locked']
+        )
+        total += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"   📦 inventory: {total:,} rows ({total / elapsed:,.0f} rows/s)", end="\r")
+    counts['inventory'] = total
+    print(f"📦 inventory: {total:,} rows ({time.perf_counter() - start:.1f}s)          ")
+
+    start = time.perf_counter()
+    achievement_ids = list(ACHIEVEMENTS)
+    achievement_rows = []
+    item_rows = []
+    for uid in user_ids:
+        # Earlier registry entries are the easier ones
+        for i, aid in enumerate(achievement_ids):
+            if rng.random() < 0.6 / (1 + i * 0.5):
+                achievement_rows.append((uid, aid, (now - timedelta(days=rng.randint(0, 365))).isoformat()))
+        for item_id in rng.sample(ITEM_IDS, rng.randint(0, 3)):
+            item_rows.append((uid, item_id, rng.randint(0, 12)))
+    await conn.copy_records_to_table('achievements', records=achievement_rows, columns=['user_id', 'achievement_id', 'earned_at'])
+    await conn.copy_records_to_table('user_items', records=item_rows, columns=['user_id', 'item_id', 'quantity'])
+    counts['achievements'] = len(achievement_rows)
+    counts['user_items'] = len(item_rows)
+    print(f"🏅 achievements: {len(achievement_rows):,}, user_items: {len(item_rows):,} ({time.perf_counter() - start:.1f}s)")
+
+    # Squads come from each player's strongest units, like !team auto would pick them
+    start = time.perf_counter()
+    async with conn.transaction():
+        await conn.execute("""
+            CREATE TEMP TABLE ranked_units ON COMMIT DROP AS
+            SELECT user_id, array_agg(id ORDER BY effective_power DESC, id) AS ids
+            FROM (
+                SELECT user_id, id, effective_power,
+                       ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY effective_power DESC, id) AS rn
+                FROM inventory
+            ) r
+            WHERE rn <= 10
+            GROUP BY user_id
+        """)
+        counts['teams'] = int((await conn.execute("""
+            INSERT INTO teams (user_id, slot_1, slot_2, slot_3, slot_4, slot_5)
+            SELECT user_id, ids[1], ids[2], ids[3], ids[4], ids[5] FROM ranked_units
+            WHERE abs(hashtext(user_id)) % 10 < 8
+        """)).split()[-1])
+        counts['team_presets'] = int((await conn.execute("""
+            INSERT INTO team_presets (user_id, preset_name, slot_1, slot_2, slot_3, slot_4, slot_5)
+            SELECT user_id, 'Main', ids[1], ids[2], ids[3], ids[4], ids[5] FROM ranked_units
+            WHERE abs(hashtext(user_id)) % 4 = 0
+            UNION ALL
+            SELECT user_id, 'Bench', ids[6], ids[7], ids[8], ids[9], ids[10] FROM ranked_units
+            WHERE abs(hashtext(user_id)) % 8 = 0 AND cardinality(ids) >= 10
+        """)).split()[-1])
+        counts['expeditions'] = int((await conn.execute("""
+            INSERT INTO expeditions (user_id, slot_ids, start_time, last_claim)
+            SELECT user_id, ids[6:10], NOW() - (abs(hashtext(user_id)) % 86400) * INTERVAL '1 second', NULL
+            FROM ranked_units
+            WHERE abs(hashtext(user_id)) % 10 < 4 AND cardinality(ids) >= 10
+        """)).split()[-1])
+    print(f"⚔️ teams: {counts['teams']:,}, presets: {counts['team_presets']:,}, expeditions: {counts['expeditions']:,} ({time.perf_counter() - start:.1f}s)")
+
+    await conn.execute("ANALYZE")
+    return counts
+
+async def main():
+    parser = argparse.ArgumentParser(description="Generate a large synthetic dataset for load and scaling tests.")
+    parser.add_argument("--dsn", default=BENCH_DATABASE_URL, help="throwaway database (default: $BENCH_DATABASE_URL)")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--units-per-user", type=int, default=100, help="mean collection size (long-tailed)")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed; the same seed rebuilds the same dataset")
+    parser.add_argument("--truncate", action="store_true", help="wipe the generated tables first")
+    args = parser.parse_args()
+    if not args.dsn:
+        sys.exit("Set BENCH_DATABASE_URL or pass --dsn (never the production database).")
+
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        await run_migrations(conn)
+        start = time.perf_counter()
+        counts = await generate_dataset(conn, args.users, args.units_per_user, args.seed, args.truncate)
+        if counts is None:
+            sys.exit(1)
+        print(f"✅ Generated {sum(counts.values()):,} rows in {time.perf_counter() - start:.1f}s")
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
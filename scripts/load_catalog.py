@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Allow running as `python scripts/load_catalog.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.catalog import CATALOG_PATH, RANKINGS_DIFF_PATH
+from core.database import get_db_pool, batch_cache_characters, bulk_load_catalog
+
+def load_entries(use_diff):
+    if use_diff:
+        # Incremental: only rank changes and new entrants from the last update_ranks run
+        with open(RANKINGS_DIFF_PATH, "r") as f:
+            diff = json.load(f)
+        return diff['changed'] + diff['new']
+    with open(CATALOG_PATH, "r") as f:
+        return json.load(f)
+
+async def bench(entries):
+    """Times the COPY + merge path against the per-row executemany upsert on the same rows."""
+    # batch_cache_characters takes pull records, which carry the rank as 'page'
+    pull_records = [{**e, 'page': e['rank']} for e in entries]
+
+    start = time.perf_counter()
+    await batch_cache_characters(pull_records)
+    executemany_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await bulk_load_catalog(entries)
+    copy_s = time.perf_counter() - start
+
+    print(f"executemany: {executemany_s:7.2f}s  ({len(entries) / executemany_s:,.0f} rows/s)")
+    print(f"copy+merge:  {copy_s:7.2f}s  ({len(entries) / copy_s:,.0f} rows/s)")
+    print(f"speedup:     {executemany_s / copy_s:7.1f}x")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Load the character catalog into characters_cache.")
+    parser.add_argument("--diff", action="store_true", help=f"load only the changes listed in {RANKINGS_DIFF_PATH}")
+    parser.add_argument("--bench", action="store_true", help="also time the old executemany path (writes the same rows twice)")
+    args = parser.parse_args()
+
+    entries = load_entries(args.diff)
+    print(f"📚 {len(entries)} entries to load")
+
+    try:
+        if args.bench:
+            await bench(entries)
+        else:
+            start = time.perf_counter()
+            count = await bulk_load_catalog(entries)
+            print(f"✅ Merged {count} rows into characters_cache in {time.perf_counter() - start:.2f}s")
+    finally:
+        pool = await get_db_pool()
+        await pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,203 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# Allow running as `python scripts/simulate_balance.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.catalog import CharacterCatalog, determine_rarity
+from core.game_math import calculate_effective_power
+from core.npc import NPC_DIFFICULTIES, BOUNTY_TIERS, BOUNTY_UR_POWER, generate_npc_team, generate_bounty_team, npc_favs
+from core.skills import BattleEngine, SKILL_DATA
+
+# Headless balance harness: sample teams from the catalog snapshot, fight every NPC
+# difficulty and bounty tier with the real BattleEngine in a process pool, and write
+# win-rate matrices plus per-skill outcome flips as CSV. Each battle is re-fought with
+# the same seed minus one skill to count how often that skill decided the outcome.
+# Also the engine's throughput benchmark (battles/sec, counterfactual re-runs included).
+RANKINGS_FILE = "data/rankings.json"
+
+# Line-up profiles: rarity odds per slot, from a fresh account up to an all-SSR roster
+PROFILES = {
+    "starter": [("SSR", 0.02), ("SR", 0.11), ("R", 0.87)],
+    "veteran": [("SSR", 0.25), ("SR", 0.50), ("R", 0.25)],
+    "whale":   [("SSR", 1.0)],
+}
+BATTLE_SKILLS = sorted(name for name, data in SKILL_DATA.items() if data['applies_in'] == "b" and data.get("class"))
+OPPONENTS = [f"npc:{d}" for d in NPC_DIFFICULTIES] + [f"bounty:{t}" for t in list(BOUNTY_TIERS) + ["UR"]]
+
+def load_units(path):
+    """Catalog units bucketed by rarity. Falls back to the rank index with mock favourites."""
+    catalog = CharacterCatalog.load(path)
+    if len(catalog):
+        entries = [catalog.by_rank(r) for r in range(1, len(catalog) + 1) if catalog.by_rank(r)]
+    else:
+        with open(RANKINGS_FILE, "r") as f:
+            rankings = json.load(f)
+        entries = []
+        for cid, rank in rankings.items():
+            if rank < 1: continue
+            rarity = determine_rarity(rank)
+            entries.append({'id': int(cid), 'name': f"Character {cid}", 'rank': rank, 'rarity': rarity,
+                            'true_power': calculate_effective_power(npc_favs(rank), rarity, rank)})
+    units = defaultdict(list)
+    for e in entries:
+        units[e['rarity']].append(e)
+    return units
+
+def skill_partner(skill):
+    """Duo skills carry their partner's AniList ID as the first value."""
+    value = SKILL_DATA[skill]['value']
+    return value[0] if isinstance(value, list) and isinstance(value[0], int) and value[0] > 1000 else None
+
+def sample_team(rng, units, profile, skill_rate):
+    tiers, weights = zip(*PROFILES[profile])
+    team = []
+    for _ in range(5):
+        e = rng.choice(units[rng.choices(tiers, weights)[0]])
+        tags = [rng.choice(BATTLE_SKILLS)] if rng.random() < skill_rate else []
+        team.append({'anilist_id': e['id'], 'name': e['name'], 'true_power': e['true_power'],
+                     'rarity': e['rarity'], 'ability_tags': tags, 'image_url': None})
+    # Half the duo skills get their partner on the team, or they would never show up in the stats
+    for i, char in enumerate(team):
+        partner = skill_partner(char['ability_tags'][0]) if char['ability_tags'] else None
+        if partner and rng.random() < 0.5:
+            slot = rng.choice([j for j in range(5) if j != i])
+            team[slot] = dict(team[slot], anilist_id=partner)
+    return team
+
+def build_teams(n_teams, seed, skill_rate, catalog_path):
+    rng = random.Random(seed)
+    units = load_units(catalog_path)
+    teams = []
+    for k in range(n_teams):
+        profile = list(PROFILES)[k % len(PROFILES)]
+        teams.append((f"{profile}-{k // len(PROFILES) + 1}", profile, sample_team(rng, units, profile, skill_rate)))
+    return teams
+
+def opponent_team(opponent, seed):
+    kind, key = opponent.split(":")
+    rng = random.Random(f"npc:{seed}")
+    if kind == "npc":
+        return generate_npc_team(key, rng)
+    power = BOUNTY_UR_POWER if key == "UR" else rng.randint(*BOUNTY_TIERS[key])
+    return generate_bounty_team(key, power)
+
+def without_skill(team, skill):
+    return [dict(c, ability_tags=[t for t in c['ability_tags'] if t != skill]) for c in team]
+
+def run_matchup(task):
+    """Worker: one team vs one opponent for `battles` seeds. Returns outcome counts, skill flips and engine runs."""
+    team_idx, team, opponent, battles, base_seed, counterfactual = task
+    outcomes = {"WIN": 0, "DRAW": 0, "LOSS": 0}
+    flips = defaultdict(lambda: {"present": 0, "changed": 0, "won_because": 0, "lost_because": 0})
+    skills = sorted({t for c in team for t in c['ability_tags']}) if counterfactual else []
+    variants = {s: without_skill(team, s) for s in skills}
+    runs = 0
+
+    for i in range(battles):
+        seed = base_seed + i
+        defender = opponent_team(opponent, seed)
+        outcome = BattleEngine(random.Random(seed)).run(team, defender).outcome
+        outcomes[outcome] += 1
+        runs += 1
+        # Skills and variance roll on their own substreams, so the variant only loses that skill's rolls
+        for skill, variant in variants.items():
+            alt = BattleEngine(random.Random(seed)).run(variant, defender).outcome
+            runs += 1
+            stats = flips[skill]
+            stats["present"] += 1
+            if alt != outcome: stats["changed"] += 1
+            if outcome == "WIN" and alt != "WIN": stats["won_because"] += 1
+            elif outcome != "WIN" and alt == "WIN": stats["lost_because"] += 1
+
+    return team_idx, opponent, outcomes, dict(flips), runs
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Win-rate matrices and per-skill outcome flips across NPC difficulties and bounty tiers.")
+    parser.add_argument("--teams", type=int, default=30, help="sample teams (split evenly across profiles)")
+    parser.add_argument("--battles", type=int, default=2000, help="battles per team and opponent")
+    parser.add_argument("--skill-rate", type=float, default=0.3, help="chance each sampled unit carries a battle skill")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed; the same seed reproduces the same run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="process pool size")
+    parser.add_argument("--catalog", default="data/catalog.json", help="catalog snapshot (falls back to the rank index)")
+    parser.add_argument("--out", default="balance_out", help="directory for the CSV files")
+    parser.add_argument("--no-counterfactual", action="store_true", help="skip the per-skill re-runs (pure throughput)")
+    args = parser.parse_args()
+
+    teams = build_teams(args.teams, args.seed, args.skill_rate, args.catalog)
+    tasks = [
+        (idx, team, opponent, args.battles, args.seed * 1_000_003 + (idx * len(OPPONENTS) + o) * args.battles,
+         not args.no_counterfactual)
+        for idx, (_, _, team) in enumerate(teams)
+        for o, opponent in enumerate(OPPONENTS)
+    ]
+    print(f"⚔️ {len(teams)} teams x {len(OPPONENTS)} opponents x {args.battles:,} battles on {args.workers} workers...")
+
+    outcomes = {}
+    skill_stats = defaultdict(lambda: {"present": 0, "changed": 0, "won_because": 0, "lost_because": 0})
+    total_runs = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for team_idx, opponent, counts, flips, runs in pool.map(run_matchup, tasks, chunksize=4):
+            outcomes[(team_idx, opponent)] = counts
+            total_runs += runs
+            for skill, stats in flips.items():
+                for key, value in stats.items():
+                    skill_stats[skill][key] += value
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(args.out, exist_ok=True)
+    win_rate = lambda c: c["WIN"] / sum(c.values())
+
+    # 1. Team x opponent win rates
+    write_csv(os.path.join(args.out, "winrate_matrix.csv"),
+              ["team", "profile", "base_power", "skills"] + OPPONENTS,
+              [[label, profile, sum(c['true_power'] for c in team), "|".join(t for c in team for t in c['ability_tags'])]
+               + [f"{win_rate(outcomes[(idx, o)]):.4f}" for o in OPPONENTS]
+               for idx, (label, profile, team) in enumerate(teams)])
+
+    # 2. Profile x opponent win rates (pooled battles)
+    profile_rows = []
+    for profile in PROFILES:
+        row = [profile]
+        for o in OPPONENTS:
+            pooled = defaultdict(int)
+            for idx, (_, p, _) in enumerate(teams):
+                if p != profile: continue
+                for key, value in outcomes[(idx, o)].items(): pooled[key] += value
+            row.append(f"{win_rate(pooled):.4f}" if pooled else "")
+        profile_rows.append(row)
+    write_csv(os.path.join(args.out, "winrate_by_profile.csv"), ["profile"] + OPPONENTS, profile_rows)
+
+    # 3. Full outcome counts, long form
+    write_csv(os.path.join(args.out, "outcomes.csv"), ["team", "opponent", "battles", "win", "draw", "loss"],
+              [[teams[idx][0], o, sum(c.values()), c["WIN"], c["DRAW"], c["LOSS"]] for (idx, o), c in outcomes.items()])
+
+    # 4. Per-skill flips against the same seed without the skill: any outcome change (Revive's
+    #    LOSS -> DRAW counts), wins it produced and wins it cost
+    if not args.no_counterfactual:
+        rows = []
+        for skill, s in sorted(skill_stats.items(), key=lambda kv: -kv[1]["changed"] / kv[1]["present"]):
+            rows.append([skill, s["present"], s["changed"], s["won_because"], s["lost_because"],
+                         f"{s['changed'] / s['present']:.4f}", f"{(s['won_because'] - s['lost_because']) / s['present']:+.4f}"])
+        write_csv(os.path.join(args.out, "skill_flips.csv"),
+                  ["skill", "battles", "changed", "won_because", "lost_because", "flip_rate", "net_win_delta"], rows)
+
+    print(f"✅ {total_runs:,} battles in {elapsed:.1f}s: {total_runs / elapsed:,.0f} battles/sec "
+          f"({total_runs / elapsed / args.workers:,.0f} per worker)")
+    print(f"📄 CSVs written to {args.out}/")
+
+if __name__ == "__main__":
+    main()
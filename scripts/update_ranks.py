@@ -1,13 +1,23 @@
-import aiohttp
+import argparse
 import asyncio
 import json
 import os
+import sys
 import time
 
+# Allow running as `python scripts/update_ranks.py` from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.catalog import CATALOG_PATH, CATALOG_SIZE, RANKINGS_DIFF_PATH, build_catalog_entries, save_catalog
+from core.rank_index import RANK_INDEX_PATH, compile_rank_index
+from core.anilist import get_anilist
+from core.http import close_http_session
+
 # Configuration
 OUTPUT_FILE = "data/rankings.json"
-MAX_PAGES = 200  # 50 chars/page * 200 pages = 10,000 Characters
-ANILIST_URL = "https://graphql.anilist.co"
+CHECKPOINT_FILE = "data/update_ranks.checkpoint.jsonl"
+PER_PAGE = 50
+MAX_PAGES = CATALOG_SIZE // PER_PAGE  # 50 chars/page * 200 pages = 10,000 Characters
+CONCURRENCY = 5  # in-flight pages; the AniList client's token bucket sets the actual pace
 
 QUERY = """
 query ($page: Int) {
@@ -16,57 +26,135 @@ query ($page: Int) {
         characters(sort: FAVOURITES_DESC) {
             id
             name { full }
+            image { large }
             favourites
         }
     }
 }
 """
 
-async def fetch_page(session, page):
-    try:
-        async with session.post(ANILIST_URL, json={'query': QUERY, 'variables': {'page': page}}) as resp:
-            if resp.status == 429:
-                print(f"⏳ Rate Limit hit on page {page}. Waiting 60s...")
-                await asyncio.sleep(60)
-                return await fetch_page(session, page)
-            if resp.status != 200:
-                print(f"❌ Error on page {page}: {resp.status}")
-                return []
-            
-            data = await resp.json()
-            return data['data']['Page']['characters']
-    except Exception as e:
-        print(f"⚠️ Exception on page {page}: {e}")
-        return []
+async def fetch_page(page):
+    """Returns the page's characters, [] past the last page, or None on failure."""
+    # 429s and pacing are handled by the shared client (token bucket + Retry-After)
+    data = await get_anilist().query(QUERY, {'page': page})
+    if not data or not data.get('data'):
+        print(f"❌ Error on page {page}")
+        return None
+    return data['data']['Page']['characters']
+
+def load_checkpoint():
+    """Pages finished by an earlier run. A torn last line (crash mid-write) is ignored."""
+    pages = {}
+    if not os.path.exists(CHECKPOINT_FILE): return pages
+    with open(CHECKPOINT_FILE, "r") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            pages[row['page']] = row['characters']
+    return pages
+
+async def scrape(pages, concurrency, checkpoint):
+    """Fetches every missing page with bounded concurrency, appending each to the checkpoint as it lands."""
+    sem = asyncio.Semaphore(concurrency)
+    todo = [p for p in range(1, MAX_PAGES + 1) if p not in pages]
+
+    async def worker(page):
+        async with sem:
+            chars = await fetch_page(page)
+        if chars is None: return
+        pages[page] = chars
+        checkpoint.write(json.dumps({'page': page, 'characters': chars}) + "\n")
+        checkpoint.flush()
+        print(f"✅ Indexed Page {page}/{MAX_PAGES} ({len(pages)} done)")
+
+    await asyncio.gather(*(worker(p) for p in todo))
+
+def build_diff(old_map, ranked_chars, entries):
+    """Rank changes, new entrants and dropped IDs versus the previous rankings.json."""
+    new_ids = set()
+    changed, added = [], []
+    for char, entry in zip(ranked_chars, entries):
+        key = str(char['id'])
+        new_ids.add(key)
+        if key not in old_map:
+            added.append(entry)
+        elif old_map[key] != entry['rank']:
+            changed.append({**entry, 'old_rank': old_map[key]})
+    dropped = [{'id': int(k), 'old_rank': r} for k, r in old_map.items() if k not in new_ids]
+    return {'generated_at': int(time.time()), 'changed': changed, 'new': added, 'dropped': dropped}
 
 async def main():
+    parser = argparse.ArgumentParser(description="Scrape the top AniList characters into rankings, the rank index and the catalog.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="pages in flight at once")
+    parser.add_argument("--resume", action="store_true", help=f"continue from {CHECKPOINT_FILE} instead of starting over")
+    args = parser.parse_args()
+
     if not os.path.exists("data"):
         os.makedirs("data")
 
-    print(f"🚀 Starting Scrape of Top {MAX_PAGES * 50} Characters...")
-    
-    rank_map = {}
-    current_rank = 1
-    
-    async with aiohttp.ClientSession() as session:
-        for page in range(1, MAX_PAGES + 1):
-            chars = await fetch_page(session, page)
-            if not chars: break
-            
-            for char in chars:
-                # Map ID -> Rank
-                rank_map[str(char['id'])] = current_rank
-                current_rank += 1
-            
-            print(f"✅ Indexed Page {page}/{MAX_PAGES} (Rank {current_rank-1})")
-            
-            # Be nice to API (0.8s delay prevents 90req/min limit)
-            await asyncio.sleep(0.8)
+    pages = load_checkpoint() if args.resume else {}
+    if pages:
+        print(f"♻️ Resuming: {len(pages)} pages already in {CHECKPOINT_FILE}")
+    print(f"🚀 Starting Scrape of Top {MAX_PAGES * PER_PAGE} Characters (concurrency {args.concurrency})...")
+
+    start = time.perf_counter()
+    try:
+        with open(CHECKPOINT_FILE, "a" if args.resume else "w") as checkpoint:
+            await scrape(pages, args.concurrency, checkpoint)
+    finally:
+        await close_http_session()
+
+    # Pages are only trusted up to the first gap: a failed page would shift every later rank
+    ranked_chars = []
+    for page in range(1, MAX_PAGES + 1):
+        if page not in pages:
+            print(f"⚠️ Page {page} failed. Nothing written; re-run with --resume to fetch the missing pages.")
+            return
+        if not pages[page]: break
+        ranked_chars.extend(pages[page])
+    print(f"⏱️ Scraped in {time.perf_counter() - start:.1f}s")
+
+    # Favourites shift while pages are fetched concurrently, so one character can show up on
+    # two pages. Keep its first (best) placement so ranks stay contiguous.
+    seen = set()
+    deduped = []
+    for char in ranked_chars:
+        if char['id'] in seen: continue
+        seen.add(char['id'])
+        deduped.append(char)
+    if len(deduped) != len(ranked_chars):
+        print(f"🧹 Dropped {len(ranked_chars) - len(deduped)} duplicate IDs seen on more than one page")
+    ranked_chars = deduped[:CATALOG_SIZE]
+
+    # Map ID -> Rank
+    rank_map = {str(char['id']): rank for rank, char in enumerate(ranked_chars, start=1)}
+    entries = build_catalog_entries(ranked_chars)
+
+    old_map = {}
+    if os.path.exists(OUTPUT_FILE):
+        with open(OUTPUT_FILE, "r") as f:
+            old_map = json.load(f)
+    diff = build_diff(old_map, ranked_chars, entries)
+    with open(RANKINGS_DIFF_PATH, "w") as f:
+        json.dump(diff, f, separators=(",", ":"))
+    print(f"🔀 Diff: {len(diff['changed'])} rank changes, {len(diff['new'])} new, {len(diff['dropped'])} dropped -> {RANKINGS_DIFF_PATH}")
 
     with open(OUTPUT_FILE, "w") as f:
         json.dump(rank_map, f)
-    
+
     print(f"🎉 Done! Saved {len(rank_map)} rankings to {OUTPUT_FILE}")
 
+    # Binary index the bot actually loads (mmapped; `!reload_ranks` picks it up live)
+    compile_rank_index(rank_map)
+    print(f"🗂️ Compiled rank index to {RANK_INDEX_PATH}")
+
+    # Offline catalog: lets the Gacha cog resolve pulls without calling AniList
+    save_catalog(entries)
+    print(f"📚 Saved {len(entries)} catalog entries to {CATALOG_PATH}")
+
+    os.remove(CHECKPOINT_FILE)
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())